@@ -23,14 +23,22 @@ Notes
 """
 
 from .testing import MathTest, MathTestVariable  # type: ignore # noqa: F401,F403
+from .fast_ops import *  # noqa: F401,F403
+from .numpy_ops import *  # noqa: F401,F403
 from .tensor_data import *  # noqa: F401,F403
+from .memory_pool import *  # noqa: F401,F403
 from .tensor import *  # noqa: F401,F403
 from .tensor_ops import *  # noqa: F401,F403
 from .tensor_functions import *  # noqa: F401,F403
+from .fusion import Program, fuse  # noqa: F401
+from .capture import CapturedStep, capture  # noqa: F401
+from .memory_plan import MemoryPlan, plan_memory  # noqa: F401
+from .profiling import profiler  # noqa: F401
 from .datasets import *  # noqa: F401,F403
 from .optim import *  # noqa: F401,F403
 from .testing import *  # noqa: F401,F403
 from .module import *  # noqa: F401,F403
+from . import data, nn  # noqa: F401
 from .autodiff import *  # noqa: F401,F403
 from .scalar import *  # noqa: F401,F403
 from .scalar_functions import *  # noqa: F401,F403
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Any, Iterable, Tuple, Protocol
+import functools
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Protocol
+
+from .capture import active_tape
 
 
 # ## Task 1.1
@@ -39,6 +44,70 @@ def central_difference(f: Any, *vals: Any, arg: int = 0, epsilon: float = 1e-6)
 variable_count = 1
 
 
+# ## Gradient mode
+
+_grad_mode = threading.local()
+
+
+def is_grad_enabled() -> bool:
+    """True if functions applied on this thread record history"""
+    return getattr(_grad_mode, "enabled", True)
+
+
+def set_grad_enabled(mode: bool) -> None:
+    """Turn history recording on or off for this thread"""
+    _grad_mode.enabled = mode
+
+
+class no_grad:
+    """Context manager that turns off history recording on this thread. ::
+
+        with minitorch.no_grad():
+            out = model.forward(x)
+
+    Inside the block `Function.apply` skips detaching inputs, building a
+    `Context` and creating a `History`, and returns constants. It can also
+    decorate a function.
+    """
+
+    mode = False
+
+    def __init__(self) -> None:
+        self.prev: List[bool] = []
+
+    def __enter__(self) -> None:
+        self.prev.append(is_grad_enabled())
+        set_grad_enabled(self.mode)
+
+    def __exit__(self, *args: Any) -> None:
+        set_grad_enabled(self.prev.pop())
+
+    def __call__(self, fn: Any) -> Any:
+        """Run `fn` inside this mode"""
+
+        @functools.wraps(fn)
+        def wrapped(*args: Any, **kwargs: Any) -> Any:
+            with type(self)():
+                return fn(*args, **kwargs)
+
+        return wrapped
+
+
+class enable_grad(no_grad):
+    """Context manager that turns history recording back on, for example
+    inside a `no_grad` block.
+    """
+
+    mode = True
+
+
+class inference_mode(no_grad):
+    """Context manager for code that never needs gradients.
+
+    Same fast path as `no_grad`; kept as its own name for serving code.
+    """
+
+
 class Variable(Protocol):
     def accumulate_derivative(self, x: Any) -> None:
         """Accumulate all derivatives"""
@@ -57,6 +126,11 @@ class Variable(Protocol):
         """Check if self is constant"""
         ...
 
+    @property
+    def history(self) -> Any:
+        """Get the history that holds the `Context`"""
+        ...
+
     @property
     def parents(self) -> Iterable["Variable"]:
         """Get all parents"""
@@ -70,6 +144,10 @@ class Variable(Protocol):
 def topological_sort(variable: Variable) -> Iterable[Variable]:
     """Computes the topological order of the computation graph.
 
+    Walks the graph with an explicit stack, so its depth is not bounded by
+    the recursion limit. Constant variables and everything behind them are
+    skipped.
+
     Args:
     ----
         variable: The right-most variable
@@ -79,52 +157,163 @@ def topological_sort(variable: Variable) -> Iterable[Variable]:
         Non-constant Variables in topological order starting from the right.
 
     """
-    sorted_list = []
+    if variable.is_constant():
+        return []
+
+    sorted_list: List[Variable] = []
     visited = set()
+    # Entries are `(variable, expanded)`; a variable is emitted when it is
+    # popped the second time, after all of its parents.
+    stack: List[Tuple[Variable, bool]] = [(variable, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            sorted_list.append(node)
+            continue
+        if node.unique_id in visited:
+            continue
+        visited.add(node.unique_id)
+        stack.append((node, True))
+        if node.is_leaf():
+            continue
+        for parent in node.parents:
+            if not parent.is_constant() and parent.unique_id not in visited:
+                stack.append((parent, False))
+    sorted_list.reverse()
+    return sorted_list
 
-    def dfs(variable: Variable) -> None:
-        if variable.unique_id in visited:
-            return
 
-        for parent in variable.parents:
-            dfs(parent)
+# Leaves are accumulated under this lock. A checkpointed segment runs its
+# own backward from inside `chain_rule`, which can be on a pool thread,
+# and its leaves may be shared with the rest of the graph.
+_accumulate_lock = threading.Lock()
 
-        visited.add(variable.unique_id)
-        sorted_list.append(variable)
 
-    dfs(variable)
-    sorted_list.reverse()
-    return sorted_list
+def _accumulate(
+    variable: Variable, d: Any, accumulate: Optional[Callable[[Any, Any], None]]
+) -> None:
+    with _accumulate_lock:
+        if accumulate is None:
+            variable.accumulate_derivative(d)
+        else:
+            accumulate(variable, d)
 
 
-def backpropagate(root: Variable, deriv: Any) -> None:
+def _chain_rule(variable: Variable, d: Any, grad_mode: bool) -> List[Tuple[Any, Any]]:
+    """Run `variable.chain_rule(d)` with the caller's grad mode, restoring
+    the grad mode of the running thread afterwards.
+    """
+    if variable.history.ctx.released:
+        raise RuntimeError(
+            "Trying to backward through the graph a second time; its saved "
+            "values were released. Pass retain_graph=True to the first backward."
+        )
+    prev = is_grad_enabled()
+    set_grad_enabled(grad_mode)
+    try:
+        return list(variable.chain_rule(d))
+    finally:
+        set_grad_enabled(prev)
+
+
+def backpropagate(
+    root: Variable,
+    deriv: Any,
+    retain_graph: bool = False,
+    num_threads: int = 1,
+    accumulate: Optional[Callable[[Any, Any], None]] = None,
+) -> None:
     """Runs backpropagation on the computation graph in order to
     compute derivatives for the leave nodes.
 
+    Each variable counts the edges to the variables that consume it. A
+    variable runs its `chain_rule` once all of its consumers have
+    contributed, and its accumulated derivative is dropped right after. The
+    saved values of its `Context` are released at the same point unless
+    `retain_graph` is set, so memory is freed while the backward runs.
+
+    With `num_threads > 1`, every variable that is ready runs its
+    `chain_rule` on a thread pool, so independent branches of the graph are
+    processed at the same time. Derivatives are still summed on the calling
+    thread. Leaves are accumulated under a lock, since the backward of a
+    `checkpoint` segment accumulates its own leaves from a pool thread.
+
     Args:
     ----
         root: The right-most variable
         deriv  : Its derivative that we want to propagate backward to the leaves.
+        retain_graph : keep the saved values so that the graph can be
+            backpropagated again
+        num_threads : number of threads running `chain_rule`
+        accumulate : called as `accumulate(leaf, d)` in place of
+            `leaf.accumulate_derivative(d)`, under the same lock
 
     Returns:
     -------
         None: Updates the derivative values of each leaf through accumulate_derivative`.
 
+    Raises:
+    ------
+        RuntimeError : if the graph was already released by an earlier backward
+
     """
-    children_sorted = topological_sort(root)
-    derivative_map = {}
-    for child in children_sorted:
-        derivative_map[child.unique_id] = 0
-    derivative_map[root.unique_id] = deriv
-
-    for child in children_sorted:
-        d = derivative_map[child.unique_id]
-        if child.is_leaf():
-            child.accumulate_derivative(d)
-        else:
-            chain_rule_result = child.chain_rule(d)
-            for respect_x, partial_df_dx in chain_rule_result:
-                derivative_map[respect_x.unique_id] += partial_df_dx
+    if root.is_constant():
+        return
+    pending: Dict[int, int] = {}
+    for variable in topological_sort(root):
+        if variable.is_leaf():
+            continue
+        for parent in variable.parents:
+            if not parent.is_constant():
+                pending[parent.unique_id] = pending.get(parent.unique_id, 0) + 1
+
+    derivatives = {root.unique_id: deriv}
+    ready = [root]
+    grad_mode = is_grad_enabled()
+
+    def finish(variable: Variable, results: List[Tuple[Any, Any]]) -> None:
+        for parent, d_parent in results:
+            if parent.is_constant():
+                continue
+            key = parent.unique_id
+            if key in derivatives:
+                derivatives[key] = derivatives[key] + d_parent
+            else:
+                derivatives[key] = d_parent
+            pending[key] -= 1
+            if pending[key] == 0:
+                ready.append(parent)
+        if not retain_graph:
+            variable.history.ctx.release()
+
+    def take() -> Tuple[Variable, Any]:
+        variable = ready.pop()
+        d = derivatives.pop(variable.unique_id)
+        return variable, d
+
+    # A tape records kernels in call order, so capturing stays serial.
+    if num_threads <= 1 or active_tape() is not None:
+        while ready:
+            variable, d = take()
+            if variable.is_leaf():
+                _accumulate(variable, d, accumulate)
+            else:
+                finish(variable, _chain_rule(variable, d, grad_mode))
+        return
+
+    with ThreadPoolExecutor(num_threads) as pool:
+        running: Dict[Future, Variable] = {}
+        while ready or running:
+            while ready:
+                variable, d = take()
+                if variable.is_leaf():
+                    _accumulate(variable, d, accumulate)
+                else:
+                    job = pool.submit(_chain_rule, variable, d, grad_mode)
+                    running[job] = variable
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for job in done:
+                finish(running.pop(job), job.result())
 
 
 @dataclass
@@ -133,14 +322,47 @@ class Context:
 
     no_grad: bool = False
     saved_values: Tuple[Any, ...] = ()
+    saved_versions: Tuple[int, ...] = ()
+    released: bool = False
 
     def save_for_backward(self, *values: Any) -> None:
-        """Store the given `values` if they need to be used during backpropagation."""
+        """Store the given `values` if they need to be used during backpropagation.
+
+        The `_version` of each value is recorded too, so that
+        `check_saved_versions` can detect later in-place writes.
+        """
         if self.no_grad:
             return
         self.saved_values = values
+        self.saved_versions = tuple(getattr(v, "_version", 0) for v in values)
+
+    def check_saved_versions(self) -> None:
+        """Raise if a saved value was modified in place since it was saved.
+
+        Raises
+        ------
+            RuntimeError : if the version of a saved value changed
+
+        """
+        for i, (v, version) in enumerate(zip(self.saved_values, self.saved_versions)):
+            if getattr(v, "_version", 0) != version:
+                raise RuntimeError(
+                    f"Saved value {i} was modified by an in-place operation "
+                    f"(version {version} -> {v._version}) and is needed for backward."
+                )
+
+    def release(self) -> None:
+        """Drop the saved values once the backward no longer needs them"""
+        self.saved_values = ()
+        self.saved_versions = ()
+        self.released = True
 
     @property
     def saved_tensors(self) -> Tuple[Any, ...]:
         """Returns saved tensors"""
         return self.saved_values
+
+
+# Passed to every function applied while history recording is off. With
+# `no_grad` set, `save_for_backward` stores nothing, so it can be shared.
+NO_GRAD_CONTEXT = Context(no_grad=True)
@@ -0,0 +1,243 @@
+"""Capture and replay of fixed-shape training steps.
+
+A training step rebuilds the same graph every time it runs: each op goes
+through `Function.apply`, builds a `Context` and a `History`, broadcasts
+shapes and allocates its output. `capture` runs a step once while
+recording every backend kernel call, together with the tensor it wrote,
+on a `Tape`. Later calls copy the new inputs into the captured input
+tensors and replay the tape, writing into the same buffers, with none of
+the Python-level graph construction. ::
+
+    @minitorch.capture
+    def train_step(x, y):
+        optim.zero_grad()
+        loss = model.forward(x).loss(y)
+        loss.backward()
+        optim.step()
+        return loss
+
+Only kernel calls are replayed. Values read back into Python during the
+capture (`item`, indexing, branching on data) and tensors built from
+Python data, including `rand`, are frozen at their captured values.
+"""
+
+from __future__ import annotations
+
+import functools
+import threading
+import weakref
+from typing import TYPE_CHECKING
+
+from . import profiling
+from .memory_plan import MemoryPlan, plan_memory
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, List, Optional, Tuple
+
+    from .tensor import Tensor
+    from .tensor_ops import TensorBackend
+
+    Call = Tuple[Callable[..., Any], Tuple[Any, ...], Dict[str, Any]]
+
+
+class Tape:
+    """Recorded calls, replayed in order by `replay`"""
+
+    def __init__(self) -> None:
+        self.calls: List[Call] = []
+        self.kept: List[Tensor] = []
+
+    def record(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """Append the call `fn(*args, **kwargs)`"""
+        self.calls.append((fn, args, kwargs))
+
+    def keep(self, *tensors: Tensor) -> None:
+        """Mark `tensors` as living across replays, such as optimizer
+        state, so that `plan_memory` leaves their memory alone.
+        """
+        self.kept.extend(tensors)
+
+    def replay(self) -> None:
+        """Run every recorded call again"""
+        for fn, args, kwargs in self.calls:
+            fn(*args, **kwargs)
+
+
+# The tape being recorded, if any. Capturing is not thread-safe.
+_active: Optional[Tape] = None
+
+
+def active_tape() -> Optional[Tape]:
+    """The tape being recorded, or None outside `capture`"""
+    return _active
+
+
+# Backends call their kernels bare. While a tape is recorded or a
+# profiler is active, each backend swaps in kernels wrapped by `recorded`.
+_backends: weakref.WeakSet[TensorBackend] = weakref.WeakSet()
+_hooks = 0
+_hooks_lock = threading.Lock()
+
+
+def register(backend: TensorBackend) -> None:
+    """Track `backend` so that `instrument` can wrap its kernels"""
+    with _hooks_lock:
+        _backends.add(backend)
+        backend._instrument(_hooks > 0)
+
+
+def instrument(on: bool) -> None:
+    """Start (`on`) or stop one user of the `recorded` kernels.
+
+    The wrapped kernels are installed in every backend when the first user
+    starts and removed when the last one stops.
+    """
+    global _hooks
+    with _hooks_lock:
+        was_on = _hooks > 0
+        _hooks += 1 if on else -1
+        if was_on != (_hooks > 0):
+            for backend in list(_backends):
+                backend._instrument(_hooks > 0)
+
+
+def recorded(
+    kernel: Callable[..., Any], name: str, flops: int = 1
+) -> Callable[..., Any]:
+    """Wrap a backend kernel so that calls made while capturing are
+    recorded with the tensor they wrote, and calls made while profiling
+    are timed. See `instrument`.
+
+    On replay the kernel is called again with that tensor as `out`, so it
+    writes into the same buffer instead of allocating. The recorded call
+    always passes `out` by keyword.
+
+    Args:
+    ----
+        kernel : function of tensors taking an optional `out`
+        name : kernel name reported to `minitorch.profiler`
+        flops : estimated floating point operations per element
+
+    Returns:
+    -------
+        Kernel with the same signature
+
+    """
+
+    def run(*args: Any, **kwargs: Any) -> Any:
+        if profiling.active is None:
+            out = kernel(*args, **kwargs)
+        else:
+            out = profiling.active.kernel(name, flops, kernel, args, kwargs)
+        if _active is not None:
+            if "out" not in kwargs:
+                # `out` is always the last parameter of a kernel.
+                if args and out is args[-1]:
+                    args = args[:-1]
+                kwargs = dict(kwargs, out=out)
+            _active.record(kernel, *args, **kwargs)
+        return out
+
+    return run
+
+
+class CapturedStep:
+    """A function of tensors that is captured on its first call and
+    replayed on later calls.
+
+    Every later call must pass tensors of the captured shapes. The tensors
+    returned are the captured ones, overwritten by each replay.
+
+    Args:
+    ----
+        fn : function of tensors, returning a tensor or a tuple of tensors
+
+    """
+
+    def __init__(self, fn: Callable[..., Any]):
+        self.fn = fn
+        self.tape: Optional[Tape] = None
+        self.inputs: Tuple[Tensor, ...] = ()
+        self.outputs: Any = None
+        functools.update_wrapper(self, fn)
+
+    def __call__(self, *inputs: Tensor) -> Any:
+        """Capture on the first call, otherwise copy `inputs` in and replay"""
+        if self.tape is None:
+            return self.capture(*inputs)
+        assert len(inputs) == len(self.inputs), "Wrong number of inputs"
+        for captured, new in zip(self.inputs, inputs):
+            if new is captured:
+                continue
+            assert (
+                new.shape == captured.shape
+            ), f"Captured with shape {captured.shape}, got {new.shape}"
+            captured.copy_(new)
+        self.tape.replay()
+        return self.outputs
+
+    def capture(self, *inputs: Tensor) -> Any:
+        """Run `fn` once and record it, replacing any earlier capture.
+
+        Args:
+        ----
+            *inputs : tensors to call `fn` with; later calls copy into them
+
+        Returns:
+        -------
+            The outputs of `fn`
+
+        """
+        global _active
+        assert _active is None, "capture cannot be nested"
+        tape = Tape()
+        _active = tape
+        instrument(True)
+        try:
+            outputs = self.fn(*inputs)
+        finally:
+            _active = None
+            instrument(False)
+        self.tape = tape
+        self.inputs = inputs
+        self.outputs = outputs
+        return outputs
+
+    def plan_memory(self, apply: bool = True) -> MemoryPlan:
+        """Share memory between the intermediate buffers of the capture.
+
+        Args:
+        ----
+            apply : move the buffers into the planned arenas
+
+        Returns:
+        -------
+            The `MemoryPlan`, with planned and naive bytes
+
+        """
+        assert self.tape is not None, "Call the step once to capture it"
+        plan = plan_memory(self.tape, keep=(self.inputs, self.outputs))
+        if apply:
+            plan.apply()
+        return plan
+
+    def reset(self) -> None:
+        """Drop the capture, so that the next call records again"""
+        self.tape = None
+        self.inputs = ()
+        self.outputs = None
+
+
+def capture(fn: Callable[..., Any]) -> CapturedStep:
+    """Capture `fn` on its first call and replay it on later calls.
+
+    Args:
+    ----
+        fn : fixed-shape step, usually forward, backward and optimizer update
+
+    Returns:
+    -------
+        `CapturedStep` wrapping `fn`
+
+    """
+    return CapturedStep(fn)
@@ -0,0 +1,181 @@
+"""Mini-batch loading of datasets into tensors.
+
+`DataLoader` keeps each source as one contiguous float64 array and builds
+every batch with a single gather into pooled storage (see
+`memory_pool.py`). A worker thread builds the next batches while the
+current training step runs. NumPy releases the GIL while it copies, so
+that work overlaps with the step.
+"""
+
+from __future__ import annotations
+
+import queue
+import random
+import threading
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .datasets import Graph
+from .memory_pool import storage_pool
+from .tensor import Tensor
+from .tensor_data import TensorData
+from .tensor_ops import SimpleBackend
+
+if TYPE_CHECKING:
+    from typing import Any, Generator, Iterator, List, Sequence, Tuple, Union
+
+    import numpy.typing as npt
+
+    from .tensor_ops import TensorBackend
+
+    Source = Union[Graph, Sequence[Any]]
+
+
+# Marks the end of an epoch on the prefetch queue.
+_DONE = object()
+
+
+class DataLoader:
+    """Iterate over a dataset in mini-batches of tensors.
+
+    Each iteration is one epoch and yields a tuple with one tensor per
+    array of the source. For a `datasets.Graph` that is `(X, y)`, with
+    shapes `(batch, 2)` and `(batch,)`. ::
+
+        loader = DataLoader(minitorch.datasets["Xor"](1000), 64, shuffle=True)
+        for epoch in range(epochs):
+            for X, y in loader:
+                ...
+
+    Args:
+    ----
+        source : a `datasets.Graph`, or a sequence of arrays, nested lists
+            or tensors that share their first dimension
+        batch_size : number of rows per batch
+        shuffle : visit the rows in a new random order every epoch; the
+            order is seeded from `random`, so `random.seed` repeats it
+        drop_last : skip a final batch smaller than `batch_size`, so that
+            every batch has the same shape, as `minitorch.capture` needs
+        prefetch : batches built ahead on a worker thread, 0 to build
+            them on the calling thread
+        backend : tensor backend of the batches
+
+    """
+
+    arrays: List[npt.NDArray[np.float64]]
+
+    def __init__(
+        self,
+        source: Source,
+        batch_size: int = 1,
+        shuffle: bool = False,
+        drop_last: bool = False,
+        prefetch: int = 2,
+        backend: TensorBackend = SimpleBackend,
+    ):
+        assert batch_size > 0, "batch_size must be positive"
+        if isinstance(source, Graph):
+            source = (source.X, source.y)
+        self.arrays = [_as_array(a) for a in source]
+        assert self.arrays, "DataLoader needs at least one array"
+        self.size = len(self.arrays[0])
+        for a in self.arrays:
+            assert len(a) == self.size, "Arrays must share their first dimension"
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.prefetch = prefetch
+        self.backend = backend
+
+    def __len__(self) -> int:
+        """Number of batches per epoch"""
+        if self.drop_last:
+            return self.size // self.batch_size
+        return -(-self.size // self.batch_size)
+
+    def _batch(self, start: int, stop: int, order: Any) -> List[TensorData]:
+        """Copy rows `start:stop`, of `order` if given, of every array into
+        new contiguous storage.
+        """
+        out = []
+        for a in self.arrays:
+            shape = (stop - start,) + a.shape[1:]
+            storage = storage_pool.zeros(int(np.prod(shape, dtype=np.int64)))
+            if order is None:
+                storage.reshape(shape)[...] = a[start:stop]
+            else:
+                np.take(a, order[start:stop], axis=0, out=storage.reshape(shape))
+            out.append(TensorData(storage, shape))
+        return out
+
+    def _batches(self, order: Any) -> Generator[List[TensorData], None, None]:
+        """Build the batches of one epoch, visiting rows in `order`"""
+        for i in range(len(self)):
+            start = i * self.batch_size
+            yield self._batch(start, min(start + self.batch_size, self.size), order)
+
+    def __iter__(self) -> Iterator[Tuple[Tensor, ...]]:
+        # The order is drawn here so that it does not depend on when the
+        # worker runs. Tensors are also made on this thread; the worker only
+        # builds their storage.
+        order = None
+        if self.shuffle:
+            rng = np.random.default_rng(random.getrandbits(64))
+            order = rng.permutation(self.size)
+        if self.prefetch <= 0:
+            batches = self._batches(order)
+        else:
+            batches = self._prefetched(order)
+        try:
+            for batch in batches:
+                yield tuple(Tensor(t, backend=self.backend) for t in batch)
+        finally:
+            batches.close()
+
+    def _prefetched(self, order: Any) -> Generator[List[TensorData], None, None]:
+        """Yield the batches of `_batches`, built on a worker thread"""
+        ready: queue.Queue[Any] = queue.Queue(self.prefetch)
+        stop = threading.Event()
+
+        def put(item: Any) -> bool:
+            # Wait for room, giving up if the consumer has gone away.
+            while not stop.is_set():
+                try:
+                    ready.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def work() -> None:
+            try:
+                for batch in self._batches(order):
+                    if not put(batch):
+                        return
+            except BaseException as e:
+                put(e)
+                return
+            put(_DONE)
+
+        worker = threading.Thread(target=work, daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = ready.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Also runs when the loop over the loader breaks early.
+            stop.set()
+            worker.join()
+
+
+def _as_array(a: Any) -> npt.NDArray[np.float64]:
+    """Contiguous float64 copy of one data source"""
+    if isinstance(a, Tensor):
+        return np.ascontiguousarray(a.to_numpy(), dtype=np.float64)
+    return np.array(a, dtype=np.float64)
@@ -0,0 +1,758 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, TypeVar
+
+import numpy as np
+from numba import get_num_threads, prange
+from numba import njit as _njit
+
+from .tensor_data import (
+    MAX_DIMS,
+    advance_index,
+    broadcast_strides,
+    is_dense,
+    is_row_major,
+    shape_broadcast,
+    strides_aligned,
+    to_index,
+)
+from .fusion import run_program, run_program_back
+from .tensor_ops import (
+    MATMUL_BLOCK,
+    MapProto,
+    ReduceProto,
+    TensorBackend,
+    TensorOps,
+    ZipProto,
+    fused_args,
+    fused_back_out,
+    fused_multi_out,
+    fused_out,
+    matmul_out,
+    sum_to_shape_out,
+)
+
+if TYPE_CHECKING:
+    from typing import Callable, Optional, Tuple
+
+    from .fusion import Program
+    from .tensor import Tensor
+    from .tensor_data import Index, Shape, Storage, Strides, UserShape
+
+# TIP: Use `NUMBA_DISABLE_JIT=1 pytest tests/` to run these kernels without JIT.
+
+# This code will JIT compile fast versions of the tensor_data functions.
+# If you get an error, read the docs for NUMBA as to what is allowed
+# in these functions.
+Fn = TypeVar("Fn")
+
+
+def njit(fn: Fn, **kwargs: Any) -> Fn:
+    """JIT compile `fn` so that it is inlined into its numba callers."""
+    return _njit(inline="always", **kwargs)(fn)  # type: ignore
+
+
+to_index = njit(to_index)
+broadcast_strides = njit(broadcast_strides)
+advance_index = njit(advance_index)
+strides_aligned = njit(strides_aligned)
+is_row_major = njit(is_row_major)
+is_dense = njit(is_dense)
+run_program = njit(run_program)
+run_program_back = njit(run_program_back)
+
+
+@njit
+def _chunk_start(
+    start: int, shape: Shape, strides: Strides, index: Index, positions: Index
+) -> None:
+    """Set `index` to ordinal `start` of `shape` and each operand's position."""
+    to_index(start, shape, index)
+    for k in range(len(positions)):
+        positions[k] = 0
+        for d in range(len(shape)):
+            positions[k] += index[d] * strides[k, d]
+
+
+@njit
+def _size(shape: Shape) -> int:
+    """Number of elements in `shape`."""
+    size = 1
+    for d in range(len(shape)):
+        size *= shape[d]
+    return size
+
+
+@njit
+def _num_chunks(n: int) -> int:
+    """Split `n` work items into a few chunks per thread."""
+    return max(1, min(n, 4 * get_num_threads()))
+
+
+class FastOps(TensorOps):
+    @staticmethod
+    def map(fn: Callable[[float], float]) -> MapProto:
+        """See `tensor_ops.py`"""
+        # This line JIT compiles the tensor_map kernel
+        f = tensor_map(njit(fn))
+
+        def ret(a: Tensor, out: Optional[Tensor] = None) -> Tensor:
+            if out is None:
+                out = a.zeros(a.shape)
+            f(*out.tuple(), *a.tuple())
+            return out
+
+        return ret
+
+    @staticmethod
+    def zip(fn: Callable[[float, float], float]) -> ZipProto:
+        """See `tensor_ops.py`"""
+        f = tensor_zip(njit(fn))
+
+        def ret(a: Tensor, b: Tensor, out: Optional[Tensor] = None) -> Tensor:
+            c_shape = shape_broadcast(a.shape, b.shape)
+            if out is None:
+                out = a.zeros(c_shape)
+            else:
+                assert out.shape == c_shape, f"out {out.shape} must be {c_shape}"
+            f(*out.tuple(), *a.tuple(), *b.tuple())
+            return out
+
+        return ret
+
+    @staticmethod
+    def reduce(fn: Callable[[float, float], float], start: float = 0.0) -> ReduceProto:
+        """See `tensor_ops.py`"""
+        f = tensor_reduce(njit(fn))
+
+        def ret(a: Tensor, dim: int, out: Optional[Tensor] = None) -> Tensor:
+            out_shape = list(a.shape)
+            if dim >= 0:
+                out_shape[dim] = 1
+            else:
+                out_shape = [1]
+
+            # Other values when not sum.
+            if out is None:
+                out = a.zeros(tuple(out_shape))
+                out._tensor._storage[:] = start
+            else:
+                assert out.shape == tuple(out_shape), f"out must be {out_shape}"
+                out.fill_(start)
+
+            f(*out.tuple(), *a.tuple(), dim)
+            return out
+
+        return ret
+
+    @staticmethod
+    def matrix_multiply(a: Tensor, b: Tensor, out: Optional[Tensor] = None) -> Tensor:
+        """Batched tensor matrix multiply. See `tensor_ops.py`.
+
+        Args:
+        ----
+            a : tensor data a
+            b : tensor data b
+            out : optional, tensor to fill in with the output shape
+
+        Returns:
+        -------
+            New tensor data
+
+        """
+        out = matmul_out(a, b, out)
+        tensor_matrix_multiply(*out.tuple(), *a.tuple(), *b.tuple())
+        return out
+
+    @staticmethod
+    def sum_to_shape(
+        a: Tensor, shape: UserShape, out: Optional[Tensor] = None
+    ) -> Tensor:
+        """See `tensor_ops.py`"""
+        out, out_shape, out_strides = sum_to_shape_out(a, shape, out)
+        tensor_sum_to_shape(out._tensor._storage, out_shape, out_strides, *a.tuple())
+        return out
+
+    @staticmethod
+    def fused_map(program: Program) -> Callable[..., Tensor]:
+        """See `tensor_ops.py`"""
+
+        def ret(*inputs: Tensor, out: Optional[Tensor] = None) -> Tensor:
+            out = fused_out(inputs, out)
+            tensor_fused_map(
+                *out.tuple(), *fused_args(inputs), program.code, program.n_inputs
+            )
+            return out
+
+        return ret
+
+    @staticmethod
+    def fused_multi_map(program: Program) -> Callable[..., Tuple[Tensor, ...]]:
+        """See `tensor_ops.py`"""
+
+        def ret(
+            *inputs: Tensor, out: Optional[Tuple[Tensor, ...]] = None
+        ) -> Tuple[Tensor, ...]:
+            outs = fused_multi_out(inputs, len(program.outputs), out)
+            tensor_fused_multi_map(
+                *fused_args(outs),
+                *fused_args(inputs),
+                program.code,
+                program.n_inputs,
+                program.outputs,
+            )
+            return outs
+
+        return ret
+
+    @staticmethod
+    def fused_back(program: Program) -> Callable[..., Tuple[Tensor, ...]]:
+        """See `tensor_ops.py`"""
+
+        def ret(
+            grad_out: Tensor, *inputs: Tensor, out: Optional[Tuple[Tensor, ...]] = None
+        ) -> Tuple[Tensor, ...]:
+            grads = fused_back_out(grad_out, inputs[: program.n_grads], out)
+            tensor_fused_back(
+                tuple(g._tensor._storage for g in grads),
+                *grad_out.tuple(),
+                *fused_args(inputs),
+                program.code,
+                program.n_inputs,
+                program.n_grads,
+            )
+            return grads
+
+        return ret
+
+    is_cuda = False
+
+
+# Implementations
+
+
+def tensor_map(
+    fn: Callable[[float], float],
+) -> Callable[[Storage, Shape, Strides, Storage, Shape, Strides], None]:
+    """NUMBA low_level tensor_map function. See `tensor_ops.py` for description.
+
+    When `out` and `in` are stride-aligned the kernel is a flat loop over
+    storage. Otherwise the rows of `out` are split into chunks that run in
+    parallel with `prange`; each chunk computes its first index once and
+    then advances with the odometer engine, so no state is shared between
+    threads.
+
+    Args:
+    ----
+        fn: function mappings floats-to-floats to apply.
+
+    Returns:
+    -------
+        Tensor map function.
+
+    """
+
+    def _map(
+        out: Storage,
+        out_shape: Shape,
+        out_strides: Strides,
+        in_storage: Storage,
+        in_shape: Shape,
+        in_strides: Strides,
+    ) -> None:
+        if is_dense(out_shape, out_strides, len(out)) and strides_aligned(
+            out_shape, out_strides, in_shape, in_strides
+        ):
+            for i in prange(len(out)):
+                out[i] = fn(in_storage[i])
+            return
+
+        dims = len(out_shape)
+        strides = np.zeros((2, dims), np.int64)
+        strides[0, :] = out_strides
+        strides[1, :] = broadcast_strides(out_shape, in_shape, in_strides)
+        outer_shape = out_shape[: dims - 1]
+        inner = out_shape[dims - 1]
+        o_step = strides[0, dims - 1]
+        in_step = strides[1, dims - 1]
+        n_rows = _size(outer_shape)
+        n_chunks = _num_chunks(n_rows)
+
+        for c in prange(n_chunks):
+            r0 = c * n_rows // n_chunks
+            r1 = (c + 1) * n_rows // n_chunks
+            index = np.zeros(MAX_DIMS, np.int32)
+            positions = np.zeros(2, np.int64)
+            _chunk_start(r0, outer_shape, strides, index, positions)
+            for _ in range(r0, r1):
+                o = positions[0]
+                j = positions[1]
+                for _ in range(inner):
+                    out[o] = fn(in_storage[j])
+                    o += o_step
+                    j += in_step
+                advance_index(index, outer_shape, strides, positions)
+
+    return _njit(parallel=True)(_map)  # type: ignore
+
+
+def tensor_zip(
+    fn: Callable[[float, float], float],
+) -> Callable[
+    [Storage, Shape, Strides, Storage, Shape, Strides, Storage, Shape, Strides], None
+]:
+    """NUMBA low_level tensor_zip function. See `tensor_ops.py` for description.
+
+    When `out`, `a` and `b` are stride-aligned the kernel is a flat loop over
+    storage. Otherwise chunks of rows run in parallel over the odometer
+    engine, as in `tensor_map`.
+
+    Args:
+    ----
+        fn: function maps two floats to float to apply.
+
+    Returns:
+    -------
+        Tensor zip function.
+
+    """
+
+    def _zip(
+        out: Storage,
+        out_shape: Shape,
+        out_strides: Strides,
+        a_storage: Storage,
+        a_shape: Shape,
+        a_strides: Strides,
+        b_storage: Storage,
+        b_shape: Shape,
+        b_strides: Strides,
+    ) -> None:
+        if (
+            is_dense(out_shape, out_strides, len(out))
+            and strides_aligned(out_shape, out_strides, a_shape, a_strides)
+            and strides_aligned(out_shape, out_strides, b_shape, b_strides)
+        ):
+            for i in prange(len(out)):
+                out[i] = fn(a_storage[i], b_storage[i])
+            return
+
+        dims = len(out_shape)
+        strides = np.zeros((3, dims), np.int64)
+        strides[0, :] = out_strides
+        strides[1, :] = broadcast_strides(out_shape, a_shape, a_strides)
+        strides[2, :] = broadcast_strides(out_shape, b_shape, b_strides)
+        outer_shape = out_shape[: dims - 1]
+        inner = out_shape[dims - 1]
+        o_step = strides[0, dims - 1]
+        a_step = strides[1, dims - 1]
+        b_step = strides[2, dims - 1]
+        n_rows = _size(outer_shape)
+        n_chunks = _num_chunks(n_rows)
+
+        for c in prange(n_chunks):
+            r0 = c * n_rows // n_chunks
+            r1 = (c + 1) * n_rows // n_chunks
+            index = np.zeros(MAX_DIMS, np.int32)
+            positions = np.zeros(3, np.int64)
+            _chunk_start(r0, outer_shape, strides, index, positions)
+            for _ in range(r0, r1):
+                o = positions[0]
+                j = positions[1]
+                k = positions[2]
+                for _ in range(inner):
+                    out[o] = fn(a_storage[j], b_storage[k])
+                    o += o_step
+                    j += a_step
+                    k += b_step
+                advance_index(index, outer_shape, strides, positions)
+
+    return _njit(parallel=True)(_zip)  # type: ignore
+
+
+def tensor_reduce(
+    fn: Callable[[float, float], float],
+) -> Callable[[Storage, Shape, Strides, Storage, Shape, Strides, int], None]:
+    """NUMBA low_level tensor_reduce function. See `tensor_ops.py` for description.
+
+    The inner reduction accumulates into a local variable and only writes
+    to `out` once per output position. Packed row-major inputs compute the
+    start of each reduction directly from the output ordinal; other layouts
+    walk `out` in parallel chunks over the odometer engine.
+
+    Args:
+    ----
+        fn: reduction function mapping two floats to float.
+
+    Returns:
+    -------
+        Tensor reduce function
+
+    """
+
+    def _reduce(
+        out: Storage,
+        out_shape: Shape,
+        out_strides: Strides,
+        a_storage: Storage,
+        a_shape: Shape,
+        a_strides: Strides,
+        reduce_dim: int,
+    ) -> None:
+        if reduce_dim < 0:
+            acc = out[0]
+            if is_dense(a_shape, a_strides, len(a_storage)):
+                for j in range(len(a_storage)):
+                    acc = fn(acc, a_storage[j])
+            else:
+                a_index = np.zeros(MAX_DIMS, np.int32)
+                a_positions = np.zeros(1, np.int64)
+                a_walk = np.zeros((1, len(a_shape)), np.int64)
+                a_walk[0, :] = a_strides
+                for _ in range(_size(a_shape)):
+                    acc = fn(acc, a_storage[a_positions[0]])
+                    advance_index(a_index, a_shape, a_walk, a_positions)
+            out[0] = acc
+            return
+
+        out_size = _size(out_shape)
+        reduce_size = a_shape[reduce_dim]
+        if is_row_major(out_shape, out_strides) and is_row_major(a_shape, a_strides):
+            inner = 1
+            for d in range(reduce_dim + 1, len(a_shape)):
+                inner *= a_shape[d]
+            for i in prange(out_size):
+                j = (i // inner) * inner * reduce_size + i % inner
+                acc = out[i]
+                for _ in range(reduce_size):
+                    acc = fn(acc, a_storage[j])
+                    j += inner
+                out[i] = acc
+            return
+
+        dims = len(out_shape)
+        strides = np.zeros((2, dims), np.int64)
+        strides[0, :] = out_strides
+        strides[1, :] = a_strides
+        reduce_stride = a_strides[reduce_dim]
+        n_chunks = _num_chunks(out_size)
+
+        for c in prange(n_chunks):
+            i0 = c * out_size // n_chunks
+            i1 = (c + 1) * out_size // n_chunks
+            index = np.zeros(MAX_DIMS, np.int32)
+            positions = np.zeros(2, np.int64)
+            _chunk_start(i0, out_shape, strides, index, positions)
+            for _ in range(i0, i1):
+                o = positions[0]
+                j = positions[1]
+                acc = out[o]
+                for _ in range(reduce_size):
+                    acc = fn(acc, a_storage[j])
+                    j += reduce_stride
+                out[o] = acc
+                advance_index(index, out_shape, strides, positions)
+
+    return _njit(parallel=True)(_reduce)  # type: ignore
+
+
+def _tensor_sum_to_shape(
+    out: Storage,
+    out_shape: Shape,
+    out_strides: Strides,
+    a_storage: Storage,
+    a_shape: Shape,
+    a_strides: Strides,
+) -> None:
+    """NUMBA sum to shape. See `tensor_ops.py` for description.
+
+    The rows of `a` (all but its last dimension) are split into parallel
+    chunks, each summing into its own row of partial sums, which are then
+    added up into `out`. Only the row starts go through the odometer
+    engine; each row is a tight strided loop.
+    """
+    dims = len(a_shape)
+    out_size = _size(out_shape)
+    strides = np.zeros((2, dims), np.int64)
+    step = 1
+    for d in range(dims - 1, -1, -1):
+        if out_shape[d] != 1:
+            strides[0, d] = step
+        step *= out_shape[d]
+    strides[1, :] = a_strides
+    inner = a_shape[dims - 1]
+    rows = _size(a_shape) // inner
+    acc_step = strides[0, dims - 1]
+    a_step = strides[1, dims - 1]
+    n_chunks = _num_chunks(min(rows, rows * inner // out_size))
+    partial = np.zeros((n_chunks, out_size))
+
+    for c in prange(n_chunks):
+        r0 = c * rows // n_chunks
+        r1 = (c + 1) * rows // n_chunks
+        index = np.zeros(MAX_DIMS, np.int32)
+        positions = np.zeros(2, np.int64)
+        _chunk_start(r0 * inner, a_shape, strides, index, positions)
+        for _ in range(r0, r1):
+            p = positions[0]
+            j = positions[1]
+            if acc_step == 0:
+                # The last dimension is reduced: sum the row locally.
+                acc = 0.0
+                for _ in range(inner):
+                    acc += a_storage[j]
+                    j += a_step
+                partial[c, p] += acc
+            else:
+                for _ in range(inner):
+                    partial[c, p] += a_storage[j]
+                    p += acc_step
+                    j += a_step
+            advance_index(index, a_shape[: dims - 1], strides[:, : dims - 1], positions)
+
+    out_walk = np.zeros((1, dims), np.int64)
+    out_walk[0, :] = out_strides
+    n_out_chunks = _num_chunks(out_size)
+    for c in prange(n_out_chunks):
+        i0 = c * out_size // n_out_chunks
+        i1 = (c + 1) * out_size // n_out_chunks
+        index = np.zeros(MAX_DIMS, np.int32)
+        positions = np.zeros(1, np.int64)
+        _chunk_start(i0, out_shape, out_walk, index, positions)
+        for i in range(i0, i1):
+            acc = 0.0
+            for k in range(n_chunks):
+                acc += partial[k, i]
+            out[positions[0]] = acc
+            advance_index(index, out_shape, out_walk, positions)
+
+
+def _tensor_matrix_multiply(
+    out: Storage,
+    out_shape: Shape,
+    out_strides: Strides,
+    a_storage: Storage,
+    a_shape: Shape,
+    a_strides: Strides,
+    b_storage: Storage,
+    b_shape: Shape,
+    b_strides: Strides,
+) -> None:
+    """NUMBA blocked, batched tensor matrix multiply.
+    See `tensor_ops.tensor_matrix_multiply` for description.
+
+    Work is split into (batch, row-tile) pairs that run in parallel. Each
+    pair owns a disjoint block of `out`, so no two threads write the same
+    position, and each row tile is accumulated in a local buffer before it
+    is stored.
+
+    Args:
+    ----
+        out (Storage): storage for `out` tensor
+        out_shape (Shape): shape for `out` tensor
+        out_strides (Strides): strides for `out` tensor
+        a_storage (Storage): storage for `a` tensor
+        a_shape (Shape): shape for `a` tensor
+        a_strides (Strides): strides for `a` tensor
+        b_storage (Storage): storage for `b` tensor
+        b_shape (Shape): shape for `b` tensor
+        b_strides (Strides): strides for `b` tensor
+
+    Returns:
+    -------
+        None : Fills in `out`
+
+    """
+    batch_dims = len(out_shape) - 2
+    batch_shape = out_shape[:batch_dims]
+    batch_strides = np.zeros((3, batch_dims), np.int64)
+    batch_strides[0, :] = out_strides[:batch_dims]
+    batch_strides[1, :] = broadcast_strides(
+        batch_shape, a_shape[: len(a_shape) - 2], a_strides[: len(a_shape) - 2]
+    )
+    batch_strides[2, :] = broadcast_strides(
+        batch_shape, b_shape[: len(b_shape) - 2], b_strides[: len(b_shape) - 2]
+    )
+
+    M = out_shape[batch_dims]
+    N = out_shape[batch_dims + 1]
+    K = a_shape[len(a_shape) - 1]
+    a_si = a_strides[len(a_shape) - 2]
+    a_sk = a_strides[len(a_shape) - 1]
+    b_sk = b_strides[len(b_shape) - 2]
+    b_sj = b_strides[len(b_shape) - 1]
+    o_si = out_strides[batch_dims]
+    o_sj = out_strides[batch_dims + 1]
+
+    n_batch = 1
+    for d in range(batch_dims):
+        n_batch *= out_shape[d]
+    i_tiles = (M + MATMUL_BLOCK - 1) // MATMUL_BLOCK
+
+    for tile in prange(n_batch * i_tiles):
+        n = tile // i_tiles
+        i0 = (tile % i_tiles) * MATMUL_BLOCK
+        i1 = min(i0 + MATMUL_BLOCK, M)
+
+        batch_index = np.zeros(MAX_DIMS, np.int32)
+        bases = np.zeros(3, np.int64)
+        _chunk_start(n, batch_shape, batch_strides, batch_index, bases)
+        o_base = bases[0]
+        a_base = bases[1]
+        b_base = bases[2]
+
+        acc = np.zeros((MATMUL_BLOCK, MATMUL_BLOCK), np.float64)
+        for j0 in range(0, N, MATMUL_BLOCK):
+            j1 = min(j0 + MATMUL_BLOCK, N)
+            acc[:, :] = 0.0
+            for k0 in range(0, K, MATMUL_BLOCK):
+                k1 = min(k0 + MATMUL_BLOCK, K)
+                for i in range(i0, i1):
+                    for k in range(k0, k1):
+                        aik = a_storage[a_base + i * a_si + k * a_sk]
+                        b_pos = b_base + k * b_sk + j0 * b_sj
+                        for j in range(j1 - j0):
+                            acc[i - i0, j] += aik * b_storage[b_pos]
+                            b_pos += b_sj
+            for i in range(i0, i1):
+                o_pos = o_base + i * o_si + j0 * o_sj
+                for j in range(j1 - j0):
+                    out[o_pos] = acc[i - i0, j]
+                    o_pos += o_sj
+
+
+tensor_sum_to_shape = _njit(parallel=True)(_tensor_sum_to_shape)
+tensor_matrix_multiply = _njit(parallel=True)(_tensor_matrix_multiply)
+
+
+def _tensor_fused_map(
+    out: Storage,
+    out_shape: Shape,
+    out_strides: Strides,
+    in_storages: Tuple[Storage, ...],
+    in_shapes: Tuple[Shape, ...],
+    in_strides: Tuple[Strides, ...],
+    code: Index,
+    n_inputs: int,
+) -> None:
+    """NUMBA fused elementwise kernel. See `tensor_ops.tensor_fused_map`.
+
+    The program is an argument rather than a closure, so one compiled
+    kernel serves every fused function with the same number of inputs.
+    """
+    dims = len(out_shape)
+    strides = np.zeros((n_inputs + 1, dims), np.int64)
+    strides[0, :] = out_strides
+    for k in range(n_inputs):
+        strides[k + 1, :] = broadcast_strides(out_shape, in_shapes[k], in_strides[k])
+    n_regs = n_inputs + len(code)
+    size = _size(out_shape)
+    n_chunks = _num_chunks(size)
+
+    for c in prange(n_chunks):
+        i0 = c * size // n_chunks
+        i1 = (c + 1) * size // n_chunks
+        index = np.zeros(MAX_DIMS, np.int32)
+        positions = np.zeros(n_inputs + 1, np.int64)
+        regs = np.zeros(n_regs, np.float64)
+        _chunk_start(i0, out_shape, strides, index, positions)
+        for _ in range(i0, i1):
+            for k in range(n_inputs):
+                regs[k] = in_storages[k][positions[k + 1]]
+            run_program(code, regs, n_inputs)
+            out[positions[0]] = regs[n_regs - 1]
+            advance_index(index, out_shape, strides, positions)
+
+
+def _tensor_fused_multi_map(
+    out_storages: Tuple[Storage, ...],
+    out_shapes: Tuple[Shape, ...],
+    out_strides: Tuple[Strides, ...],
+    in_storages: Tuple[Storage, ...],
+    in_shapes: Tuple[Shape, ...],
+    in_strides: Tuple[Strides, ...],
+    code: Index,
+    n_inputs: int,
+    outputs: Index,
+) -> None:
+    """NUMBA fused kernel with several outputs. See
+    `tensor_ops.tensor_fused_multi_map`.
+    """
+    out_shape = out_shapes[0]
+    dims = len(out_shape)
+    n_outputs = len(outputs)
+    strides = np.zeros((n_outputs + n_inputs, dims), np.int64)
+    for k in range(n_outputs):
+        strides[k, :] = out_strides[k]
+    for k in range(n_inputs):
+        strides[n_outputs + k, :] = broadcast_strides(
+            out_shape, in_shapes[k], in_strides[k]
+        )
+    n_regs = n_inputs + len(code)
+    size = _size(out_shape)
+    n_chunks = _num_chunks(size)
+
+    for c in prange(n_chunks):
+        i0 = c * size // n_chunks
+        i1 = (c + 1) * size // n_chunks
+        index = np.zeros(MAX_DIMS, np.int32)
+        positions = np.zeros(n_outputs + n_inputs, np.int64)
+        regs = np.zeros(n_regs, np.float64)
+        _chunk_start(i0, out_shape, strides, index, positions)
+        for _ in range(i0, i1):
+            for k in range(n_inputs):
+                regs[k] = in_storages[k][positions[n_outputs + k]]
+            run_program(code, regs, n_inputs)
+            for k in range(n_outputs):
+                out_storages[k][positions[k]] = regs[outputs[k]]
+            advance_index(index, out_shape, strides, positions)
+
+
+def _tensor_fused_back(
+    grads: Tuple[Storage, ...],
+    g_storage: Storage,
+    g_shape: Shape,
+    g_strides: Strides,
+    in_storages: Tuple[Storage, ...],
+    in_shapes: Tuple[Shape, ...],
+    in_strides: Tuple[Strides, ...],
+    code: Index,
+    n_inputs: int,
+    n_grads: int,
+) -> None:
+    """NUMBA backward of a fused program. See `tensor_ops.tensor_fused_back`."""
+    dims = len(g_shape)
+    strides = np.zeros((n_inputs + 1, dims), np.int64)
+    strides[0, :] = g_strides
+    for k in range(n_inputs):
+        strides[k + 1, :] = broadcast_strides(g_shape, in_shapes[k], in_strides[k])
+    n_regs = n_inputs + len(code)
+    size = len(grads[0])
+    n_chunks = _num_chunks(size)
+
+    for c in prange(n_chunks):
+        i0 = c * size // n_chunks
+        i1 = (c + 1) * size // n_chunks
+        index = np.zeros(MAX_DIMS, np.int32)
+        positions = np.zeros(n_inputs + 1, np.int64)
+        regs = np.zeros(n_regs, np.float64)
+        d_regs = np.zeros(n_regs, np.float64)
+        _chunk_start(i0, g_shape, strides, index, positions)
+        for i in range(i0, i1):
+            for k in range(n_inputs):
+                regs[k] = in_storages[k][positions[k + 1]]
+            run_program(code, regs, n_inputs)
+            run_program_back(
+                code, regs, d_regs, n_inputs, n_grads, g_storage[positions[0]]
+            )
+            for k in range(n_grads):
+                grads[k][i] = d_regs[k]
+            advance_index(index, g_shape, strides, positions)
+
+
+tensor_fused_map = _njit(parallel=True)(_tensor_fused_map)
+tensor_fused_back = _njit(parallel=True)(_tensor_fused_back)
+tensor_fused_multi_map = _njit(parallel=True)(_tensor_fused_multi_map)
+
+
+FastBackend = TensorBackend(FastOps)
@@ -0,0 +1,350 @@
+"""Fusion of chains of elementwise tensor functions into a single kernel.
+
+`fuse` traces a function built from `Add`, `Mul`, `Neg`, `Sigmoid`,
+`ReLU`, `Exp`, `Log` and `Inv` into a small register program. The
+backends run the whole program per element in one pass (`fused_map`) and
+run its reverse sweep for the backward (`fused_back`), so the chain
+allocates one output instead of one per step.
+
+A traced function may also return a tuple. Its program has one output
+register per entry, and `fused_multi_map` writes them all in one pass;
+the fused optimizers in `optim.py` update a parameter and its state
+buffers this way.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+import minitorch
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, List, Tuple, Type, Union
+
+    import numpy.typing as npt
+
+    from .tensor import Tensor
+    from .tensor_functions import Fused
+
+    TraceLike = Union[float, int, "Trace"]
+    Ref = Tuple[str, int]
+
+# Opcodes. Each instruction is a row `(opcode, arg0, arg1)` whose arguments
+# are register numbers; unary opcodes ignore `arg1`.
+ADD = 0
+MUL = 1
+NEG = 2
+SIGMOID = 3
+RELU = 4
+EXP = 5
+LOG = 6
+INV = 7
+SQRT = 8
+
+
+@dataclass(frozen=True)
+class Program:
+    """A traced elementwise program.
+
+    Registers `0 .. n_inputs - 1` hold the inputs and instruction `i`
+    writes register `n_inputs + i`. The last register is the output,
+    unless the traced function returned a tuple.
+
+    Attributes
+    ----------
+        code : int64 array of shape `(instructions, 3)`
+        n_inputs : number of input tensors, constants included
+        consts : values of the trailing constant inputs
+        outputs : int64 array of output registers, one per tuple entry
+
+    """
+
+    code: npt.NDArray[np.int64]
+    n_inputs: int
+    consts: Tuple[float, ...] = ()
+    outputs: npt.NDArray[np.int64] = field(
+        default_factory=lambda: np.zeros(0, dtype=np.int64)
+    )
+
+    @property
+    def n_grads(self) -> int:
+        """Number of inputs before the constants, which get derivatives"""
+        return self.n_inputs - len(self.consts)
+
+
+def run_program(code: npt.NDArray[np.int64], regs: Any, n_inputs: int) -> None:
+    """Evaluate `code` on one element, filling `regs` past the inputs.
+
+    Written against `math` only so that numba can compile it unchanged.
+    `code` may also be the nested list from `Program.code.tolist()`.
+
+    Args:
+    ----
+        code : program instructions
+        regs : register file, inputs already loaded
+        n_inputs : number of input registers
+
+    """
+    for i in range(len(code)):
+        op = code[i][0]
+        x = regs[code[i][1]]
+        y = regs[code[i][2]]
+        if op == ADD:
+            r = x + y
+        elif op == MUL:
+            r = x * y
+        elif op == NEG:
+            r = -x
+        elif op == SIGMOID:
+            if x >= 0:
+                r = 1.0 / (1.0 + math.exp(-x))
+            else:
+                e = math.exp(x)
+                r = e / (1.0 + e)
+        elif op == RELU:
+            r = x if x > 0 else 0.0
+        elif op == EXP:
+            r = math.exp(x)
+        elif op == LOG:
+            r = math.log(x)
+        elif op == SQRT:
+            r = math.sqrt(x)
+        else:
+            r = 1.0 / x
+        regs[n_inputs + i] = r
+
+
+def run_program_back(
+    code: npt.NDArray[np.int64],
+    regs: Any,
+    grads: Any,
+    n_inputs: int,
+    n_grads: int,
+    d_out: float,
+) -> None:
+    """Reverse sweep of `code` on one element.
+
+    `regs` must hold the values from `run_program`. On return the first
+    `n_grads` entries of `grads` are the derivatives of the output with
+    respect to each input, scaled by `d_out`. Input registers from
+    `n_grads` on hold the program's constants; nothing is accumulated
+    into them.
+
+    Args:
+    ----
+        code : program instructions
+        regs : register file after the forward sweep
+        grads : derivative of each register, overwritten
+        n_inputs : number of input registers
+        n_grads : number of leading inputs that need a derivative
+        d_out : derivative flowing into the output
+
+    """
+    for r in range(len(grads)):
+        grads[r] = 0.0
+    grads[len(grads) - 1] = d_out
+    for i in range(len(code) - 1, -1, -1):
+        op = code[i][0]
+        a = code[i][1]
+        b = code[i][2]
+        g = grads[n_inputs + i]
+        x = regs[a]
+        da = 0.0
+        db = 0.0
+        if op == ADD:
+            da = g
+            db = g
+        elif op == MUL:
+            da = g * regs[b]
+            db = g * x
+        elif op == NEG:
+            da = -g
+        elif op == SIGMOID:
+            s = regs[n_inputs + i]
+            da = g * s * (1.0 - s)
+        elif op == RELU:
+            if x >= 0:
+                da = g
+        elif op == EXP:
+            da = g * regs[n_inputs + i]
+        elif op == LOG:
+            da = g / x
+        elif op == SQRT:
+            da = 0.5 * g / regs[n_inputs + i]
+        else:
+            da = -g / (x * x)
+        if a < n_grads or a >= n_inputs:
+            grads[a] += da
+        if b < n_grads or b >= n_inputs:
+            grads[b] += db
+
+
+class Trace:
+    """Placeholder value recorded while tracing a fused function.
+
+    `ref` is `(kind, i)` where kind is `"input"`, `"const"` or `"op"`.
+    """
+
+    def __init__(self, builder: _Builder, ref: Ref):
+        self.builder = builder
+        self.ref = ref
+
+    def _unary(self, op: int) -> Trace:
+        return self.builder.emit(op, self.ref, self.ref)
+
+    def _binary(self, op: int, b: TraceLike) -> Trace:
+        return self.builder.emit(op, self.ref, self.builder.ref(b))
+
+    def __add__(self, b: TraceLike) -> Trace:
+        return self._binary(ADD, b)
+
+    def __radd__(self, b: TraceLike) -> Trace:
+        return self._binary(ADD, b)
+
+    def __sub__(self, b: TraceLike) -> Trace:
+        return self + (-b)
+
+    def __rsub__(self, b: TraceLike) -> Trace:
+        return (-self) + b
+
+    def __neg__(self) -> Trace:
+        return self._unary(NEG)
+
+    def __mul__(self, b: TraceLike) -> Trace:
+        return self._binary(MUL, b)
+
+    def __rmul__(self, b: TraceLike) -> Trace:
+        return self._binary(MUL, b)
+
+    def __truediv__(self, b: TraceLike) -> Trace:
+        if isinstance(b, Trace):
+            return self * b._unary(INV)
+        return self * (1.0 / b)
+
+    def __rtruediv__(self, b: TraceLike) -> Trace:
+        return self._unary(INV) * b
+
+    def sigmoid(self) -> Trace:
+        """Record a sigmoid"""
+        return self._unary(SIGMOID)
+
+    def relu(self) -> Trace:
+        """Record a ReLU"""
+        return self._unary(RELU)
+
+    def exp(self) -> Trace:
+        """Record an exponential"""
+        return self._unary(EXP)
+
+    def log(self) -> Trace:
+        """Record a log"""
+        return self._unary(LOG)
+
+    def sqrt(self) -> Trace:
+        """Record a square root"""
+        return self._unary(SQRT)
+
+
+class _Builder:
+    def __init__(self, n_inputs: int):
+        self.n_inputs = n_inputs
+        self.code: List[Tuple[int, Ref, Ref]] = []
+        self.consts: List[float] = []
+
+    def ref(self, value: TraceLike) -> Ref:
+        if isinstance(value, Trace):
+            return value.ref
+        self.consts.append(float(value))
+        return ("const", len(self.consts) - 1)
+
+    def emit(self, op: int, a: Ref, b: Ref) -> Trace:
+        self.code.append((op, a, b))
+        return Trace(self, ("op", len(self.code) - 1))
+
+    def program(self, out: Any) -> Program:
+        # Constants become extra inputs appended after the user's inputs.
+        n_inputs = self.n_inputs + len(self.consts)
+        base = {"input": 0, "const": self.n_inputs, "op": n_inputs}
+
+        def reg(ref: Ref) -> int:
+            return base[ref[0]] + ref[1]
+
+        code = np.array(
+            [(op, reg(a), reg(b)) for op, a, b in self.code], dtype=np.int64
+        )
+        if isinstance(out, tuple):
+            if not all(isinstance(o, Trace) and o.ref[0] == "op" for o in out):
+                raise TypeError("Every output of a fused function must be an op.")
+            outputs = np.array([reg(o.ref) for o in out], dtype=np.int64)
+            return Program(code, n_inputs, tuple(self.consts), outputs)
+        if not isinstance(out, Trace) or out.ref != ("op", len(self.code) - 1):
+            raise TypeError("A fused function must end with an elementwise op.")
+        return Program(code, n_inputs, tuple(self.consts))
+
+
+def trace(fn: Callable[..., Any], n_inputs: int) -> Program:
+    """Trace `fn` on `n_inputs` placeholder inputs.
+
+    Args:
+    ----
+        fn : function of tensors built from elementwise operations,
+            returning one value or a tuple of values
+        n_inputs : number of tensor arguments
+
+    Returns:
+    -------
+        The recorded `Program`
+
+    """
+    builder = _Builder(n_inputs)
+    out = fn(*[Trace(builder, ("input", i)) for i in range(n_inputs)])
+    return builder.program(out)
+
+
+def fuse(fn: Callable[..., Any]) -> Callable[..., Tensor]:
+    """Fuse an elementwise tensor function into a single kernel.
+
+    `fn` is traced once per number of arguments; later calls reuse the
+    program. The result is a single `Function` whose forward and backward
+    each make one pass over memory. Inputs broadcast as they would for
+    the unfused expression. ::
+
+        @minitorch.fuse
+        def dense(x, w, b):
+            return (x * w + b).sigmoid()
+
+    Args:
+    ----
+        fn : function of tensors using `+`, `-`, `*`, `/`, unary `-`,
+            `sigmoid`, `relu`, `exp` and `log`
+
+    Returns:
+    -------
+        Function with the same signature as `fn`; the original is kept
+        as `__wrapped__`
+
+    """
+    fused_fns: Dict[int, Type[Fused]] = {}
+
+    @functools.wraps(fn)
+    def fused(*inputs: Tensor) -> Tensor:
+        n = len(inputs)
+        if n not in fused_fns:
+            program = trace(fn, n)
+            if len(program.outputs):
+                raise TypeError("fuse needs a function with a single output.")
+            fused_fns[n] = type(
+                f"Fused_{fn.__name__}", (minitorch.Fused,), {"program": program}
+            )
+        fused_fn = fused_fns[n]
+        # Constants record no history, so the backward computes no
+        # gradient for them.
+        consts = [inputs[0]._ensure_tensor(c) for c in fused_fn.program.consts]
+        return fused_fn.apply(*inputs, *consts)
+
+    return fused
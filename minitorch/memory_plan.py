@@ -0,0 +1,205 @@
+"""Liveness-based memory planning for captured steps.
+
+A `Tape` from `minitorch.capture` keeps every tensor the step wrote
+alive, so a replay holds all of the step's activations and gradients at
+once. Most of them are only live between the kernel that writes them and
+the last kernel that reads them. `plan_memory` computes that interval for
+every buffer and packs the intermediate buffers into a few arenas, so
+that buffers whose lifetimes do not overlap share memory. `MemoryPlan.apply`
+then points the captured tensors at their arenas.
+
+A buffer is intermediate when the tape writes all of it before anything
+reads it, and it does not live across replays: it is not a step input or
+output, a leaf (a parameter) or its gradient, or a tensor marked with
+`Tape.keep`, such as optimizer state. Everything else is left where it is.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+import minitorch
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+    from .capture import Tape
+    from .tensor import Tensor
+    from .tensor_data import Storage, TensorData
+
+
+def _root(storage: Storage) -> Storage:
+    """Array that owns the memory of `storage`"""
+    return storage if storage.base is None else storage.base
+
+
+def _tensors(value: Any) -> Iterator[Tensor]:
+    if isinstance(value, minitorch.Tensor):
+        yield value
+    elif isinstance(value, (tuple, list)):
+        for v in value:
+            yield from _tensors(v)
+
+
+@dataclass(eq=False)
+class Buffer:
+    """Lifetime of one storage buffer on a tape.
+
+    Attributes
+    ----------
+        root : array that owns the memory
+        first : index of the first call that touches it
+        last : index of the last call that touches it
+        intermediate : True if the tape fully writes it before reading it
+        views : tensor data on the tape that views it
+        arena : index of the assigned arena, if planned
+
+    """
+
+    root: Storage
+    first: int
+    last: int
+    intermediate: bool
+    views: List[TensorData] = field(default_factory=list)
+    arena: Optional[int] = None
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the buffer in bytes"""
+        return int(self.root.nbytes)
+
+
+@dataclass
+class MemoryPlan:
+    """Assignment of the intermediate buffers of a tape to shared arenas.
+
+    Attributes
+    ----------
+        buffers : every buffer touched by the tape, keyed by address
+        arenas : number of elements of each arena
+        naive_bytes : bytes of intermediate buffers when each has its own memory
+        planned_bytes : bytes of the arenas
+        peak_bytes : most intermediate bytes live after any one call, a
+            lower bound for `planned_bytes`
+
+    """
+
+    buffers: Dict[int, Buffer]
+    arenas: List[int]
+    naive_bytes: int
+    planned_bytes: int
+    peak_bytes: int
+
+    def apply(self) -> None:
+        """Move every planned buffer into its arena.
+
+        Each tensor on the tape that views a planned buffer gets a view of
+        its arena at the same offset. Replays of the tape then share the
+        arena memory, and the original buffers are released.
+        """
+        arenas = [np.zeros(size, np.float64) for size in self.arenas]
+        for buffer in self.buffers.values():
+            if buffer.arena is None:
+                continue
+            arena = arenas[buffer.arena]
+            base = buffer.root.ctypes.data
+            for view in buffer.views:
+                storage = view._storage
+                offset = (storage.ctypes.data - base) // storage.itemsize
+                view._storage = arena[offset : offset + storage.size]
+            buffer.root = arena[: buffer.root.size]
+
+
+def _covers(t: Tensor, root: Storage) -> bool:
+    """True if `t` is a dense view of the whole of `root`"""
+    data = t._tensor
+    return (
+        data._storage.ctypes.data == root.ctypes.data
+        and data.size == root.size
+        and data.is_contiguous()
+    )
+
+
+def plan_memory(tape: Tape, keep: Sequence[Any] = ()) -> MemoryPlan:
+    """Plan shared memory for the intermediate buffers of `tape`.
+
+    Buffers are taken in order of their first write and each goes to the
+    free arena closest in size, growing it if none is large enough. An
+    arena is free for a buffer once every earlier buffer in it was last
+    read by a previous call.
+
+    Args:
+    ----
+        tape : recorded step, see `minitorch.capture`
+        keep : tensors, or tuples of tensors, whose memory must stay their
+            own, such as the step's inputs and outputs
+
+    Returns:
+    -------
+        The `MemoryPlan`; call `apply` to use it
+
+    """
+    kept = {id(_root(t._tensor._storage)) for t in _tensors([keep, tape.kept])}
+    buffers: Dict[int, Buffer] = {}
+    for i, (fn, args, kwargs) in enumerate(tape.calls):
+        if fn is setattr:
+            # A gradient left on a leaf is read after the step.
+            kept.update(id(_root(t._tensor._storage)) for t in _tensors(args))
+            continue
+        # Reads come first, so that a buffer updated in place is not
+        # mistaken for one that the call creates.
+        reads = [(t, False) for t in _tensors(args)]
+        writes = [(t, True) for t in _tensors(kwargs.get("out"))]
+        for t, written in reads + writes:
+            root = _root(t._tensor._storage)
+            if t.is_leaf():
+                # Parameters and their gradients outlive the step, even
+                # when it starts by zeroing the gradient.
+                kept.add(id(root))
+                if t.grad is not None:
+                    kept.add(id(_root(t.grad._tensor._storage)))
+            buffer = buffers.get(id(root))
+            if buffer is None:
+                buffer = Buffer(root, i, i, written and _covers(t, root))
+                buffers[id(root)] = buffer
+            buffer.last = i
+            if not any(t._tensor is v for v in buffer.views):
+                buffer.views.append(t._tensor)
+
+    for key, b in buffers.items():
+        b.intermediate = b.intermediate and key not in kept
+    planned = [b for b in buffers.values() if b.intermediate]
+
+    arenas: List[int] = []
+    free_after: List[int] = []
+    for buffer in sorted(planned, key=lambda b: b.first):
+        size = buffer.root.size
+        free = [a for a in range(len(arenas)) if free_after[a] < buffer.first]
+        fits = [a for a in free if arenas[a] >= size]
+        if fits:
+            a = min(fits, key=lambda a: arenas[a])
+        elif free:
+            a = max(free, key=lambda a: arenas[a])
+            arenas[a] = size
+        else:
+            a = len(arenas)
+            arenas.append(size)
+            free_after.append(-1)
+        buffer.arena = a
+        free_after[a] = buffer.last
+
+    itemsize = np.dtype(np.float64).itemsize
+    live = [0] * (len(tape.calls) + 1)
+    for b in planned:
+        for i in range(b.first, b.last + 1):
+            live[i] += b.nbytes
+    return MemoryPlan(
+        buffers=buffers,
+        arenas=arenas,
+        naive_bytes=sum(b.nbytes for b in planned),
+        planned_bytes=sum(arenas) * itemsize,
+        peak_bytes=max(live),
+    )
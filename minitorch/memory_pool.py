@@ -0,0 +1,165 @@
+"""Recycling allocator for tensor storage.
+
+Every op result is a fresh `float64` buffer from `Tensor.zeros`. Training
+loops ask for the same sizes over and over, so instead of returning those
+buffers to the system, `StoragePool` keeps them in free lists keyed by
+size and hands them out again.
+
+A pooled storage is a view of a buffer owned by the pool. A
+`weakref.finalize` on that view fires once the last `TensorData` that
+shares it is gone and returns the buffer to its free list. A buffer that
+is still referenced elsewhere, for example by an array from
+`Tensor.to_numpy`, is dropped rather than recycled.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from typing import Any, List
+
+    from .tensor_data import Storage
+
+
+@dataclass
+class PoolStats:
+    """Counters kept by a `StoragePool`.
+
+    Attributes
+    ----------
+        hits : allocations served from a free list
+        misses : allocations that needed a new buffer
+        returned : buffers put back on a free list
+        discarded : buffers still referenced elsewhere when released
+        evictions : buffers dropped to stay under the cap
+        pooled_bytes : bytes currently held in free lists
+
+    """
+
+    hits: int = 0
+    misses: int = 0
+    returned: int = 0
+    discarded: int = 0
+    evictions: int = 0
+    pooled_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of pooled allocations that were hits"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _probe_refcount() -> int:
+    """Reference count of a buffer seen from inside a finalizer callback
+    when nothing else holds it.
+    """
+    seen = []
+
+    def probe(buf: Any) -> None:
+        seen.append(sys.getrefcount(buf))
+
+    buf = np.zeros(1)
+    view = buf[:]
+    weakref.finalize(view, probe, buf)
+    del buf, view
+    return seen[0]
+
+
+_FREE_REFCOUNT = _probe_refcount()
+
+
+class StoragePool:
+    """Free lists of storage buffers keyed by number of elements.
+
+    When the pooled bytes exceed `max_bytes`, buffers of the least
+    recently used sizes are evicted first. Sizes below `min_size` are
+    allocated directly: the C allocator already recycles small blocks, and
+    only buffers big enough to be mapped fresh from the OS (128 KiB with
+    glibc) pay page faults that the pool avoids.
+
+    Args:
+    ----
+        max_bytes : cap on bytes kept in free lists
+        min_size : smallest number of elements to pool
+
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20, min_size: int = 2**14):
+        self.max_bytes = max_bytes
+        self.min_size = min_size
+        self.enabled = True
+        self.stats = PoolStats()
+        self._free: OrderedDict[int, List[Storage]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def zeros(self, size: int) -> Storage:
+        """Return a zero-filled storage of `size` elements.
+
+        Args:
+        ----
+            size : number of elements
+
+        Returns:
+        -------
+            Flat `float64` storage
+
+        """
+        if not self.enabled or size < self.min_size:
+            return np.zeros(size, np.float64)
+        with self._lock:
+            buffers = self._free.get(size)
+            if buffers:
+                buf = buffers.pop()
+                self._free.move_to_end(size)
+                self.stats.hits += 1
+                self.stats.pooled_bytes -= buf.nbytes
+            else:
+                buf = None
+                self.stats.misses += 1
+        if buf is None:
+            buf = np.zeros(size, np.float64)
+        else:
+            buf.fill(0.0)
+        storage = buf[:]
+        weakref.finalize(storage, self._release, buf)
+        return storage
+
+    def _release(self, buf: Storage) -> None:
+        # Another view of `buf` (e.g. from `to_numpy`) outlived the storage,
+        # so the memory may still be read.
+        if sys.getrefcount(buf) > _FREE_REFCOUNT:
+            with self._lock:
+                self.stats.discarded += 1
+            return
+        if not self.enabled or buf.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            self._free.setdefault(buf.size, []).append(buf)
+            self._free.move_to_end(buf.size)
+            self.stats.returned += 1
+            self.stats.pooled_bytes += buf.nbytes
+            while self.stats.pooled_bytes > self.max_bytes:
+                size, buffers = next(iter(self._free.items()))
+                evicted = buffers.pop()
+                if not buffers:
+                    del self._free[size]
+                self.stats.evictions += 1
+                self.stats.pooled_bytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        """Drop every pooled buffer and reset the statistics"""
+        with self._lock:
+            self._free.clear()
+            self.stats = PoolStats()
+
+
+storage_pool = StoragePool()
@@ -1,6 +1,18 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional, Sequence, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import minitorch
+
+# Bumped whenever any module registers a parameter or a child module. Cached
+# traversals remember the generation they were built at, so registering
+# anywhere in a tree invalidates the caches of all of its ancestors.
+_generation = 0
+
+
+def _registered() -> None:
+    global _generation
+    _generation += 1
 
 
 class Module:
@@ -12,17 +24,23 @@ class Module:
         _modules : Storage of the child modules
         _parameters : Storage of the module's parameters
         training : Whether the module is in training mode or evaluation mode
+        checkpointed : Whether calls recompute activations during backward
+        _cache : Generation and result of the last `named_parameters`
 
     """
 
     _modules: Dict[str, Module]
     _parameters: Dict[str, Parameter]
     training: bool
+    checkpointed: bool
+    _cache: Tuple[int, List[Tuple[str, Parameter]], List[Parameter]]
 
     def __init__(self) -> None:
         self._modules = {}
         self._parameters = {}
         self.training = True
+        self.checkpointed = False
+        self._cache = (-1, [], [])
 
     def modules(self) -> Sequence[Module]:
         """Return the direct child modules of this module."""
@@ -41,31 +59,102 @@ class Module:
         for child_module in self._modules.values():
             child_module.eval()
 
+    def set_checkpoint(self, mode: bool = True) -> None:
+        """Set whether calling this module runs `forward` under
+        `minitorch.checkpoint`.
+
+        Only the inputs of a checkpointed module are kept for backward; its
+        forward runs again during backpropagation, and its parameters get
+        their gradients then. Set it on each block of a deep stack to keep
+        one activation per block.
+        """
+        self.checkpointed = mode
+
+    def _traverse(self) -> Tuple[List[Tuple[str, Parameter]], List[Parameter]]:
+        """Named and plain parameter lists, rebuilt only after something
+        has been registered since the last call.
+        """
+        generation, named, params = self.__dict__["_cache"]
+        if generation == _generation:
+            return named, params
+        named = list(self._parameters.items())
+        for m_name, m_val in self._modules.items():
+            for child_p_name, child_p_val in m_val._traverse()[0]:
+                named.append((m_name + "." + child_p_name, child_p_val))
+        params = [p for _, p in named]
+        self.__dict__["_cache"] = (_generation, named, params)
+        return named, params
+
     def named_parameters(self) -> Sequence[Tuple[str, Parameter]]:
         """Collect all the parameters of this module and its descendents.
 
+        The traversal is cached until a parameter or module is registered.
+
         Returns
         -------
             The name and `Parameter` of each ancestor parameter.
 
         """
-        param_list = []
-        for p_name, p_val in self._parameters.items():
-            param_list.append((p_name, p_val))
-        for m_name, m_val in self._modules.items():
-            child_params = m_val.named_parameters()
-            for child_p_name, child_p_val in child_params:
-                param_list.append((m_name + "." + child_p_name, child_p_val))
-        return param_list
+        return list(self._traverse()[0])
 
     def parameters(self) -> Sequence[Parameter]:
         """Enumerate over all the parameters of this module and its descendents."""
-        param_list = []
-        for param in self._parameters.values():
-            param_list.append((param))
-        for module in self._modules.values():
-            param_list += module.parameters()
-        return param_list
+        return list(self._traverse()[1])
+
+    def flatten_parameters(self) -> Optional[FlatParameters]:
+        """Pack the tensor parameters of this module and its descendents,
+        and their gradients, into two contiguous buffers.
+
+        Each `Parameter` is given a new leaf tensor that is a view into the
+        value buffer, with a gradient that is a view into the gradient
+        buffer. Backward accumulates into those views in place, so an
+        optimizer can update every parameter with one kernel over the
+        flat buffers. All tensor parameters must share a backend. Flatten
+        before creating the optimizer, which looks for the buffers then.
+
+        Returns
+        -------
+            The packed buffers, or None if there are no tensor parameters.
+
+        """
+        params: List[Parameter] = []
+        seen = set()
+        for p in self.parameters():
+            if isinstance(p.value, minitorch.Tensor) and id(p) not in seen:
+                seen.add(id(p))
+                params.append(p)
+        if not params:
+            return None
+
+        backend = params[0].value.backend
+        size = sum(p.value.size for p in params)
+        flat = FlatParameters(
+            minitorch.zeros((size,), backend=backend),
+            minitorch.zeros((size,), backend=backend),
+            params,
+        )
+        offset = 0
+        for p in params:
+            old = p.value
+            assert old.backend is backend, "Parameters must share a backend"
+            shape = old.shape
+            strides = minitorch.strides_from_shape(shape)
+            value = minitorch.Tensor(
+                flat.values._tensor.as_strided(offset, shape, strides),
+                backend=backend,
+            )
+            value.copy_(old)
+            grad = minitorch.Tensor(
+                flat.grads._tensor.as_strided(offset, shape, strides),
+                backend=backend,
+            )
+            if old.grad is not None:
+                grad.copy_(old.grad)
+            p.update(value)
+            value.grad = grad
+            p.flat = flat
+            offset += old.size
+        return flat
 
     def add_parameter(self, k: str, v: Any) -> Parameter:
         """Manually add a parameter. Useful helper for scalar parameters.
@@ -82,15 +171,20 @@ class Module:
         """
         val = Parameter(v, k)
         self.__dict__["_parameters"][k] = val
+        self.__dict__[k] = val
+        _registered()
         return val
 
     def __setattr__(self, key: str, val: Parameter) -> None:
+        # Registered values are also stored as plain attributes, so reading
+        # them back never reaches `__getattr__`.
         if isinstance(val, Parameter):
             self.__dict__["_parameters"][key] = val
+            _registered()
         elif isinstance(val, Module):
             self.__dict__["_modules"][key] = val
-        else:
-            super().__setattr__(key, val)
+            _registered()
+        super().__setattr__(key, val)
 
     def __getattr__(self, key: str) -> Any:
         if key in self.__dict__["_parameters"]:
@@ -119,6 +213,18 @@ class Module:
             The result of the `forward` method.
 
         """
+        if (
+            self.checkpointed
+            and not kwargs
+            and args
+            and all(isinstance(a, minitorch.Tensor) for a in args)
+        ):
+            params = [
+                p.value
+                for p in self.parameters()
+                if isinstance(p.value, minitorch.Tensor)
+            ]
+            return minitorch.checkpoint(self.forward, *args, params=params)
         return self.forward(*args, **kwargs)
 
     def __repr__(self) -> str:
@@ -156,16 +262,26 @@ class Parameter:
     any value for testing.
     """
 
+    flat: Optional[FlatParameters]
+
     def __init__(self, x: Any, name: Optional[str] = None) -> None:
         self.value = x
         self.name = name
+        self.flat = None
         if hasattr(x, "requires_grad_"):
             self.value.requires_grad_(True)
             if self.name:
                 self.value.name = self.name
 
     def update(self, x: Any) -> None:
-        """Update the parameter value."""
+        """Update the parameter value.
+
+        A parameter packed by `Module.flatten_parameters` leaves its flat
+        buffer, since the new value does not live in it.
+        """
+        if self.flat is not None:
+            self.flat.packed = False
+            self.flat = None
         self.value = x
         if hasattr(x, "requires_grad_"):
             self.value.requires_grad_(True)
@@ -177,3 +293,33 @@ class Parameter:
 
     def __str__(self) -> str:
         return str(self.value)
+
+
+class FlatParameters:
+    """Contiguous buffers holding packed tensor parameters, built by
+    `Module.flatten_parameters`.
+
+    Attributes
+    ----------
+        values : 1-D tensor that every parameter value is a view of
+        grads : 1-D tensor that every parameter gradient is a view of
+        parameters : the packed parameters, in buffer order
+        packed : False once a parameter has been given a new value
+
+    """
+
+    values: minitorch.Tensor
+    grads: minitorch.Tensor
+    parameters: Sequence[Parameter]
+    packed: bool
+
+    def __init__(
+        self,
+        values: minitorch.Tensor,
+        grads: minitorch.Tensor,
+        parameters: Sequence[Parameter],
+    ) -> None:
+        self.values = values
+        self.grads = grads
+        self.parameters = parameters
+        self.packed = True
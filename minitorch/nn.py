@@ -0,0 +1,240 @@
+"""Ready-made neural network layers.
+
+`Linear` multiplies with the batched `matrix_multiply` kernel and adds the
+bias and activation in one fused epilogue (see `fusion.py`), instead of
+broadcasting the input against the weights, which would need a
+`batch x in x out` intermediate.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .fusion import fuse
+from .module import Module, Parameter
+from .tensor import Tensor
+from .tensor_ops import SimpleBackend
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+    from .tensor_data import UserShape
+    from .tensor_ops import TensorBackend
+
+
+def _uniform(shape: UserShape, bound: float, backend: TensorBackend) -> Tensor:
+    """Tensor of `shape` drawn uniformly from `[-bound, bound]` in one call.
+
+    The generator is seeded from `random`, so `random.seed` makes the
+    result repeatable like `minitorch.rand`.
+    """
+    rng = np.random.default_rng(random.getrandbits(64))
+    size = int(np.prod(shape, dtype=np.int64))
+    return Tensor.make(rng.uniform(-bound, bound, size), tuple(shape), backend=backend)
+
+
+def _fans(shape: UserShape) -> Tuple[int, int]:
+    """Fan-in and fan-out of a `(in, out)` weight shape"""
+    return shape[0], shape[-1]
+
+
+def xavier_uniform(
+    shape: UserShape, gain: float = 1.0, backend: TensorBackend = SimpleBackend
+) -> Tensor:
+    """Glorot initialization for a weight of shape `(in, out)`.
+
+    Args:
+    ----
+        shape : weight shape
+        gain : scale for the activation that follows
+        backend : tensor backend
+
+    Returns:
+    -------
+        Weights uniform in `gain * sqrt(6 / (in + out))`
+
+    """
+    fan_in, fan_out = _fans(shape)
+    return _uniform(shape, gain * math.sqrt(6.0 / (fan_in + fan_out)), backend)
+
+
+def kaiming_uniform(
+    shape: UserShape,
+    gain: float = math.sqrt(2.0),
+    backend: TensorBackend = SimpleBackend,
+) -> Tensor:
+    """He initialization for a weight of shape `(in, out)`, followed by ReLU.
+
+    Args:
+    ----
+        shape : weight shape
+        gain : scale for the activation that follows
+        backend : tensor backend
+
+    Returns:
+    -------
+        Weights uniform in `gain * sqrt(3 / in)`
+
+    """
+    fan_in, _ = _fans(shape)
+    return _uniform(shape, gain * math.sqrt(3.0 / fan_in), backend)
+
+
+# Fused bias and activation epilogues. Each is one kernel forward and one
+# backward, whatever the batch shape.
+
+
+@fuse
+def _bias_relu(x: Tensor, b: Tensor) -> Tensor:
+    return (x + b).relu()
+
+
+@fuse
+def _bias_sigmoid(x: Tensor, b: Tensor) -> Tensor:
+    return (x + b).sigmoid()
+
+
+def _bias(x: Tensor, b: Tensor) -> Tensor:
+    return x + b
+
+
+_epilogues: Dict[Optional[str], Callable[[Tensor, Tensor], Tensor]] = {
+    None: _bias,
+    "relu": _bias_relu,
+    "sigmoid": _bias_sigmoid,
+}
+
+
+class Linear(Module):
+    """Affine layer `activation(x @ weights + bias)`.
+
+    Args:
+    ----
+        in_size : size of the last input dimension
+        out_size : size of the last output dimension
+        bias : whether to add a bias
+        activation : None, `"relu"` or `"sigmoid"`, fused with the bias
+        backend : tensor backend of the parameters
+
+    Weights use Kaiming initialization before a ReLU and Xavier otherwise.
+    The bias starts at zero.
+
+    """
+
+    def __init__(
+        self,
+        in_size: int,
+        out_size: int,
+        bias: bool = True,
+        activation: Optional[str] = None,
+        backend: TensorBackend = SimpleBackend,
+    ):
+        super().__init__()
+        if activation not in _epilogues:
+            raise ValueError(f"Unknown activation {activation!r}")
+        init = kaiming_uniform if activation == "relu" else xavier_uniform
+        self.in_size = in_size
+        self.out_size = out_size
+        self.activation = activation
+        self.weights = Parameter(init((in_size, out_size), backend=backend))
+        self.bias = (
+            Parameter(Tensor.make([0.0] * out_size, (out_size,), backend=backend))
+            if bias
+            else None
+        )
+
+    def forward(self, x: Tensor) -> Tensor:
+        """Apply the layer to `x` of shape `(..., in_size)`, or to a single
+        sample of shape `(in_size,)`
+        """
+        if x.dims == 1:
+            return self.forward(x.unsqueeze(0)).squeeze(0)
+        out = x @ self.weights.value
+        if self.bias is not None:
+            return _epilogues[self.activation](out, self.bias.value)
+        if self.activation == "relu":
+            return out.relu()
+        if self.activation == "sigmoid":
+            return out.sigmoid()
+        return out
+
+    def __repr__(self) -> str:
+        return (
+            f"Linear(in_size={self.in_size}, out_size={self.out_size}, "
+            f"activation={self.activation})"
+        )
+
+
+class ReLU(Module):
+    """Elementwise `max(x, 0)`"""
+
+    def forward(self, x: Tensor) -> Tensor:
+        """Apply ReLU"""
+        return x.relu()
+
+
+class Sigmoid(Module):
+    """Elementwise logistic function"""
+
+    def forward(self, x: Tensor) -> Tensor:
+        """Apply sigmoid"""
+        return x.sigmoid()
+
+
+class Sequential(Module):
+    """Modules applied one after another, registered as `"0"`, `"1"`, ..."""
+
+    def __init__(self, *modules: Module):
+        super().__init__()
+        for i, m in enumerate(modules):
+            setattr(self, str(i), m)
+
+    def __len__(self) -> int:
+        return len(self._modules)
+
+    def __getitem__(self, i: int) -> Module:
+        return list(self._modules.values())[i]
+
+    def forward(self, x: Any) -> Any:
+        """Pass `x` through every module in order"""
+        for m in self._modules.values():
+            x = m(x)
+        return x
+
+
+class MLP(Sequential):
+    """Stack of `Linear` layers with a fused activation after each.
+
+    Args:
+    ----
+        sizes : input size, then the output size of every layer
+        activation : activation of the hidden layers
+        out_activation : activation of the last layer
+        backend : tensor backend of the parameters
+
+    """
+
+    def __init__(
+        self,
+        sizes: Sequence[int],
+        activation: Optional[str] = "relu",
+        out_activation: Optional[str] = None,
+        backend: TensorBackend = SimpleBackend,
+    ):
+        assert len(sizes) >= 2, "MLP needs an input and an output size"
+        n = len(sizes) - 1
+        super().__init__(
+            *[
+                Linear(
+                    sizes[i],
+                    sizes[i + 1],
+                    activation=activation if i < n - 1 else out_activation,
+                    backend=backend,
+                )
+                for i in range(n)
+            ]
+        )
@@ -0,0 +1,533 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from . import operators
+from .fusion import ADD, EXP, LOG, MUL, NEG, RELU, SIGMOID, SQRT
+from .tensor_data import shape_broadcast
+from .tensor_ops import (
+    MapProto,
+    ReduceProto,
+    TensorBackend,
+    TensorOps,
+    ZipProto,
+    fused_back_out,
+    fused_multi_out,
+    fused_out,
+    matmul_out,
+    sum_to_shape_out,
+)
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, List, Optional, Tuple
+
+    import numpy.typing as npt
+
+    from .fusion import Program
+    from .tensor import Tensor
+    from .tensor_data import Shape, Storage, Strides, UserShape
+
+    ArrayFn = Callable[..., Any]
+
+
+def _sigmoid(a: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    e = np.exp(-np.abs(a))
+    return np.where(a >= 0, 1.0 / (1.0 + e), e / (1.0 + e))
+
+
+def _relu(a: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return np.where(a > 0, a, 0.0)
+
+
+def _is_close(
+    a: npt.NDArray[np.float64], b: npt.NDArray[np.float64]
+) -> npt.NDArray[np.bool_]:
+    return np.abs(a - b) < 1e-2
+
+
+def _relu_back(
+    a: npt.NDArray[np.float64], b: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    return np.where(a < 0, 0.0, b)
+
+
+# The domain checks raise the same ValueError as the scalar `operators`
+# used by the other backends, instead of filling the result with nan/inf.
+
+
+def _log(a: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    if np.any(a <= 0):
+        raise ValueError("Logarithm of non-positive values is undefined.")
+    return np.log(a)
+
+
+def _inv(a: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    if np.any(a == 0):
+        raise ValueError("Reciprocal of zero is undefined.")
+    return np.reciprocal(a)
+
+
+def _log_back(
+    a: npt.NDArray[np.float64], b: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    if np.any(a <= 0):
+        raise ValueError("Logarithm undefined for non-positive values.")
+    return b / a
+
+
+def _inv_back(
+    a: npt.NDArray[np.float64], b: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    if np.any(a == 0):
+        raise ValueError("Reciprocal of zero is undefined.")
+    return -b / (a * a)
+
+
+# Whole-array equivalents of the scalar functions in `operators`.
+# Real ufuncs are called with `out=` so they write straight into the result.
+MAP_FNS: Dict[Callable[..., Any], ArrayFn] = {
+    operators.neg: np.negative,
+    operators.sigmoid: _sigmoid,
+    operators.relu: _relu,
+    operators.log: _log,
+    operators.exp: np.exp,
+    operators.id: np.positive,
+    operators.inv: _inv,
+}
+
+ZIP_FNS: Dict[Callable[..., Any], ArrayFn] = {
+    operators.add: np.add,
+    operators.mul: np.multiply,
+    operators.lt: np.less,
+    operators.eq: np.equal,
+    operators.is_close: _is_close,
+    operators.relu_back: _relu_back,
+    operators.log_back: _log_back,
+    operators.inv_back: _inv_back,
+}
+
+REDUCE_FNS: Dict[Callable[..., Any], np.ufunc] = {
+    operators.add: np.add,
+    operators.mul: np.multiply,
+    operators.max: np.maximum,
+}
+
+
+def strided_view(
+    storage: Storage, shape: Shape, strides: Strides
+) -> npt.NDArray[np.float64]:
+    """View `storage` as an ndarray with the given element `shape` and `strides`.
+
+    No data is copied; writes through the view land in `storage`.
+
+    Args:
+    ----
+        storage : flat tensor storage
+        shape : tensor shape
+        strides : tensor strides, in elements
+
+    Returns:
+    -------
+        ndarray view over `storage`
+
+    """
+    itemsize = storage.itemsize
+    return as_strided(
+        storage,
+        shape=tuple(int(s) for s in shape),
+        strides=tuple(int(s) * itemsize for s in strides),
+    )
+
+
+class NumpyOps(TensorOps):
+    @staticmethod
+    def map(fn: Callable[[float], float]) -> MapProto:
+        """See `tensor_ops.py`"""
+        f = tensor_map(fn)
+
+        def ret(a: Tensor, out: Optional[Tensor] = None) -> Tensor:
+            if out is None:
+                out = a.zeros(a.shape)
+            f(*out.tuple(), *a.tuple())
+            return out
+
+        return ret
+
+    @staticmethod
+    def zip(fn: Callable[[float, float], float]) -> ZipProto:
+        """See `tensor_ops.py`"""
+        f = tensor_zip(fn)
+
+        def ret(a: Tensor, b: Tensor, out: Optional[Tensor] = None) -> Tensor:
+            c_shape = shape_broadcast(a.shape, b.shape)
+            if out is None:
+                out = a.zeros(c_shape)
+            else:
+                assert out.shape == c_shape, f"out {out.shape} must be {c_shape}"
+            f(*out.tuple(), *a.tuple(), *b.tuple())
+            return out
+
+        return ret
+
+    @staticmethod
+    def reduce(fn: Callable[[float, float], float], start: float = 0.0) -> ReduceProto:
+        """See `tensor_ops.py`"""
+        f = tensor_reduce(fn, start)
+
+        def ret(a: Tensor, dim: int, out: Optional[Tensor] = None) -> Tensor:
+            out_shape = list(a.shape)
+            if dim >= 0:
+                out_shape[dim] = 1
+            else:
+                out_shape = [1]
+
+            if out is None:
+                out = a.zeros(tuple(out_shape))
+            else:
+                assert out.shape == tuple(out_shape), f"out must be {out_shape}"
+            f(*out.tuple(), *a.tuple(), dim)
+            return out
+
+        return ret
+
+    @staticmethod
+    def matrix_multiply(a: Tensor, b: Tensor, out: Optional[Tensor] = None) -> Tensor:
+        """Batched tensor matrix multiply with `np.matmul` over strided views.
+
+        Args:
+        ----
+            a : tensor data a
+            b : tensor data b
+            out : optional, tensor to fill in with the output shape
+
+        Returns:
+        -------
+            New tensor data
+
+        """
+        out = matmul_out(a, b, out)
+        np.matmul(
+            strided_view(*a.tuple()),
+            strided_view(*b.tuple()),
+            out=strided_view(*out.tuple()),
+        )
+        return out
+
+    @staticmethod
+    def sum_to_shape(
+        a: Tensor, shape: UserShape, out: Optional[Tensor] = None
+    ) -> Tensor:
+        """See `tensor_ops.py`"""
+        out, out_shape, out_strides = sum_to_shape_out(a, shape, out)
+        tensor_sum_to_shape(out._tensor._storage, out_shape, out_strides, *a.tuple())
+        return out
+
+    @staticmethod
+    def fused_map(program: Program) -> Callable[..., Tensor]:
+        """See `tensor_ops.py`"""
+        code = program.code.tolist()
+
+        def ret(*inputs: Tensor, out: Optional[Tensor] = None) -> Tensor:
+            out = fused_out(inputs, out)
+            regs = run_arrays(code, [strided_view(*t.tuple()) for t in inputs])
+            strided_view(*out.tuple())[...] = regs[-1]
+            return out
+
+        return ret
+
+    @staticmethod
+    def fused_multi_map(program: Program) -> Callable[..., Tuple[Tensor, ...]]:
+        """See `tensor_ops.py`"""
+        code = program.code.tolist()
+        outputs = program.outputs.tolist()
+
+        def ret(
+            *inputs: Tensor, out: Optional[Tuple[Tensor, ...]] = None
+        ) -> Tuple[Tensor, ...]:
+            outs = fused_multi_out(inputs, len(outputs), out)
+            # Every output is computed before any is stored, so outputs may
+            # alias inputs.
+            regs = run_arrays(code, [strided_view(*t.tuple()) for t in inputs])
+            for o, r in zip(outs, outputs):
+                strided_view(*o.tuple())[...] = regs[r]
+            return outs
+
+        return ret
+
+    @staticmethod
+    def fused_back(program: Program) -> Callable[..., Tuple[Tensor, ...]]:
+        """See `tensor_ops.py`"""
+        code = program.code.tolist()
+        n_grads = program.n_grads
+
+        def ret(
+            grad_out: Tensor, *inputs: Tensor, out: Optional[Tuple[Tensor, ...]] = None
+        ) -> Tuple[Tensor, ...]:
+            regs = run_arrays(code, [strided_view(*t.tuple()) for t in inputs])
+            d_out = strided_view(*grad_out.tuple())
+            d_regs = run_arrays_back(code, regs, d_out, n_grads)
+            grads = fused_back_out(grad_out, inputs[:n_grads], out)
+            for k in range(n_grads):
+                strided_view(*grads[k].tuple())[...] = d_regs[k]
+            return grads
+
+        return ret
+
+    is_cuda = False
+
+
+def run_arrays(code: List[List[int]], regs: List[Any]) -> List[Any]:
+    """Whole-array version of `fusion.run_program`.
+
+    Each instruction is one NumPy expression over the input views, with
+    NumPy broadcasting between them.
+
+    Args:
+    ----
+        code : program instructions as nested lists
+        regs : one array per input register
+
+    Returns:
+    -------
+        The register list, extended with one array per instruction
+
+    """
+    regs = list(regs)
+    for op, a, b in code:
+        x = regs[a]
+        if op == ADD:
+            r = x + regs[b]
+        elif op == MUL:
+            r = x * regs[b]
+        elif op == NEG:
+            r = -x
+        elif op == SIGMOID:
+            r = _sigmoid(x)
+        elif op == RELU:
+            r = _relu(x)
+        elif op == EXP:
+            r = np.exp(x)
+        elif op == LOG:
+            r = np.log(x)
+        elif op == SQRT:
+            r = np.sqrt(x)
+        else:
+            r = 1.0 / x
+        regs.append(r)
+    return regs
+
+
+def run_arrays_back(
+    code: List[List[int]], regs: List[Any], d_out: Any, n_grads: int
+) -> List[Any]:
+    """Whole-array version of `fusion.run_program_back`.
+
+    Args:
+    ----
+        code : program instructions as nested lists
+        regs : registers returned by `run_arrays`
+        d_out : derivative flowing into the output
+        n_grads : number of leading inputs that need a derivative; the
+            constants after them are skipped
+
+    Returns:
+    -------
+        Derivative of every register; unused inputs and constants get a
+        scalar 0.0
+
+    """
+    n_inputs = len(regs) - len(code)
+    grads: List[Any] = [0.0] * len(regs)
+    grads[-1] = d_out
+    for i in range(len(code) - 1, -1, -1):
+        op, a, b = code[i]
+        g = grads[n_inputs + i]
+        x = regs[a]
+        # Constant inputs get no derivative.
+        const_a = n_grads <= a < n_inputs
+        const_b = n_grads <= b < n_inputs
+        if op == ADD:
+            if not const_a:
+                grads[a] = grads[a] + g
+            if not const_b:
+                grads[b] = grads[b] + g
+        elif op == MUL:
+            if not const_a:
+                grads[a] = grads[a] + g * regs[b]
+            if not const_b:
+                grads[b] = grads[b] + g * x
+        elif const_a:
+            continue
+        elif op == NEG:
+            grads[a] = grads[a] - g
+        elif op == SIGMOID:
+            s = regs[n_inputs + i]
+            grads[a] = grads[a] + g * s * (1.0 - s)
+        elif op == RELU:
+            grads[a] = grads[a] + _relu_back(x, g)
+        elif op == EXP:
+            grads[a] = grads[a] + g * regs[n_inputs + i]
+        elif op == LOG:
+            grads[a] = grads[a] + g / x
+        elif op == SQRT:
+            grads[a] = grads[a] + 0.5 * g / regs[n_inputs + i]
+        else:
+            grads[a] = grads[a] - g / (x * x)
+    return grads
+
+
+# Implementations
+
+
+def tensor_map(
+    fn: Callable[[float], float],
+) -> Callable[[Storage, Shape, Strides, Storage, Shape, Strides], None]:
+    """NumPy low_level tensor_map function. See `tensor_ops.py` for description.
+
+    Both tensors are viewed through `as_strided` and `fn` runs once over the
+    whole array. Functions without a known vectorized equivalent fall back
+    to `np.vectorize`.
+
+    Args:
+    ----
+        fn: function mappings floats-to-floats to apply.
+
+    Returns:
+    -------
+        Tensor map function.
+
+    """
+    vec_fn = MAP_FNS.get(fn)
+    if vec_fn is None:
+        vec_fn = np.vectorize(fn, otypes=[np.float64])
+
+    def _map(
+        out: Storage,
+        out_shape: Shape,
+        out_strides: Strides,
+        in_storage: Storage,
+        in_shape: Shape,
+        in_strides: Strides,
+    ) -> None:
+        out_view = strided_view(out, out_shape, out_strides)
+        in_view = strided_view(in_storage, in_shape, in_strides)
+        if isinstance(vec_fn, np.ufunc):
+            vec_fn(in_view, out=out_view)
+        else:
+            out_view[...] = vec_fn(in_view)
+
+    return _map
+
+
+def tensor_zip(
+    fn: Callable[[float, float], float],
+) -> Callable[
+    [Storage, Shape, Strides, Storage, Shape, Strides, Storage, Shape, Strides], None
+]:
+    """NumPy low_level tensor_zip function. See `tensor_ops.py` for description.
+
+    Broadcasting is left to NumPy, which treats missing and size-1
+    dimensions exactly like `shape_broadcast`.
+
+    Args:
+    ----
+        fn: function maps two floats to float to apply.
+
+    Returns:
+    -------
+        Tensor zip function.
+
+    """
+    vec_fn = ZIP_FNS.get(fn)
+    if vec_fn is None:
+        vec_fn = np.vectorize(fn, otypes=[np.float64])
+
+    def _zip(
+        out: Storage,
+        out_shape: Shape,
+        out_strides: Strides,
+        a_storage: Storage,
+        a_shape: Shape,
+        a_strides: Strides,
+        b_storage: Storage,
+        b_shape: Shape,
+        b_strides: Strides,
+    ) -> None:
+        out_view = strided_view(out, out_shape, out_strides)
+        a_view = strided_view(a_storage, a_shape, a_strides)
+        b_view = strided_view(b_storage, b_shape, b_strides)
+        if isinstance(vec_fn, np.ufunc):
+            vec_fn(a_view, b_view, out=out_view, casting="unsafe")
+        else:
+            out_view[...] = vec_fn(a_view, b_view)
+
+    return _zip
+
+
+def tensor_reduce(
+    fn: Callable[[float, float], float], start: float = 0.0
+) -> Callable[[Storage, Shape, Strides, Storage, Shape, Strides, int], None]:
+    """NumPy low_level tensor_reduce function. See `tensor_ops.py` for description.
+
+    Known reductions use `ufunc.reduce`; other functions are wrapped with
+    `np.frompyfunc` so they still reduce in a single NumPy call.
+
+    Args:
+    ----
+        fn: reduction function mapping two floats to float.
+        start: initial value of the reduction.
+
+    Returns:
+    -------
+        Tensor reduce function
+
+    """
+    red_fn = REDUCE_FNS.get(fn)
+    if red_fn is None:
+        red_fn = np.frompyfunc(fn, 2, 1)
+
+    def _reduce(
+        out: Storage,
+        out_shape: Shape,
+        out_strides: Strides,
+        a_storage: Storage,
+        a_shape: Shape,
+        a_strides: Strides,
+        reduce_dim: int,
+    ) -> None:
+        out_view = strided_view(out, out_shape, out_strides)
+        a_view = strided_view(a_storage, a_shape, a_strides)
+        if reduce_dim < 0:
+            out_view[...] = red_fn.reduce(a_view, axis=None, initial=start)
+        else:
+            out_view[...] = red_fn.reduce(
+                a_view, axis=reduce_dim, keepdims=True, initial=start
+            )
+
+    return _reduce
+
+
+def tensor_sum_to_shape(
+    out: Storage,
+    out_shape: Shape,
+    out_strides: Strides,
+    a_storage: Storage,
+    a_shape: Shape,
+    a_strides: Strides,
+) -> None:
+    """NumPy sum to shape. See `tensor_ops.py` for description.
+
+    All reduced dimensions are summed by a single `np.sum` call.
+    """
+    out_view = strided_view(out, out_shape, out_strides)
+    a_view = strided_view(a_storage, a_shape, a_strides)
+    axes = tuple(
+        d for d in range(len(out_shape)) if out_shape[d] == 1 and a_shape[d] != 1
+    )
+    out_view[...] = np.sum(a_view, axis=axes, keepdims=True)
+
+
+NumpyBackend = TensorBackend(NumpyOps)
@@ -1,22 +1,46 @@
-from typing import Sequence
+from __future__ import annotations
 
-from .module import Parameter
+import abc
+import math
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .capture import active_tape
+from .fusion import trace
+from .module import FlatParameters, Parameter
 from .scalar import Scalar
+from .tensor import Tensor
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+    from .fusion import Program, Trace
 
 
 class Optimizer:
     def __init__(self, parameters: Sequence[Parameter]):
         self.parameters = parameters
+        self.flat = _shared_flat(parameters)
+        # Parameters the optimizer still updates one at a time while the
+        # flat buffer stays packed.
+        self.unpacked = [p for p in parameters if p.flat is not self.flat]
 
-
-class SGD(Optimizer):
-    def __init__(self, parameters: Sequence[Parameter], lr: float = 1.0):
-        super().__init__(parameters)
-        self.lr = lr
+    def _loop_parameters(self) -> Sequence[Parameter]:
+        """Parameters to update one at a time this step."""
+        if self.flat is not None and self.flat.packed:
+            return self.unpacked
+        return self.parameters
 
     def zero_grad(self) -> None:
-        """Set all gradient to zero"""
-        for p in self.parameters:
+        """Set all gradient to zero.
+
+        Tensor gradients are zeroed in place, so that their buffers are
+        allocated once and reused by every step. Parameters packed by
+        `Module.flatten_parameters` are zeroed by one fill of the flat
+        gradient buffer.
+        """
+        for p in self._loop_parameters():
             if p.value is None:
                 continue
             if hasattr(p.value, "derivative"):
@@ -24,11 +48,43 @@ class SGD(Optimizer):
                     p.value.derivative = None
             if hasattr(p.value, "grad"):
                 if p.value.grad is not None:
-                    p.value.grad = None
+                    p.value.grad.fill_(0.0)
+        if self.flat is not None and self.flat.packed:
+            self.flat.grads.fill_(0.0)
+
+
+def _shared_flat(parameters: Sequence[Parameter]) -> Optional[FlatParameters]:
+    """The flat buffer packing all of `parameters` that hold tensors, if
+    `Module.flatten_parameters` packed them together and nothing else.
+    """
+    flats = {id(p.flat): p.flat for p in parameters if hasattr(p.value, "grad")}
+    if len(flats) != 1:
+        return None
+    flat = next(iter(flats.values()))
+    if flat is None or not flat.packed:
+        return None
+    if {id(p) for p in flat.parameters} != {id(p) for p in parameters if p.flat}:
+        return None
+    return flat
+
+
+# `value - lr * grad`, with the learning rate as an input rather than a
+# constant so that the program stays the same when it changes.
+_sgd_program = trace(lambda value, grad, lr: value - lr * grad, 3)
+
+
+class SGD(Optimizer):
+    def __init__(self, parameters: Sequence[Parameter], lr: float = 1.0):
+        super().__init__(parameters)
+        self.lr = lr
 
     def step(self) -> None:
-        """Proceed one step in training"""
-        for p in self.parameters:
+        """Proceed one step in training.
+
+        Parameters packed by `Module.flatten_parameters` are all updated by
+        one fused in-place kernel over the flat buffers.
+        """
+        for p in self._loop_parameters():
             if p.value is None:
                 continue
             if hasattr(p.value, "derivative"):
@@ -36,4 +92,376 @@ class SGD(Optimizer):
                     p.update(Scalar(p.value.data - self.lr * p.value.derivative))
             elif hasattr(p.value, "grad"):
                 if p.value.grad is not None:
-                    p.update(p.value - self.lr * p.value.grad)
+                    p.value.sub_(p.value.grad * self.lr)
+        if self.flat is not None and self.flat.packed:
+            values = self.flat.values
+            lr = values._ensure_tensor(self.lr)
+            values.f.fused_map(_sgd_program)(values, self.flat.grads, lr, out=values)
+            values._tensor.version.value += 1
+
+
+class FusedOptimizer(Optimizer, abc.ABC):
+    """Base class for optimizers that update a parameter and its state
+    buffers in place with one fused kernel.
+
+    Subclasses name their state buffers in `state_names` and their
+    hyperparameters in `hyper_names`, and write the per-element `rule`.
+    The rule is traced once into a multi-output program (see
+    `fusion.trace`), which `fused_multi_map` runs over each parameter, or
+    once over the flat buffers of `Module.flatten_parameters`.
+
+    Every optimizer supports L2 weight decay, added to the gradient, and
+    clipping of the gradients to a global norm of `max_grad_norm`. The
+    clipping scale is computed inside the update kernel from the sum of
+    squared gradients, so it needs no sync to Python.
+
+    Args:
+    ----
+        parameters : tensor parameters to optimize
+        lr : learning rate
+        weight_decay : L2 penalty
+        max_grad_norm : clip the global gradient norm to this, if given
+
+    """
+
+    state_names: Tuple[str, ...] = ()
+    hyper_names: Tuple[str, ...] = ("lr", "weight_decay", "max_grad_norm")
+
+    def __init__(
+        self,
+        parameters: Sequence[Parameter],
+        lr: float,
+        weight_decay: float = 0.0,
+        max_grad_norm: Optional[float] = None,
+    ):
+        super().__init__(parameters)
+        for p in parameters:
+            if p.value is not None and not isinstance(p.value, Tensor):
+                raise TypeError(f"{type(self).__name__} only updates tensors.")
+        self.lr = lr
+        self.weight_decay = weight_decay
+        self.max_grad_norm = max_grad_norm
+        self.state: List[Dict[str, Tensor]] = []
+        self.step_count: Optional[Tensor] = None
+        self.sumsq: Optional[Tensor] = None
+        self.programs: Dict[bool, Program] = {}
+
+    @abc.abstractmethod
+    def rule(
+        self,
+        value: Trace,
+        grad: Trace,
+        state: Dict[str, Trace],
+        step: Trace,
+        hyper: Dict[str, Trace],
+    ) -> Tuple[Trace, ...]:
+        """Update of one element.
+
+        Args:
+        ----
+            value : parameter value
+            grad : gradient, already decayed and clipped
+            state : state buffers by name
+            step : number of this step, counting from 1
+            hyper : hyperparameters by name
+
+        Returns:
+        -------
+            New value, then the new value of each state buffer
+
+        """
+
+    def hypers(self) -> Dict[str, float]:
+        """Values of `hyper_names` for this step"""
+        return {
+            "lr": self.lr,
+            "weight_decay": self.weight_decay,
+            "max_grad_norm": self.max_grad_norm or 0.0,
+        }
+
+    def _program(self) -> Program:
+        """Traced update, with or without clipping"""
+        clip = self.max_grad_norm is not None
+        if clip not in self.programs:
+            n_states = len(self.state_names)
+
+            def update(value: Trace, grad: Trace, *rest: Trace) -> Tuple[Trace, ...]:
+                state = dict(zip(self.state_names, rest[:n_states]))
+                step, sumsq = rest[n_states : n_states + 2]
+                hyper = dict(zip(self.hyper_names, rest[n_states + 2 :]))
+                if clip:
+                    c = hyper["max_grad_norm"]
+                    grad = grad * (c / (c + (sumsq.sqrt() - c).relu()))
+                grad = grad + hyper["weight_decay"] * value
+                return self.rule(value, grad, state, step, hyper)
+
+            self.programs[clip] = trace(update, 4 + n_states + len(self.hyper_names))
+        return self.programs[clip]
+
+    def _groups(self) -> List[Tuple[Tensor, Optional[Tensor]]]:
+        """Value and gradient tensors, one pair per state entry"""
+        if self.flat is not None and self.flat.packed:
+            return [(self.flat.values, self.flat.grads)]
+        return [(p.value, p.value.grad) for p in self.parameters if p.value is not None]
+
+    def step(self) -> None:
+        """Proceed one step in training, with one fused kernel per
+        parameter, or one in total for flat parameters.
+        """
+        groups = self._groups()
+        if not groups:
+            return
+        like = groups[0][0]
+        if self.step_count is None:
+            self.step_count = like.zeros((1,))
+        if self.sumsq is None:
+            self.sumsq = like.zeros((1,))
+        self.step_count.add_(1.0)
+        while len(self.state) < len(groups):
+            value = groups[len(self.state)][0]
+            self.state.append({name: value.zeros() for name in self.state_names})
+        tape = active_tape()
+        if tape is not None:
+            # The state carries over from one replay to the next.
+            tape.keep(
+                self.step_count,
+                self.sumsq,
+                *[t for state in self.state for t in state.values()],
+            )
+
+        if self.max_grad_norm is not None:
+            self.sumsq.fill_(0.0)
+            for _, g in groups:
+                if g is not None:
+                    self.sumsq.add_(g.f.sum_to_shape(g.f.mul_zip(g, g), (1,)))
+
+        program = self._program()
+        hypers = self.hypers()
+        scalars = [self.step_count, self.sumsq] + [
+            like._ensure_tensor(float(hypers[name])) for name in self.hyper_names
+        ]
+        scalars += [like._ensure_tensor(c) for c in program.consts]
+        update = like.f.fused_multi_map(program)
+        for (value, grad), state in zip(groups, self.state):
+            if grad is None:
+                continue
+            buffers = [state[name] for name in self.state_names]
+            update(value, grad, *buffers, *scalars, out=(value, *buffers))
+            value._tensor.version.value += 1
+
+    def state_dict(self) -> Dict[str, Any]:
+        """Copy of the optimizer state, for `load_state_dict`"""
+        return {
+            "step": 0 if self.step_count is None else int(self.step_count.item()),
+            "hypers": {
+                name: getattr(self, name)
+                for name in self.hyper_names
+                if hasattr(self, name)
+            },
+            "state": [
+                {name: t.to_numpy().copy() for name, t in state.items()}
+                for state in self.state
+            ],
+        }
+
+    def load_state_dict(self, state_dict: Dict[str, Any]) -> None:
+        """Restore a state from `state_dict`, into the existing buffers
+        when there are some.
+        """
+        for name, value in state_dict["hypers"].items():
+            setattr(self, name, value)
+        groups = self._groups()
+        assert len(state_dict["state"]) <= len(groups), "State for other parameters"
+        like = groups[0][0] if groups else None
+        for i, saved in enumerate(state_dict["state"]):
+            value = groups[i][0]
+            if i == len(self.state):
+                self.state.append({name: value.zeros() for name in self.state_names})
+            for name in self.state_names:
+                array = np.asarray(saved[name], dtype=np.float64)
+                assert array.shape == value.shape, f"{name} {array.shape}"
+                self.state[i][name].copy_(
+                    Tensor.make(array.ravel(), value.shape, backend=value.backend)
+                )
+        if like is not None:
+            if self.step_count is None:
+                self.step_count = like.zeros((1,))
+            self.step_count.fill_(float(state_dict["step"]))
+
+
+class SGDMomentum(FusedOptimizer):
+    """SGD with momentum ::
+
+        buf = momentum * buf + grad
+        value = value - lr * buf
+
+    Args:
+    ----
+        parameters : tensor parameters to optimize
+        lr : learning rate
+        momentum : decay of the momentum buffer
+        weight_decay : L2 penalty
+        max_grad_norm : clip the global gradient norm to this, if given
+
+    """
+
+    state_names = ("momentum_buffer",)
+    hyper_names = FusedOptimizer.hyper_names + ("momentum",)
+
+    def __init__(
+        self,
+        parameters: Sequence[Parameter],
+        lr: float = 1.0,
+        momentum: float = 0.9,
+        weight_decay: float = 0.0,
+        max_grad_norm: Optional[float] = None,
+    ):
+        super().__init__(parameters, lr, weight_decay, max_grad_norm)
+        self.momentum = momentum
+
+    def hypers(self) -> Dict[str, float]:
+        """See `FusedOptimizer`"""
+        return dict(super().hypers(), momentum=self.momentum)
+
+    def rule(
+        self,
+        value: Trace,
+        grad: Trace,
+        state: Dict[str, Trace],
+        step: Trace,
+        hyper: Dict[str, Trace],
+    ) -> Tuple[Trace, ...]:
+        """See `FusedOptimizer`"""
+        buf = hyper["momentum"] * state["momentum_buffer"] + grad
+        return value - hyper["lr"] * buf, buf
+
+
+class RMSProp(FusedOptimizer):
+    """RMSProp ::
+
+        square_avg = alpha * square_avg + (1 - alpha) * grad * grad
+        value = value - lr * grad / (sqrt(square_avg) + eps)
+
+    Args:
+    ----
+        parameters : tensor parameters to optimize
+        lr : learning rate
+        alpha : decay of the squared gradient average
+        eps : added to the denominator
+        weight_decay : L2 penalty
+        max_grad_norm : clip the global gradient norm to this, if given
+
+    """
+
+    state_names = ("square_avg",)
+    hyper_names = FusedOptimizer.hyper_names + ("alpha", "eps")
+
+    def __init__(
+        self,
+        parameters: Sequence[Parameter],
+        lr: float = 0.01,
+        alpha: float = 0.99,
+        eps: float = 1e-8,
+        weight_decay: float = 0.0,
+        max_grad_norm: Optional[float] = None,
+    ):
+        super().__init__(parameters, lr, weight_decay, max_grad_norm)
+        self.alpha = alpha
+        self.eps = eps
+
+    def hypers(self) -> Dict[str, float]:
+        """See `FusedOptimizer`"""
+        return dict(super().hypers(), alpha=self.alpha, eps=self.eps)
+
+    def rule(
+        self,
+        value: Trace,
+        grad: Trace,
+        state: Dict[str, Trace],
+        step: Trace,
+        hyper: Dict[str, Trace],
+    ) -> Tuple[Trace, ...]:
+        """See `FusedOptimizer`"""
+        alpha = hyper["alpha"]
+        square_avg = alpha * state["square_avg"] + (1.0 - alpha) * grad * grad
+        value = value - hyper["lr"] * grad / (square_avg.sqrt() + hyper["eps"])
+        return value, square_avg
+
+
+class Adam(FusedOptimizer):
+    """Adam, with bias-corrected moments ::
+
+        m = beta1 * m + (1 - beta1) * grad
+        v = beta2 * v + (1 - beta2) * grad * grad
+        value = value - lr * m_hat / (sqrt(v_hat) + eps)
+
+    where `m_hat = m / (1 - beta1 ** step)` and likewise for `v_hat`. The
+    powers are taken inside the kernel from the step counter, so a
+    captured step stays correct on replay.
+
+    Args:
+    ----
+        parameters : tensor parameters to optimize
+        lr : learning rate
+        betas : decays of the first and second moments
+        eps : added to the denominator
+        weight_decay : L2 penalty
+        max_grad_norm : clip the global gradient norm to this, if given
+
+    """
+
+    state_names = ("exp_avg", "exp_avg_sq")
+    hyper_names = FusedOptimizer.hyper_names + (
+        "beta1",
+        "beta2",
+        "eps",
+        "log_beta1",
+        "log_beta2",
+    )
+
+    def __init__(
+        self,
+        parameters: Sequence[Parameter],
+        lr: float = 0.001,
+        betas: Tuple[float, float] = (0.9, 0.999),
+        eps: float = 1e-8,
+        weight_decay: float = 0.0,
+        max_grad_norm: Optional[float] = None,
+    ):
+        super().__init__(parameters, lr, weight_decay, max_grad_norm)
+        self.beta1, self.beta2 = betas
+        self.eps = eps
+
+    def hypers(self) -> Dict[str, float]:
+        """See `FusedOptimizer`"""
+
+        def log(beta: float) -> float:
+            return math.log(beta) if beta > 0 else -math.inf
+
+        return dict(
+            super().hypers(),
+            beta1=self.beta1,
+            beta2=self.beta2,
+            eps=self.eps,
+            log_beta1=log(self.beta1),
+            log_beta2=log(self.beta2),
+        )
+
+    def rule(
+        self,
+        value: Trace,
+        grad: Trace,
+        state: Dict[str, Trace],
+        step: Trace,
+        hyper: Dict[str, Trace],
+    ) -> Tuple[Trace, ...]:
+        """See `FusedOptimizer`"""
+        beta1 = hyper["beta1"]
+        beta2 = hyper["beta2"]
+        m = beta1 * state["exp_avg"] + (1.0 - beta1) * grad
+        v = beta2 * state["exp_avg_sq"] + (1.0 - beta2) * grad * grad
+        # beta ** step == exp(step * log(beta))
+        m_hat = m / (1.0 - (step * hyper["log_beta1"]).exp())
+        v_hat = v / (1.0 - (step * hyper["log_beta2"]).exp())
+        value = value - hyper["lr"] * m_hat / (v_hat.sqrt() + hyper["eps"])
+        return value, m, v
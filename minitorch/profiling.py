@@ -0,0 +1,275 @@
+"""Profiler for functions and backend kernels.
+
+While a `profiler` is active, `Function.apply`, `Function._backward`,
+`ScalarFunction.apply`, `ScalarFunction._backward` and every
+`TensorBackend` kernel report an `Event` to it. When none is active, each
+function hook is a single check of the module attribute `active`, and
+kernels run without any wrapper (see `capture.instrument`). ::
+
+    with minitorch.profiler() as prof:
+        loss = model.forward(x).sum()
+        loss.backward()
+    print(prof.table())
+    prof.export_chrome_trace("trace.json")
+
+Function events include the kernels they run, so their bytes and FLOPs
+are the totals of those kernels.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import minitorch
+
+from . import capture
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class Event:
+    """One profiled call.
+
+    Attributes
+    ----------
+        name : function or kernel name
+        category : `"forward"`, `"backward"`, `"scalar"`, `"scalar_backward"`
+            or `"kernel"`
+        shapes : shapes of the tensor arguments
+        start : start time in ns
+        duration : wall time in ns
+        thread : id of the calling thread
+        elements : elements of the largest tensor involved
+        bytes : bytes of newly allocated outputs
+        flops : estimated floating point operations
+
+    """
+
+    name: str
+    category: str
+    shapes: str
+    start: int
+    duration: int
+    thread: int
+    elements: int
+    bytes: int
+    flops: int
+
+
+@dataclass
+class OpStats:
+    """Totals of the events with one name, category and shapes"""
+
+    name: str
+    category: str
+    shapes: str
+    calls: int = 0
+    time: int = 0
+    elements: int = 0
+    bytes: int = 0
+    flops: int = 0
+
+
+def _tensors(value: Any) -> Iterator[Any]:
+    if isinstance(value, minitorch.Tensor):
+        yield value
+    elif isinstance(value, (tuple, list)):
+        for v in value:
+            yield from _tensors(v)
+
+
+def _shapes(args: Tuple[Any, ...]) -> str:
+    return ", ".join("x".join(map(str, t.shape)) for t in _tensors(args))
+
+
+class profiler:
+    """Context manager that collects an `Event` per function and kernel call.
+
+    Only one profiler can be active at a time; it sees every thread.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[Event] = []
+        self.bytes = 0
+        self.flops = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> profiler:
+        global active
+        assert active is None, "A profiler is already active"
+        active = self
+        capture.instrument(True)
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        global active
+        active = None
+        capture.instrument(False)
+
+    def _add(self, event: Event) -> None:
+        with self._lock:
+            self.events.append(event)
+            # Tensor functions report the totals of their kernels instead.
+            if event.category not in ("forward", "backward"):
+                self.bytes += event.bytes
+                self.flops += event.flops
+
+    def function(
+        self, category: str, name: str, fn: Callable[..., Any], args: Tuple[Any, ...]
+    ) -> Any:
+        """Call `fn(*args)` and record it as a function event"""
+        scalar = category.startswith("scalar")
+        bytes0, flops0 = self.bytes, self.flops
+        start = time.perf_counter_ns()
+        out = fn(*args)
+        duration = time.perf_counter_ns() - start
+        sizes = [t.size for t in _tensors((args, out))]
+        self._add(
+            Event(
+                name,
+                category,
+                _shapes(args),
+                start,
+                duration,
+                threading.get_ident(),
+                max(sizes, default=1),
+                self.bytes - bytes0,
+                1 if scalar else self.flops - flops0,
+            )
+        )
+        return out
+
+    def kernel(
+        self,
+        name: str,
+        flops: int,
+        fn: Callable[..., Any],
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+    ) -> Any:
+        """Call the kernel `fn(*args, **kwargs)` and record it.
+
+        `flops` is the estimate per element of the largest tensor, except
+        for `matrix_multiply`, which counts `2 * M * N * K`.
+        """
+        start = time.perf_counter_ns()
+        out = fn(*args, **kwargs)
+        duration = time.perf_counter_ns() - start
+        outs = list(_tensors(out))
+        new = "out" not in kwargs and not any(out is a for a in args)
+        elements = max(t.size for t in [*_tensors(args), *outs])
+        if name == "matrix_multiply":
+            count = 2 * outs[0].size * args[0].shape[-1]
+        else:
+            count = flops * elements
+        self._add(
+            Event(
+                name,
+                "kernel",
+                _shapes(args),
+                start,
+                duration,
+                threading.get_ident(),
+                elements,
+                sum(t.size * 8 for t in outs) if new else 0,
+                count,
+            )
+        )
+        return out
+
+    def stats(self) -> List[OpStats]:
+        """Totals per name, category and shapes, slowest first"""
+        totals: Dict[Tuple[str, str, str], OpStats] = {}
+        for e in self.events:
+            key = (e.name, e.category, e.shapes)
+            if key not in totals:
+                totals[key] = OpStats(e.name, e.category, e.shapes)
+            s = totals[key]
+            s.calls += 1
+            s.time += e.duration
+            s.elements += e.elements
+            s.bytes += e.bytes
+            s.flops += e.flops
+        return sorted(totals.values(), key=lambda s: s.time, reverse=True)
+
+    def table(self, limit: Optional[int] = None) -> str:
+        """Format `stats` as a text table.
+
+        Args:
+        ----
+            limit : number of rows to keep
+
+        Returns:
+        -------
+            One row per op and shape, slowest first
+
+        """
+        rows = [
+            (
+                s.name,
+                s.category,
+                s.shapes,
+                str(s.calls),
+                f"{s.time / 1e6:.3f}",
+                f"{s.time / 1e3 / s.calls:.1f}",
+                str(s.elements),
+                str(s.bytes),
+                str(s.flops),
+            )
+            for s in self.stats()[:limit]
+        ]
+        header = (
+            "name",
+            "category",
+            "shapes",
+            "calls",
+            "total ms",
+            "avg us",
+            "elements",
+            "bytes",
+            "flops",
+        )
+        widths = [max(len(r[i]) for r in [header, *rows]) for i in range(len(header))]
+        lines = [
+            "  ".join(c.ljust(w) for c, w in zip(r, widths)) for r in [header, *rows]
+        ]
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Write the events as a Chrome trace, for chrome://tracing or Perfetto.
+
+        Args:
+        ----
+            path : file to write
+
+        """
+        events = [
+            {
+                "name": e.name,
+                "cat": e.category,
+                "ph": "X",
+                "ts": e.start / 1e3,
+                "dur": e.duration / 1e3,
+                "pid": 0,
+                "tid": e.thread,
+                "args": {
+                    "shapes": e.shapes,
+                    "elements": e.elements,
+                    "bytes": e.bytes,
+                    "flops": e.flops,
+                },
+            }
+            for e in self.events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events}, f)
+
+
+# The profiler collecting events, if any. Hooks check this first.
+active: Optional[profiler] = None
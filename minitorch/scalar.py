@@ -172,18 +172,25 @@ class Scalar:
         variables = self.parents
         return zipWith(lambda var, partial: (var, partial), variables, derivatives)
 
-    def backward(self, d_output: Optional[float] = None) -> None:
+    def backward(
+        self,
+        d_output: Optional[float] = None,
+        retain_graph: bool = False,
+        num_threads: int = 1,
+    ) -> None:
         """Calls autodiff to fill in the derivatives for the history of this object.
 
         Args:
         ----
             d_output (number, opt): starting derivative to backpropagate through the model
                                    (typically left out, and assumed to be 1.0).
+            retain_graph (bool, opt): keep saved values to allow another backward.
+            num_threads (int, opt): threads for independent branches of the graph.
 
         """
         if d_output is None:
             d_output = 1.0
-        backpropagate(self, d_output)
+        backpropagate(self, d_output, retain_graph, num_threads)
 
 
 def derivative_check(f: Any, *scalars: Scalar) -> None:
@@ -4,8 +4,8 @@ from typing import TYPE_CHECKING
 
 import minitorch
 
-from . import operators
-from .autodiff import Context
+from . import operators, profiling
+from .autodiff import NO_GRAD_CONTEXT, Context, is_grad_enabled
 
 if TYPE_CHECKING:
     from typing import Tuple
@@ -30,6 +30,14 @@ class ScalarFunction:
 
     @classmethod
     def _backward(cls, ctx: Context, d_out: float) -> Tuple[float, ...]:
+        if profiling.active is not None:
+            return profiling.active.function(
+                "scalar_backward", cls.__name__, cls._run_backward, (ctx, d_out)
+            )
+        return cls._run_backward(ctx, d_out)
+
+    @classmethod
+    def _run_backward(cls, ctx: Context, d_out: float) -> Tuple[float, ...]:
         return wrap_tuple(cls.backward(ctx, d_out))  # type: ignore
 
     @classmethod
@@ -39,6 +47,22 @@ class ScalarFunction:
     @classmethod
     def apply(cls, *vals: ScalarLike) -> Scalar:
         """Apply the function to inputs"""
+        if profiling.active is not None:
+            return profiling.active.function("scalar", cls.__name__, cls._apply, vals)
+        return cls._apply(*vals)
+
+    @classmethod
+    def _apply(cls, *vals: ScalarLike) -> Scalar:
+        if not is_grad_enabled():
+            c = cls._forward(
+                NO_GRAD_CONTEXT,
+                *[
+                    v.data if isinstance(v, minitorch.scalar.Scalar) else v
+                    for v in vals
+                ],
+            )
+            return minitorch.scalar.Scalar(c, None)
+
         raw_vals = []
         scalars = []
         for v in vals:
@@ -9,7 +9,9 @@ import numpy as np
 
 from . import operators
 from .autodiff import Context, Variable, backpropagate
-from .tensor_data import TensorData
+from .capture import active_tape
+from .memory_pool import storage_pool
+from .tensor_data import IndexingError, TensorData
 
 # Comment these out if not yet implemented
 from .tensor_functions import (
@@ -17,6 +19,7 @@ from .tensor_functions import (
     LT,
     Add,
     All,
+    BroadcastTo,
     Copy,
     Exp,
     Inv,
@@ -28,8 +31,12 @@ from .tensor_functions import (
     Permute,
     ReLU,
     Sigmoid,
+    Slice,
+    Squeeze,
     Sum,
+    Unsqueeze,
     View,
+    sum_to_shape,
 )
 
 if TYPE_CHECKING:
@@ -97,13 +104,32 @@ class Tensor:
     def __repr__(self) -> str:
         return self._tensor.to_string()
 
-    def __getitem__(self, key: Union[int, UserIndex]) -> float:
-        key2 = (key,) if isinstance(key, int) else key
-        return self._tensor.get(key2)
+    def __getitem__(self, key: Union[int, slice, Sequence[Union[int, slice]]]) -> Any:
+        """A float when every dimension gets an int index, otherwise a view.
+
+        Slices take `start:stop:step` with a positive step. Views share
+        storage with this tensor and are differentiable.
+        """
+        key2 = tuple(key) if isinstance(key, (tuple, list)) else (key,)
+        if len(key2) == self.dims and not any(isinstance(k, slice) for k in key2):
+            return self._tensor.get(key2)
+        if len(key2) > self.dims:
+            raise IndexingError(f"Too many indices {key} for shape {self.shape}.")
+        spec = []
+        for k, size in zip(key2, self.shape):
+            if isinstance(k, slice):
+                spec.append([*k.indices(size), 0])
+            else:
+                spec.append([int(k), 0, 0, 1])
+        data = [float(v) for row in spec for v in row]
+        spec_t = Tensor.make(data, (len(spec), 4), backend=self.backend)
+        spec_t.requires_grad_(True)
+        return Slice.apply(self, spec_t)
 
     def __setitem__(self, key: Union[int, UserIndex], val: float) -> None:
         key2 = (key,) if isinstance(key, int) else key
         self._tensor.set(key2, val)
+        self._tensor.version.value += 1
 
     def __add__(self, b: TensorLike) -> Tensor:
         return Add.apply(self, self._ensure_tensor(b, True))
@@ -211,12 +237,90 @@ class Tensor:
         return Permute.apply(self, perm)
 
     def view(self, *shape: int) -> Tensor:
-        """Function to reshape tensor"""
+        """Function to reshape tensor. Shares storage when the strides allow
+        it and copies otherwise; see `copy_stats`.
+        """
         data = [float(d) for d in shape]
         new_shape = Tensor.make(data, (len(data),), backend=self.backend)
         new_shape.requires_grad_(True)
         return View.apply(self, new_shape)
 
+    def reshape(self, *shape: int) -> Tensor:
+        """Same as `view`"""
+        return self.view(*shape)
+
+    # In-place operations. These write into this tensor's storage and are
+    # not recorded for autodiff; the version counter lets backward detect
+    # a write to a tensor that a `Function` saved.
+
+    def add_(self, b: TensorLike) -> Tensor:
+        """In-place addition `self += b`, where `b` broadcasts to `self`"""
+        self.f.add_zip(self, self._ensure_tensor(b), self)
+        self._tensor.version.value += 1
+        return self
+
+    def sub_(self, b: TensorLike) -> Tensor:
+        """In-place subtraction `self -= b`, where `b` broadcasts to `self`"""
+        if isinstance(b, (int, float)):
+            return self.add_(-b)
+        return self.add_(b.f.neg_map(b))
+
+    def mul_(self, b: TensorLike) -> Tensor:
+        """In-place multiplication `self *= b`, where `b` broadcasts to `self`"""
+        self.f.mul_zip(self, self._ensure_tensor(b), self)
+        self._tensor.version.value += 1
+        return self
+
+    def fill_(self, value: float) -> Tensor:
+        """Set every element to `value`"""
+        self.f.id_map(self._ensure_tensor(value), self)
+        self._tensor.version.value += 1
+        return self
+
+    def copy_(self, src: Tensor) -> Tensor:
+        """Copy the values of `src`, which broadcasts to `self`, into `self`"""
+        self.f.id_map(self._ensure_tensor(src), self)
+        self._tensor.version.value += 1
+        return self
+
+    @property
+    def _version(self) -> int:
+        """Number of in-place writes made to this tensor's storage"""
+        return self._tensor.version.value
+
+    def narrow(self, dim: int, start: int, length: int) -> Tensor:
+        """View of `length` elements of `dim` beginning at `start`"""
+        key = [slice(None)] * dim + [slice(start, start + length)]
+        return self[key]
+
+    def transpose(self, dim0: int, dim1: int) -> Tensor:
+        """View with dimensions `dim0` and `dim1` swapped"""
+        order = list(range(self.dims))
+        order[dim0], order[dim1] = order[dim1], order[dim0]
+        return self.permute(*order)
+
+    def broadcast_to(self, *shape: int) -> Tensor:
+        """View expanded to `shape` without copying; broadcast dims get stride 0"""
+        data = [float(d) for d in shape]
+        shape_t = Tensor.make(data, (len(data),), backend=self.backend)
+        shape_t.requires_grad_(True)
+        return BroadcastTo.apply(self, shape_t)
+
+    def unsqueeze(self, dim: int) -> Tensor:
+        """View with a new dimension of size 1 at `dim`"""
+        return Unsqueeze.apply(self, self._ensure_tensor(dim, True))
+
+    def squeeze(self, dim: Optional[int] = None) -> Tensor:
+        """View without dimension `dim`, or all dimensions, of size 1"""
+        if dim is not None:
+            if dim < 0:
+                dim += self.dims
+            if not 0 <= dim < self.dims:
+                raise IndexingError(f"Dim {dim} out of range for {self.shape}.")
+        return Squeeze.apply(
+            self, self._ensure_tensor(-1 if dim is None else dim, True)
+        )
+
     def requires_grad_(self, x: bool) -> None:
         """Initialize gradient history"""
         self.history = History()
@@ -291,30 +395,26 @@ class Tensor:
         if self.shape == other.shape:
             return other
 
-        # Case 2: Backward is a smaller than self. Broadcast up.
+        # Case 2: Backward is a smaller than self. Broadcast up with a
+        # zero-stride view rather than a copy.
         true_shape = TensorData.shape_broadcast(self.shape, other.shape)
-        buf = self.zeros(true_shape)
-        self.backend.id_map(other, buf)
+        buf = other
+        if other.shape != true_shape:
+            buf = other._new(other._tensor.broadcast_to(true_shape))
         if self.shape == true_shape:
             return buf
 
         # Case 3: Still different, reduce extra dims.
-        out = buf
-        orig_shape = [1] * (len(out.shape) - len(self.shape)) + list(self.shape)
-        for dim, shape in enumerate(out.shape):
-            if orig_shape[dim] == 1 and shape != 1:
-                out = self.backend.add_reduce(out, dim)
-        assert out.size == self.size, f"{out.shape} {self.shape}"
-        # START CODE CHANGE (2021)
-        return Tensor.make(out._tensor._storage, self.shape, backend=self.backend)
-        # END CODE CHANGE (2021)
+        return sum_to_shape(buf, self.shape)
 
     def zeros(self, shape: Optional[UserShape] = None) -> Tensor:
-        """Create all zeros"""
+        """Create all zeros, with storage from the `storage_pool`"""
 
         def zero(shape: UserShape) -> Tensor:
             return Tensor.make(
-                [0.0] * int(operators.prod(shape)), shape, backend=self.backend
+                storage_pool.zeros(int(operators.prod(shape))),
+                shape,
+                backend=self.backend,
             )
 
         if shape is None:
@@ -344,17 +444,23 @@ class Tensor:
 
         """
         assert self.is_leaf(), "Only leaf variables can have derivatives."
-        if self.grad is None:
-            self.grad = Tensor.make(
-                [0.0] * self.size,
-                self.shape,
-                backend=self.backend,
-            )
-        self.grad += x
+        if self.grad is not None:
+            # Accumulate into the existing buffer, without recording history.
+            self.grad.add_(x)
+            return
+        # The first derivative is copied rather than added to zeros, so that
+        # a captured step overwrites the buffer on every replay.
+        self.grad = self.zeros()
+        self.grad.copy_(x)
+        tape = active_tape()
+        if tape is not None:
+            # Restore the gradient tensor, which replays write into.
+            tape.record(setattr, self, "grad", self.grad)
 
     def zero_grad_(self) -> None:
-        """Set gradient to None"""
-        self.grad = None
+        """Zero the gradient in place, keeping its buffer"""
+        if self.grad is not None:
+            self.grad.fill_(0.0)
 
     def is_leaf(self) -> bool:
         """True if this variable created by the user (no `last_fn`)"""
@@ -378,9 +484,23 @@ class Tensor:
             for inp, d_in in zip(h.inputs, x)
         ]
 
-    def backward(self, grad_output: Optional[Tensor] = None) -> None:
-        """Calculate gradient"""
+    def backward(
+        self,
+        grad_output: Optional[Tensor] = None,
+        retain_graph: bool = False,
+        num_threads: int = 1,
+    ) -> None:
+        """Calculate gradient
+
+        Args:
+        ----
+            grad_output : derivative of the output, required unless the
+                tensor has a single element
+            retain_graph : keep saved tensors to allow another backward
+            num_threads : threads for independent branches of the graph
+
+        """
         if grad_output is None:
             assert self.shape == (1,), "Must provide grad_output if non-scalar"
             grad_output = Tensor.make([1.0], (1,), backend=self.backend)
-        backpropagate(self, grad_output)
+        backpropagate(self, grad_output, retain_graph, num_threads)
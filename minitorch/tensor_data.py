@@ -63,11 +63,11 @@ def to_index(ordinal: int, shape: Shape, out_index: OutIndex) -> None:
         out_index : return index corresponding to position.
 
     """
-    i = len(shape) - 1
-    for s in reversed(shape):
-        out_index[i] = ordinal % s
-        i -= 1
-        ordinal = ordinal // s
+    cur_ord = ordinal + 0
+    for i in range(len(shape) - 1, -1, -1):
+        sh = shape[i]
+        out_index[i] = int(cur_ord % sh)
+        cur_ord = cur_ord // sh
 
 
 def broadcast_index(
@@ -91,16 +91,69 @@ def broadcast_index(
         None
 
     """
-    new_shape = [0] * (len(big_shape) - len(shape))
-    for s in shape:
-        new_shape.append(s)
+    offset = len(big_shape) - len(shape)
     for i in range(len(out_index)):
-        if new_shape[i] < big_shape[i]:
+        if i < offset or shape[i - offset] < big_shape[i]:
             out_index[i] = 0
         else:
             out_index[i] = big_index[i]
 
 
+def broadcast_strides(big_shape: Shape, shape: Shape, strides: Strides) -> Strides:
+    """Lay the `strides` of a tensor of `shape` over `big_shape`.
+
+    Missing leading dimensions and size-1 dimensions that broadcast get
+    stride 0, so walking `big_shape` moves the position of the smaller
+    tensor without any per-element `broadcast_index`.
+
+    Args:
+    ----
+        big_shape : tensor shape being iterated
+        shape : tensor shape of smaller tensor
+        strides : tensor strides of smaller tensor
+
+    Returns:
+    -------
+        Strides with one entry per dimension of `big_shape`
+
+    """
+    out_strides = np.zeros(len(big_shape), np.int64)
+    offset = len(big_shape) - len(shape)
+    for i in range(len(shape)):
+        if shape[i] != 1:
+            out_strides[i + offset] = strides[i]
+    return out_strides
+
+
+def advance_index(
+    index: OutIndex, shape: Shape, strides: Strides, positions: OutIndex
+) -> None:
+    """Step `index` to the next element of `shape` in row-major order.
+
+    This is an odometer: the last dimension ticks forward, and when it
+    wraps it carries into the one before it. Every operand's storage
+    position is moved by stride increments as the index changes, so no
+    division, modulo or full `index_to_position` is needed per element.
+
+    Args:
+    ----
+        index : current index into `shape`, updated in place
+        shape : tensor shape being iterated
+        strides : one row of (broadcast) strides per operand
+        positions : storage position of each operand, updated in place
+
+    """
+    for d in range(len(shape) - 1, -1, -1):
+        index[d] += 1
+        if index[d] < shape[d]:
+            for k in range(len(positions)):
+                positions[k] += strides[k][d]
+            return
+        index[d] = 0
+        for k in range(len(positions)):
+            positions[k] -= strides[k][d] * (shape[d] - 1)
+
+
 def shape_broadcast(shape1: UserShape, shape2: UserShape) -> UserShape:
     """Broadcast two shapes to create a new union shape.
 
@@ -143,6 +196,52 @@ def shape_broadcast(shape1: UserShape, shape2: UserShape) -> UserShape:
     return tuple(reversed(new_shape))
 
 
+def view_strides(
+    shape: UserShape, strides: UserStrides, new_shape: UserShape
+) -> Optional[UserStrides]:
+    """Strides that read the same elements, in row-major order, as
+    `new_shape` over the existing storage, if there are any.
+
+    Follows NumPy's no-copy reshape: size-1 dimensions are dropped, then
+    runs of old and new dimensions with equal products are matched up. A
+    run of old dimensions can be merged or split only if it is itself
+    contiguous, i.e. each stride equals the next one times its size.
+
+    Args:
+    ----
+        shape : current shape
+        strides : current strides
+        new_shape : requested shape, with the same number of elements
+
+    Returns:
+    -------
+        Strides for `new_shape`, or None if the data must be copied
+
+    """
+    old = [(d, s) for d, s in zip(shape, strides) if d != 1]
+    new_strides = [1] * len(new_shape)
+    oi, oj, ni, nj = 0, 1, 0, 1
+    while ni < len(new_shape) and oi < len(old):
+        n_size = new_shape[ni]
+        o_size = old[oi][0]
+        while n_size != o_size:
+            if n_size < o_size:
+                n_size *= new_shape[nj]
+                nj += 1
+            else:
+                o_size *= old[oj][0]
+                oj += 1
+        for k in range(oi, oj - 1):
+            if old[k][1] != old[k + 1][0] * old[k + 1][1]:
+                return None
+        new_strides[nj - 1] = old[oj - 1][1]
+        for k in range(nj - 1, ni, -1):
+            new_strides[k - 1] = new_strides[k] * new_shape[k]
+        ni, nj = nj, nj + 1
+        oi, oj = oj, oj + 1
+    return tuple(int(s) for s in new_strides)
+
+
 def strides_from_shape(shape: UserShape) -> UserStrides:
     """Return a contiguous stride for a shape"""
     layout = [1]
@@ -153,6 +252,104 @@ def strides_from_shape(shape: UserShape) -> UserStrides:
     return tuple(reversed(layout[:-1]))
 
 
+def strides_aligned(
+    shape1: Shape, strides1: Strides, shape2: Shape, strides2: Strides
+) -> bool:
+    """Check whether two layouts visit storage in the same order.
+
+    When this holds, position `i` of one storage corresponds to position `i`
+    of the other, so kernels can skip index arithmetic entirely.
+
+    Args:
+    ----
+        shape1 : first tensor shape
+        strides1 : first tensor strides
+        shape2 : second tensor shape
+        strides2 : second tensor strides
+
+    Returns:
+    -------
+        True if both shapes and strides are identical
+
+    """
+    if len(shape1) != len(shape2):
+        return False
+    for i in range(len(shape1)):
+        if shape1[i] != shape2[i] or strides1[i] != strides2[i]:
+            return False
+    return True
+
+
+def is_dense(shape: Shape, strides: Strides, storage_size: int) -> bool:
+    """Check whether a layout visits every storage position exactly once.
+
+    This holds for any permutation of a packed row-major layout over a
+    storage of exactly its size, but not for slices, which skip
+    positions, or broadcast views, which repeat them.
+
+    Args:
+    ----
+        shape : tensor shape
+        strides : tensor strides
+        storage_size : number of elements in the storage
+
+    Returns:
+    -------
+        True if positions `0 .. storage_size - 1` are each visited once
+
+    """
+    size = 1
+    for i in range(len(shape)):
+        size *= shape[i]
+    if size != storage_size:
+        return False
+    expected = 1
+    for _ in range(len(shape)):
+        found = False
+        for i in range(len(shape)):
+            if shape[i] != 1 and strides[i] == expected:
+                expected *= shape[i]
+                found = True
+                break
+        if not found:
+            break
+    return expected == size
+
+
+def is_row_major(shape: Shape, strides: Strides) -> bool:
+    """Check whether `strides` are the packed row-major strides of `shape`.
+
+    Args:
+    ----
+        shape : tensor shape
+        strides : tensor strides
+
+    Returns:
+    -------
+        True if the layout equals `strides_from_shape(shape)`
+
+    """
+    expected = 1
+    for i in range(len(shape) - 1, -1, -1):
+        if shape[i] != 1 and strides[i] != expected:
+            return False
+        expected *= shape[i]
+    return True
+
+
+class VersionCounter:
+    """Number of in-place writes made to a storage.
+
+    Shared by every `TensorData` that views the same storage, so a write
+    through any of them is seen by all.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+
 class TensorData:
     _storage: Storage
     _strides: Strides
@@ -160,13 +357,16 @@ class TensorData:
     strides: UserStrides
     shape: UserShape
     dims: int
+    version: VersionCounter
 
     def __init__(
         self,
         storage: Union[Sequence[float], Storage],
         shape: UserShape,
         strides: Optional[UserStrides] = None,
+        version: Optional[VersionCounter] = None,
     ):
+        self.version = version if version is not None else VersionCounter()
         if isinstance(storage, np.ndarray):
             self._storage = storage
         else:
@@ -183,9 +383,10 @@ class TensorData:
         self._shape = array(shape)
         self.strides = strides
         self.dims = len(strides)
-        self.size = len(storage)
+        self.size = int(np.prod(shape, dtype=np.int64))
         self.shape = shape
-        assert len(self._storage) == self.size
+        last = sum((d - 1) * s for d, s in zip(shape, strides))
+        assert self.size == 0 or last < len(self._storage), "Storage too small"
 
     def to_cuda_(self) -> None:  # pragma: no cover
         """Convert to cuda"""
@@ -193,19 +394,15 @@ class TensorData:
             self._storage = numba.cuda.to_device(self._storage)
 
     def is_contiguous(self) -> bool:
-        """Check that the layout is contiguous, i.e. outer dimensions have bigger strides than inner dimensions.
+        """Check that the layout is contiguous, i.e. packed row-major from the
+        start of the storage, so that it can be reinterpreted with a new shape.
 
         Returns
         -------
             bool : True if contiguous
 
         """
-        last = 1e9
-        for stride in self._strides:
-            if stride > last:
-                return False
-            last = stride
-        return True
+        return is_row_major(self._shape, self._strides)
 
     @staticmethod
     def shape_broadcast(shape_a: UserShape, shape_b: UserShape) -> UserShape:
@@ -285,7 +482,125 @@ class TensorData:
         for i in range(len(order)):
             new_shape.append(self.shape[order[i]])
 
-        return TensorData(self._storage, tuple(new_shape), tuple(new_strides))
+        return TensorData(
+            self._storage, tuple(new_shape), tuple(new_strides), self.version
+        )
+
+    def transpose(self, dim0: int, dim1: int) -> TensorData:
+        """Swap two dimensions. See `permute`."""
+        order = list(range(self.dims))
+        order[dim0], order[dim1] = order[dim1], order[dim0]
+        return self.permute(*order)
+
+    def as_strided(
+        self, offset: int, shape: UserShape, strides: UserStrides
+    ) -> TensorData:
+        """View the same storage, starting `offset` elements in, with a
+        new shape and strides. No data is copied.
+
+        Args:
+        ----
+            offset : position of the first element in this storage
+            shape : shape of the view
+            strides : strides of the view
+
+        Returns:
+        -------
+            New `TensorData` sharing this storage and version counter
+
+        """
+        storage = self._storage[offset:] if offset else self._storage
+        return TensorData(storage, tuple(shape), tuple(strides), self.version)
+
+    def slice(self, key: Sequence[Union[int, slice]]) -> TensorData:
+        """View of the elements selected by `key`, one entry per leading
+        dimension. An int selects a single index and drops the dimension;
+        a slice keeps it. Missing trailing entries select everything.
+
+        Args:
+        ----
+            key : ints and slices with positive steps
+
+        Returns:
+        -------
+            New `TensorData` sharing this storage
+
+        Raises:
+        ------
+            IndexingError : if an index is out of range, a step is not
+                positive or the selection is empty
+
+        """
+        if len(key) > self.dims:
+            raise IndexingError(f"Too many indices {key} for shape {self.shape}.")
+        offset = 0
+        shape = []
+        strides = []
+        for d in range(self.dims):
+            size, stride = self.shape[d], self.strides[d]
+            k = key[d] if d < len(key) else slice(None)
+            if isinstance(k, slice):
+                start, stop, step = k.indices(size)
+                if step <= 0:
+                    raise IndexingError(f"Slice step must be positive, got {k}.")
+                length = len(range(start, stop, step))
+                if length == 0:
+                    raise IndexingError(f"Slice {k} of size {size} is empty.")
+                offset += start * stride
+                shape.append(length)
+                strides.append(stride * step)
+            else:
+                i = int(k) + size if int(k) < 0 else int(k)
+                if not 0 <= i < size:
+                    raise IndexingError(f"Index {k} out of range {self.shape}.")
+                offset += i * stride
+        return self.as_strided(offset, shape, strides)
+
+    def broadcast_to(self, shape: UserShape) -> TensorData:
+        """View expanded to `shape` by giving broadcast dimensions stride 0.
+
+        Raises
+        ------
+            IndexingError : if this shape does not broadcast to `shape`
+
+        """
+        if shape_broadcast(self.shape, shape) != tuple(shape):
+            raise IndexingError(f"Shape {self.shape} cannot broadcast to {shape}.")
+        strides = broadcast_strides(array(shape), self._shape, self._strides)
+        return self.as_strided(0, shape, strides.tolist())
+
+    def unsqueeze(self, dim: int) -> TensorData:
+        """View with a new dimension of size 1 inserted at `dim`."""
+        if dim < 0:
+            dim += self.dims + 1
+        if not 0 <= dim <= self.dims:
+            raise IndexingError(f"Dim {dim} out of range for {self.shape}.")
+        stride = self.strides[dim] * self.shape[dim] if dim < self.dims else 1
+        shape = self.shape[:dim] + (1,) + self.shape[dim:]
+        strides = self.strides[:dim] + (stride,) + self.strides[dim:]
+        return self.as_strided(0, shape, strides)
+
+    def squeeze(self, dim: Optional[int] = None) -> TensorData:
+        """View without dimension `dim`, or every dimension, of size 1.
+
+        A dimension that is not of size 1 is left in place. At least one
+        dimension is always kept.
+        """
+        if dim is not None:
+            if dim < 0:
+                dim += self.dims
+            if not 0 <= dim < self.dims:
+                raise IndexingError(f"Dim {dim} out of range for {self.shape}.")
+        keep = [
+            d
+            for d in range(self.dims)
+            if self.shape[d] != 1 or (dim is not None and d != dim)
+        ] or [self.dims - 1]
+        return self.as_strided(
+            0,
+            [self.shape[d] for d in keep],
+            [self.strides[d] for d in keep],
+        )
 
     def to_string(self) -> str:
         """Convert to string"""
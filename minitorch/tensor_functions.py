@@ -3,20 +3,32 @@
 from __future__ import annotations
 
 import random
+import types
+import warnings
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 import numpy as np
 
 import minitorch
-from minitorch.tensor_data import TensorData
 
-from . import operators
-from .autodiff import Context
+from . import operators, profiling
+from .autodiff import (
+    NO_GRAD_CONTEXT,
+    Context,
+    backpropagate,
+    enable_grad,
+    is_grad_enabled,
+    no_grad,
+)
+from .memory_pool import storage_pool
+from .tensor_data import IndexingError, strides_from_shape, view_strides
 from .tensor_ops import SimpleBackend, TensorBackend
 
 if TYPE_CHECKING:
-    from typing import Any, List, Tuple
+    from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
 
+    from .fusion import Program
     from .tensor import Tensor
     from .tensor_data import UserIndex, UserShape
 
@@ -32,6 +44,15 @@ def wrap_tuple(x: Any) -> tuple:  # type: ignore
 class Function:
     @classmethod
     def _backward(cls, ctx: Context, grad_out: Tensor) -> Tuple[Tensor, ...]:
+        if profiling.active is not None:
+            return profiling.active.function(
+                "backward", cls.__name__, cls._run_backward, (ctx, grad_out)
+            )
+        return cls._run_backward(ctx, grad_out)
+
+    @classmethod
+    def _run_backward(cls, ctx: Context, grad_out: Tensor) -> Tuple[Tensor, ...]:
+        ctx.check_saved_versions()
         return wrap_tuple(cls.backward(ctx, grad_out))  # type: ignore
 
     @classmethod
@@ -41,6 +62,16 @@ class Function:
     @classmethod
     def apply(cls, *vals: Tensor) -> Tensor:
         """Call the forward function and track history"""
+        if profiling.active is not None:
+            return profiling.active.function("forward", cls.__name__, cls._apply, vals)
+        return cls._apply(*vals)
+
+    @classmethod
+    def _apply(cls, *vals: Tensor) -> Tensor:
+        if not is_grad_enabled():
+            c = cls._forward(NO_GRAD_CONTEXT, *vals)
+            return minitorch.Tensor(c._tensor, backend=c.backend)
+
         raw_vals = []
         need_grad = False
         for v in vals:
@@ -226,21 +257,18 @@ class Permute(Function):
     @staticmethod
     def forward(ctx: Context, a: Tensor, permutation: Tensor) -> Tensor:
         """Permute function"""
-        ctx.save_for_backward(a.shape)
         order = [int(d) for d in permutation.to_numpy()]
-        data: TensorData = a._tensor.permute(*order)
-        return minitorch.Tensor.make(data._storage, data.shape, backend=a.backend)
+        ctx.save_for_backward(order)
+        return a._new(a._tensor.permute(*order))
 
     @staticmethod
     def backward(ctx: Context, g_output: Tensor) -> Tuple[Tensor, float]:
         """Derivative of permute function"""
-        (original,) = ctx.saved_values
-        return (
-            minitorch.Tensor.make(
-                g_output._tensor._storage, original, backend=g_output.backend
-            ),
-            0.0,
-        )
+        (order,) = ctx.saved_values
+        inverse = [0] * len(order)
+        for i, d in enumerate(order):
+            inverse[d] = i
+        return g_output._new(g_output._tensor.permute(*inverse)), 0.0
 
 
 class All(Function):
@@ -251,30 +279,94 @@ class All(Function):
         if dim > -1:
             return a.f.mul_reduce(a, dim_int)
         else:
-            return a.f.mul_reduce(a.contiguous().view(int(operators.prod(a.shape))), 0)
+            return a.f.mul_reduce(a.view(int(operators.prod(a.shape))), 0)
 
 
 class View(Function):
     @staticmethod
     def forward(ctx: Context, a: Tensor, shape: Tensor) -> Tensor:
-        """View function"""
+        """View function, copying only if the layout cannot be reinterpreted"""
         ctx.save_for_backward(a.shape)
-        assert a._tensor.is_contiguous(), "Must be contiguous to view"
-        shape2 = [int(shape[i]) for i in range(shape.size)]
-        return minitorch.Tensor.make(
-            a._tensor._storage, tuple(shape2), backend=a.backend
-        )
+        shape2 = tuple(int(shape[i]) for i in range(shape.size))
+        return reshape(a, shape2)
 
     @staticmethod
     def backward(ctx: Context, g_output: Tensor) -> Tuple[Tensor, float]:
         """Matrix Multiply backward (module 3)"""
         (original,) = ctx.saved_values
-        return (
-            minitorch.Tensor.make(
-                g_output._tensor._storage, original, backend=g_output.backend
-            ),
-            0.0,
-        )
+        return reshape(g_output, original), 0.0
+
+
+class Slice(Function):
+    @staticmethod
+    def forward(ctx: Context, a: Tensor, spec: Tensor) -> Tensor:
+        """Strided view of the elements selected by `spec`.
+
+        `spec` has one row `(start, stop, step, is_index)` per indexed
+        dimension; see `Tensor.__getitem__`.
+        """
+        key = slice_key(spec)
+        ctx.save_for_backward(a.shape, key)
+        return a._new(a._tensor.slice(key))
+
+    @staticmethod
+    def backward(ctx: Context, g_output: Tensor) -> Tuple[Tensor, float]:
+        """Scatter the gradient into the selected elements of zeros"""
+        shape, key = ctx.saved_values
+        grad = g_output.zeros(shape)
+        g_output.f.id_map(g_output, grad._new(grad._tensor.slice(key)))
+        return grad, 0.0
+
+
+class BroadcastTo(Function):
+    @staticmethod
+    def forward(ctx: Context, a: Tensor, shape: Tensor) -> Tensor:
+        """Zero-stride view of `a` expanded to `shape`"""
+        ctx.save_for_backward(a.shape)
+        shape2 = tuple(int(shape[i]) for i in range(shape.size))
+        return a._new(a._tensor.broadcast_to(shape2))
+
+    @staticmethod
+    def backward(ctx: Context, g_output: Tensor) -> Tuple[Tensor, float]:
+        """Sum the gradient over the broadcast dimensions"""
+        (shape,) = ctx.saved_values
+        return sum_to_shape(g_output, shape), 0.0
+
+
+class Unsqueeze(Function):
+    @staticmethod
+    def forward(ctx: Context, a: Tensor, dim: Tensor) -> Tensor:
+        """View with a new dimension of size 1"""
+        dim_int = int(dim.item())
+        dim_int = dim_int + a.dims + 1 if dim_int < 0 else dim_int
+        ctx.save_for_backward(dim_int)
+        return a._new(a._tensor.unsqueeze(dim_int))
+
+    @staticmethod
+    def backward(ctx: Context, g_output: Tensor) -> Tuple[Tensor, float]:
+        """Drop the added dimension again"""
+        (dim,) = ctx.saved_values
+        return g_output._new(g_output._tensor.squeeze(dim)), 0.0
+
+
+class Squeeze(Function):
+    @staticmethod
+    def forward(ctx: Context, a: Tensor, dim: Tensor) -> Tensor:
+        """View without size-1 dimensions; `dim` < 0 removes all of them"""
+        dim_int = int(dim.item())
+        ctx.save_for_backward(a.shape)
+        out = a._tensor.squeeze(dim_int if dim_int >= 0 else None)
+        return a._new(out)
+
+    @staticmethod
+    def backward(ctx: Context, g_output: Tensor) -> Tuple[Tensor, float]:
+        """Reinsert the removed dimensions"""
+        (shape,) = ctx.saved_values
+        grad = g_output._tensor
+        for d in range(len(shape)):
+            if d >= grad.dims or grad.shape[d] != shape[d]:
+                grad = grad.unsqueeze(d)
+        return g_output._new(grad), 0.0
 
 
 class Copy(Function):
@@ -302,9 +394,7 @@ class MatMul(Function):
         t1, t2 = ctx.saved_values
 
         def transpose(a: Tensor) -> Tensor:
-            order = list(range(a.dims))
-            order[-2], order[-1] = order[-1], order[-2]
-            return a._new(a._tensor.permute(*order))
+            return a._new(a._tensor.transpose(-2, -1))
 
         return (
             g_output.f.matrix_multiply(g_output, transpose(t2)),
@@ -312,6 +402,210 @@ class MatMul(Function):
         )
 
 
+class Fused(Function):
+    """Base of the functions built by `minitorch.fuse`.
+
+    Subclasses set `program`; forward and backward each run it as a
+    single elementwise kernel.
+    """
+
+    program: Program
+
+    @classmethod
+    def forward(cls, ctx: Context, *inputs: Tensor) -> Tensor:
+        """Fused elementwise forward"""
+        ctx.save_for_backward(*inputs)
+        return inputs[0].f.fused_map(cls.program)(*inputs)
+
+    @classmethod
+    def backward(cls, ctx: Context, g_output: Tensor) -> Tuple[Tensor, ...]:
+        """Fused elementwise backward; the trailing constants get none"""
+        inputs = ctx.saved_values
+        grads = g_output.f.fused_back(cls.program)(g_output, *inputs)
+        return grads + (0.0,) * len(cls.program.consts)
+
+
+class Checkpoint(Function):
+    """Base of the functions built by `minitorch.checkpoint`.
+
+    Subclasses set `fn` and `n_params`. The trailing `n_params` inputs are
+    the parameters `fn` reads; they are not passed to it, but give the
+    segment a history even when its other inputs are constants. The forward
+    runs `fn` without recording a graph, so only the inputs are saved; the
+    backward runs it again with the graph and backpropagates through that
+    copy.
+    """
+
+    fn: Callable[..., Tensor]
+    n_params: int = 0
+
+    @classmethod
+    def forward(cls, ctx: Context, *inputs: Tensor) -> Tensor:
+        """Run the segment without saving its activations"""
+        ctx.save_for_backward(*inputs)
+        with no_grad():
+            return cls.fn(*inputs[: len(inputs) - cls.n_params])
+
+    @classmethod
+    def backward(cls, ctx: Context, g_output: Tensor) -> Tuple[Tensor, ...]:
+        """Recompute the segment and backpropagate `g_output` through it"""
+        n = len(ctx.saved_values) - cls.n_params
+        inputs = [x.detach() for x in ctx.saved_values[:n]]
+        for x in inputs:
+            x.requires_grad_(True)
+        params = ctx.saved_values[n:]
+        # The parameters are leaves of the recomputed graph too. Their
+        # derivatives are returned rather than accumulated, so the outer
+        # backward adds them once. Saved values share storage with them.
+        slots = {id(p._tensor): i for i, p in enumerate(params)}
+        d_params: List[Optional[Tensor]] = [None] * len(params)
+
+        def accumulate(leaf: Tensor, d: Tensor) -> None:
+            i = slots.get(id(leaf._tensor))
+            if i is None:
+                leaf.accumulate_derivative(d)
+            else:
+                prev = d_params[i]
+                d_params[i] = d if prev is None else prev + d
+
+        with enable_grad():
+            out = cls.fn(*inputs)
+        backpropagate(out, g_output, accumulate=accumulate)
+        grads = [x.grad if x.grad is not None else x.zeros() for x in inputs]
+        grads += [d if d is not None else p.zeros() for p, d in zip(params, d_params)]
+        return tuple(grads)
+
+
+def checkpoint(
+    fn: Callable[..., Tensor], *inputs: Tensor, params: Sequence[Tensor] = ()
+) -> Tensor:
+    """Call `fn` without keeping the activations it saves for backward.
+
+    The segment runs again during backpropagation, when its gradient is
+    needed. This trades a second forward of the segment for its memory.
+    Parameters that `fn` reads must be listed in `params`, or they get no
+    gradient when all of `inputs` are constants.
+
+    Args:
+    ----
+        fn : function from tensors to a tensor
+        *inputs : tensors to call `fn` with
+        params : tensors that `fn` uses besides its inputs
+
+    Returns:
+    -------
+        `fn(*inputs)`
+
+    """
+    if not is_grad_enabled():
+        return fn(*inputs)
+    # Subclasses are kept on the function, or on the instance of a bound
+    # method, keyed by the function and the number of parameters.
+    bound = isinstance(fn, types.MethodType)
+    owner = fn.__self__ if bound else fn
+    key = (fn.__func__ if bound else None, len(params))
+    try:
+        segments = vars(owner).setdefault("_checkpoint_segments", {})
+    except TypeError:
+        segments = {}
+    if key not in segments:
+        name = getattr(fn, "__name__", "fn")
+        segments[key] = type(
+            f"Checkpoint_{name}",
+            (Checkpoint,),
+            {"fn": staticmethod(fn), "n_params": len(params)},
+        )
+    return segments[key].apply(*inputs, *params)
+
+
+@dataclass
+class CopyStats:
+    """Copies made by `view` because a layout could not be reinterpreted.
+
+    Attributes
+    ----------
+        view_copies : number of copies
+        elements : total number of elements copied
+        warn : also emit a `ViewCopyWarning` for every copy
+
+    """
+
+    view_copies: int = 0
+    elements: int = 0
+    warn: bool = False
+
+
+class ViewCopyWarning(UserWarning):
+    """Issued when `view` has to copy, if `copy_stats.warn` is set."""
+
+
+copy_stats = CopyStats()
+
+
+def reshape(a: Tensor, shape: UserShape) -> Tensor:
+    """`a` with a new shape, sharing storage whenever the strides allow.
+
+    Strides come from `view_strides`. Otherwise the data is copied into
+    a contiguous tensor and the copy is counted in `copy_stats`.
+
+    Args:
+    ----
+        a : tensor to reshape
+        shape : new shape with the same number of elements
+
+    Returns:
+    -------
+        Tensor of `shape`
+
+    Raises:
+    ------
+        IndexingError : if the number of elements differs
+
+    """
+    if operators.prod(shape) != a.size:
+        raise IndexingError(f"Cannot view shape {a.shape} as {shape}.")
+    strides = view_strides(a.shape, a._tensor.strides, shape)
+    if strides is None:
+        copy_stats.view_copies += 1
+        copy_stats.elements += a.size
+        if copy_stats.warn:
+            warnings.warn(
+                f"view of {a.shape} with strides {a._tensor.strides} as {shape} "
+                "copied the data",
+                ViewCopyWarning,
+                stacklevel=3,
+            )
+        a = a.f.id_map(a)
+        strides = strides_from_shape(shape)
+    return a._new(a._tensor.as_strided(0, shape, strides))
+
+
+def slice_key(spec: Tensor) -> List[Union[int, slice]]:
+    """Decode the `(start, stop, step, is_index)` rows built by
+    `Tensor.__getitem__` into ints and slices.
+    """
+    key: List[Union[int, slice]] = []
+    for start, stop, step, is_index in spec.to_numpy().astype(int).tolist():
+        key.append(start if is_index else slice(start, stop, step))
+    return key
+
+
+def sum_to_shape(g: Tensor, shape: UserShape) -> Tensor:
+    """Sum `g` down to `shape`, undoing a broadcast from `shape` to `g.shape`.
+
+    Args:
+    ----
+        g : gradient of the broadcast result
+        shape : shape before broadcasting
+
+    Returns:
+    -------
+        Tensor of `shape`
+
+    """
+    return g.f.sum_to_shape(g, shape)
+
+
 # Helpers for Constructing tensors
 def zeros(shape: UserShape, backend: TensorBackend = SimpleBackend) -> Tensor:
     """Produce a zero tensor of size `shape`.
@@ -327,7 +621,7 @@ def zeros(shape: UserShape, backend: TensorBackend = SimpleBackend) -> Tensor:
 
     """
     return minitorch.Tensor.make(
-        [0.0] * int(operators.prod(shape)), shape, backend=backend
+        storage_pool.zeros(int(operators.prod(shape))), shape, backend=backend
     )
 
 
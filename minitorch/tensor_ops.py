@@ -1,22 +1,32 @@
 from __future__ import annotations
 
-from numpy import array
-from typing import TYPE_CHECKING, Callable, Optional, Type
+from typing import TYPE_CHECKING, Callable, Optional, Sequence, Tuple, Type
 
 import numpy as np
 from typing_extensions import Protocol
 
 from . import operators
+from .capture import recorded, register
+from .fusion import run_program, run_program_back
 from .tensor_data import (
-    broadcast_index,
-    index_to_position,
+    IndexingError,
+    advance_index,
+    broadcast_strides,
+    is_dense,
+    is_row_major,
     shape_broadcast,
-    to_index,
+    strides_aligned,
 )
 
 if TYPE_CHECKING:
+    from typing import Any, Dict
+
+    from .fusion import Program
     from .tensor import Tensor
-    from .tensor_data import Shape, Storage, Strides
+    from .tensor_data import Shape, Storage, Strides, UserShape
+
+# Edge length of the square tiles used by the blocked matrix multiply.
+MATMUL_BLOCK = 32
 
 
 class MapProto(Protocol):
@@ -25,6 +35,18 @@ class MapProto(Protocol):
         ...
 
 
+class ZipProto(Protocol):
+    def __call__(self, a: Tensor, b: Tensor, out: Optional[Tensor] = ..., /) -> Tensor:
+        """Call a zip function"""
+        ...
+
+
+class ReduceProto(Protocol):
+    def __call__(self, a: Tensor, dim: int, out: Optional[Tensor] = ..., /) -> Tensor:
+        """Call a reduce function"""
+        ...
+
+
 class TensorOps:
     @staticmethod
     def map(fn: Callable[[float], float]) -> MapProto:
@@ -32,28 +54,70 @@ class TensorOps:
         ...
 
     @staticmethod
-    def zip(
-        fn: Callable[[float, float], float],
-    ) -> Callable[[Tensor, Tensor], Tensor]:
+    def zip(fn: Callable[[float, float], float]) -> ZipProto:
         """Zip placeholder"""
         ...
 
     @staticmethod
-    def reduce(
-        fn: Callable[[float, float], float], start: float = 0.0
-    ) -> Callable[[Tensor, int], Tensor]:
+    def reduce(fn: Callable[[float, float], float], start: float = 0.0) -> ReduceProto:
         """Reduce placeholder"""
         ...
 
     @staticmethod
-    def matrix_multiply(a: Tensor, b: Tensor) -> Tensor:
+    def matrix_multiply(a: Tensor, b: Tensor, out: Optional[Tensor] = None) -> Tensor:
         """Matrix multiply"""
         raise NotImplementedError("Not implemented in this assignment")
 
+    @staticmethod
+    def sum_to_shape(
+        a: Tensor, shape: UserShape, out: Optional[Tensor] = None
+    ) -> Tensor:
+        """Sum to shape placeholder"""
+        ...
+
+    @staticmethod
+    def fused_map(program: Program) -> Callable[..., Tensor]:
+        """Fused elementwise program placeholder"""
+        ...
+
+    @staticmethod
+    def fused_back(program: Program) -> Callable[..., Tuple[Tensor, ...]]:
+        """Fused elementwise program backward placeholder"""
+        ...
+
+    @staticmethod
+    def fused_multi_map(program: Program) -> Callable[..., Tuple[Tensor, ...]]:
+        """Fused elementwise program with several outputs placeholder"""
+        ...
+
     cuda = False
 
 
 class TensorBackend:
+    # Kernels, installed by `_instrument`.
+    neg_map: Callable[..., Any]
+    sigmoid_map: Callable[..., Any]
+    relu_map: Callable[..., Any]
+    log_map: Callable[..., Any]
+    exp_map: Callable[..., Any]
+    id_map: Callable[..., Any]
+    inv_map: Callable[..., Any]
+    add_zip: Callable[..., Any]
+    mul_zip: Callable[..., Any]
+    lt_zip: Callable[..., Any]
+    eq_zip: Callable[..., Any]
+    is_close_zip: Callable[..., Any]
+    relu_back_zip: Callable[..., Any]
+    log_back_zip: Callable[..., Any]
+    inv_back_zip: Callable[..., Any]
+    add_reduce: Callable[..., Any]
+    mul_reduce: Callable[..., Any]
+    sum_to_shape: Callable[..., Any]
+    matrix_multiply: Callable[..., Any]
+    fused_map: Callable[..., Any]
+    fused_back: Callable[..., Any]
+    fused_multi_map: Callable[..., Any]
+
     def __init__(self, ops: Type[TensorOps]):
         """Dynamically construct a tensor backend based on a `tensor_ops` object
         that implements map, zip, and reduce higher-order functions.
@@ -68,30 +132,59 @@ class TensorBackend:
             A collection of tensor functions
 
         """
-        # Maps
-        self.neg_map = ops.map(operators.neg)
-        self.sigmoid_map = ops.map(operators.sigmoid)
-        self.relu_map = ops.map(operators.relu)
-        self.log_map = ops.map(operators.log)
-        self.exp_map = ops.map(operators.exp)
-        self.id_map = ops.map(operators.id)
-        self.inv_map = ops.map(operators.inv)
-
-        # Zips
-        self.add_zip = ops.zip(operators.add)
-        self.mul_zip = ops.zip(operators.mul)
-        self.lt_zip = ops.zip(operators.lt)
-        self.eq_zip = ops.zip(operators.eq)
-        self.is_close_zip = ops.zip(operators.is_close)
-        self.relu_back_zip = ops.zip(operators.relu_back)
-        self.log_back_zip = ops.zip(operators.log_back)
-        self.inv_back_zip = ops.zip(operators.inv_back)
-
-        # Reduce
-        self.add_reduce = ops.reduce(operators.add, 0.0)
-        self.mul_reduce = ops.reduce(operators.mul, 1.0)
-        self.matrix_multiply = ops.matrix_multiply
+        self._ops = ops
+        self._kernels: Dict[str, Callable[..., Any]] = {
+            # Maps
+            "neg_map": ops.map(operators.neg),
+            "sigmoid_map": ops.map(operators.sigmoid),
+            "relu_map": ops.map(operators.relu),
+            "log_map": ops.map(operators.log),
+            "exp_map": ops.map(operators.exp),
+            "id_map": ops.map(operators.id),
+            "inv_map": ops.map(operators.inv),
+            # Zips
+            "add_zip": ops.zip(operators.add),
+            "mul_zip": ops.zip(operators.mul),
+            "lt_zip": ops.zip(operators.lt),
+            "eq_zip": ops.zip(operators.eq),
+            "is_close_zip": ops.zip(operators.is_close),
+            "relu_back_zip": ops.zip(operators.relu_back),
+            "log_back_zip": ops.zip(operators.log_back),
+            "inv_back_zip": ops.zip(operators.inv_back),
+            # Reduce
+            "add_reduce": ops.reduce(operators.add, 0.0),
+            "mul_reduce": ops.reduce(operators.mul, 1.0),
+            "sum_to_shape": ops.sum_to_shape,
+            "matrix_multiply": ops.matrix_multiply,
+        }
         self.cuda = ops.cuda
+        # Installs the kernels as attributes, wrapped while
+        # `minitorch.capture` or `minitorch.profiler` needs to see them.
+        register(self)
+
+    def _instrument(self, on: bool) -> None:
+        """Install the bare kernels, or when `on` the ones wrapped by
+        `capture.recorded`.
+        """
+        for name, kernel in self._kernels.items():
+            setattr(self, name, recorded(kernel, name) if on else kernel)
+
+        # Fused elementwise programs (see `fusion.py`)
+        ops = self._ops
+        if not on:
+            self.fused_map = ops.fused_map
+            self.fused_back = ops.fused_back
+            self.fused_multi_map = ops.fused_multi_map
+            return
+        self.fused_map = lambda program: recorded(
+            ops.fused_map(program), "fused_map", len(program.code)
+        )
+        self.fused_back = lambda program: recorded(
+            ops.fused_back(program), "fused_back", 3 * len(program.code)
+        )
+        self.fused_multi_map = lambda program: recorded(
+            ops.fused_multi_map(program), "fused_multi_map", len(program.code)
+        )
 
 
 class SimpleOps(TensorOps):
@@ -138,13 +231,12 @@ class SimpleOps(TensorOps):
         return ret
 
     @staticmethod
-    def zip(
-        fn: Callable[[float, float], float],
-    ) -> Callable[["Tensor", "Tensor"], "Tensor"]:
+    def zip(fn: Callable[[float, float], float]) -> ZipProto:
         """Higher-order tensor zip function ::
 
           fn_zip = zip(fn)
           out = fn_zip(a, b)
+          fn_zip(a, b, out)
 
         Simple version ::
 
@@ -164,6 +256,9 @@ class SimpleOps(TensorOps):
             fn: function from two floats-to-float to apply
             a (:class:`TensorData`): tensor to zip over
             b (:class:`TensorData`): tensor to zip over
+            out (:class:`TensorData`): optional, tensor data to fill in,
+                   must have the broadcast shape of `a` and `b`. It may
+                   be `a` or `b` itself.
 
         Returns:
         -------
@@ -172,25 +267,27 @@ class SimpleOps(TensorOps):
         """
         f = tensor_zip(fn)
 
-        def ret(a: "Tensor", b: "Tensor") -> "Tensor":
+        def ret(a: Tensor, b: Tensor, out: Optional[Tensor] = None) -> Tensor:
             if a.shape != b.shape:
                 c_shape = shape_broadcast(a.shape, b.shape)
             else:
                 c_shape = a.shape
-            out = a.zeros(c_shape)
+            if out is None:
+                out = a.zeros(c_shape)
+            else:
+                assert out.shape == c_shape, f"out {out.shape} must be {c_shape}"
             f(*out.tuple(), *a.tuple(), *b.tuple())
             return out
 
         return ret
 
     @staticmethod
-    def reduce(
-        fn: Callable[[float, float], float], start: float = 0.0
-    ) -> Callable[["Tensor", int], "Tensor"]:
+    def reduce(fn: Callable[[float, float], float], start: float = 0.0) -> ReduceProto:
         """Higher-order tensor reduce function. ::
 
           fn_reduce = reduce(fn)
           out = fn_reduce(a, dim)
+          fn_reduce(a, dim, out)
 
         Simple version ::
 
@@ -206,6 +303,8 @@ class SimpleOps(TensorOps):
             start (float): initial default value to populate out
             a (:class:`TensorData`): tensor to reduce over
             dim (int): int of dim to reduce
+            out (:class:`TensorData`): optional, tensor data to fill in,
+                   with the shape of `a` and `dim` set to 1
 
         Returns:
         -------
@@ -214,7 +313,7 @@ class SimpleOps(TensorOps):
         """
         f = tensor_reduce(fn)
 
-        def ret(a: "Tensor", dim: int) -> "Tensor":
+        def ret(a: Tensor, dim: int, out: Optional[Tensor] = None) -> Tensor:
             out_shape = list(a.shape)
             if dim >= 0:
                 out_shape[dim] = 1
@@ -222,8 +321,12 @@ class SimpleOps(TensorOps):
                 out_shape = [1]
 
             # Other values when not sum.
-            out = a.zeros(tuple(out_shape))
-            out._tensor._storage[:] = start
+            if out is None:
+                out = a.zeros(tuple(out_shape))
+                out._tensor._storage[:] = start
+            else:
+                assert out.shape == tuple(out_shape), f"out must be {out_shape}"
+                out.fill_(start)
 
             f(*out.tuple(), *a.tuple(), dim)
             return out
@@ -231,9 +334,171 @@ class SimpleOps(TensorOps):
         return ret
 
     @staticmethod
-    def matrix_multiply(a: "Tensor", b: "Tensor") -> "Tensor":
-        """Matrix multiplication"""
-        raise NotImplementedError("Not implemented in this assignment")
+    def matrix_multiply(
+        a: "Tensor", b: "Tensor", out: Optional["Tensor"] = None
+    ) -> "Tensor":
+        """Batched tensor matrix multiply ::
+
+            for n:
+              for i:
+                for j:
+                  for k:
+                    out[n, i, j] += a[n, i, k] * b[n, k, j]
+
+        Leading batch dimensions broadcast like `zip`, and permuted
+        inputs are read through their strides without a copy.
+
+        Args:
+        ----
+            a : tensor data a
+            b : tensor data b
+            out : optional, tensor to fill in with the output shape
+
+        Returns:
+        -------
+            New tensor data
+
+        """
+        out = matmul_out(a, b, out)
+        tensor_matrix_multiply(*out.tuple(), *a.tuple(), *b.tuple())
+        return out
+
+    @staticmethod
+    def sum_to_shape(
+        a: Tensor, shape: UserShape, out: Optional[Tensor] = None
+    ) -> Tensor:
+        """Sum `a` down to `shape`, undoing a broadcast of `shape` to `a.shape`.
+
+        Every broadcast dimension is reduced in the same pass, with no
+        intermediate tensors. For `a` of shape `(B, N)` and `shape` of
+        `(N,)` ::
+
+            for j:
+                out[j] = 0
+                for i:
+                    out[j] += a[i, j]
+
+        Args:
+        ----
+            a : tensor to reduce
+            shape : shape that broadcasts to `a.shape`
+            out : optional, tensor of `shape` to fill in
+
+        Returns:
+        -------
+            Tensor of `shape`
+
+        """
+        out, out_shape, out_strides = sum_to_shape_out(a, shape, out)
+        tensor_sum_to_shape(out._tensor._storage, out_shape, out_strides, *a.tuple())
+        return out
+
+    @staticmethod
+    def fused_map(program: Program) -> Callable[..., Tensor]:
+        """Higher-order fused elementwise function ::
+
+          fn_fused = fused_map(program)
+          out = fn_fused(a, b, c, ...)
+
+        Runs every instruction of `program` per element in one pass, with
+        all inputs broadcast to a common shape ::
+
+            for i:
+                for j:
+                    out[i, j] = program(a[i, j], b[i, 0], c[0, j], ...)
+
+        Args:
+        ----
+            program: traced program from `minitorch.fuse`
+
+        Returns:
+        -------
+            Function from the input tensors, and an optional `out` tensor
+            to fill in, to the output tensor
+
+        """
+        f = tensor_fused_map(program)
+
+        def ret(*inputs: Tensor, out: Optional[Tensor] = None) -> Tensor:
+            out = fused_out(inputs, out)
+            f(*out.tuple(), *fused_args(inputs))
+            return out
+
+        return ret
+
+    @staticmethod
+    def fused_back(program: Program) -> Callable[..., Tuple[Tensor, ...]]:
+        """Higher-order backward of a fused elementwise function ::
+
+          fn_back = fused_back(program)
+          grads = fn_back(grad_out, a, b, c, ...)
+
+        Each gradient has the shape of `grad_out`; `Tensor.expand` sums
+        away broadcast dimensions afterwards, as for `zip`. Only the inputs
+        before the program's constants get a gradient.
+
+        Args:
+        ----
+            program: traced program from `minitorch.fuse`
+
+        Returns:
+        -------
+            Function from the output gradient and inputs, and an optional
+            `out` tuple of gradient tensors to fill in, to input gradients
+
+        """
+        f = tensor_fused_back(program)
+
+        def ret(
+            grad_out: Tensor, *inputs: Tensor, out: Optional[Tuple[Tensor, ...]] = None
+        ) -> Tuple[Tensor, ...]:
+            grads = fused_back_out(grad_out, inputs[: program.n_grads], out)
+            f(
+                tuple(g._tensor._storage for g in grads),
+                *grad_out.tuple(),
+                *fused_args(inputs),
+            )
+            return grads
+
+        return ret
+
+    @staticmethod
+    def fused_multi_map(program: Program) -> Callable[..., Tuple[Tensor, ...]]:
+        """Higher-order fused elementwise function with several outputs ::
+
+          fn_fused = fused_multi_map(program)
+          out_0, out_1 = fn_fused(a, b, c, ...)
+
+        Like `fused_map`, but stores every output register of a program
+        traced from a function returning a tuple ::
+
+            for i:
+                out_0[i], out_1[i] = program(a[i], b[i], c[0], ...)
+
+        Each element reads all of its inputs before any output is written,
+        so an output may be one of the inputs. That makes it an in-place
+        update of several tensors in one pass.
+
+        Args:
+        ----
+            program: traced program with `program.outputs` set
+
+        Returns:
+        -------
+            Function from the input tensors, and an optional `out` tuple
+            of tensors to fill in, to the output tensors
+
+        """
+        f = tensor_fused_multi_map(program)
+
+        def ret(
+            *inputs: Tensor, out: Optional[Tuple[Tensor, ...]] = None
+        ) -> Tuple[Tensor, ...]:
+            outs = fused_multi_out(inputs, len(program.outputs), out)
+            f(*fused_args(outs), *fused_args(inputs))
+            return outs
+
+        return ret
 
     is_cuda = False
 
@@ -241,6 +506,35 @@ class SimpleOps(TensorOps):
 # Implementations.
 
 
+def matmul_shape(a_shape: UserShape, b_shape: UserShape) -> UserShape:
+    """Output shape of a batched matrix multiply of `a_shape` by `b_shape`.
+
+    Args:
+    ----
+        a_shape : shape of the left tensor, at least 2 dims
+        b_shape : shape of the right tensor, at least 2 dims
+
+    Returns:
+    -------
+        broadcast batch dims followed by `(a_shape[-2], b_shape[-1])`
+
+    Raises:
+    ------
+        IndexingError : if the inner dimensions do not match
+
+    """
+    if len(a_shape) < 2 or len(b_shape) < 2:
+        raise IndexingError(
+            f"Matrix multiply needs 2+ dims, got {a_shape} and {b_shape}."
+        )
+    if a_shape[-1] != b_shape[-2]:
+        raise IndexingError(
+            f"Shape1 {a_shape} and Shape2 {b_shape} cannot matrix multiply."
+        )
+    batch = shape_broadcast(a_shape[:-2], b_shape[:-2])
+    return (*batch, a_shape[-2], b_shape[-1])
+
+
 def tensor_map(
     fn: Callable[[float], float],
 ) -> Callable[[Storage, Shape, Strides, Storage, Shape, Strides], None]:
@@ -259,6 +553,15 @@ def tensor_map(
       value of `in_storage` assuming `out_shape` and `in_shape`
       broadcast. (`in_shape` must be smaller than `out_shape`).
 
+    Aligned version:
+
+    * If `out` is dense (see `is_dense`) and `in` shares its shape and
+      strides, walk both storages linearly without any index arithmetic.
+
+    Otherwise positions are advanced with the odometer engine
+    (`broadcast_strides` / `advance_index`): each row along the last
+    dimension is a plain stride walk and only row changes carry.
+
     Args:
     ----
         fn: function from float-to-float to apply
@@ -277,13 +580,29 @@ def tensor_map(
         in_shape: Shape,
         in_strides: Strides,
     ) -> None:
-        big_index = np.array([0] * len(out_shape))
-        small_index = np.array([0] * len(out_shape))
-        for i in range(len(out)):
-            to_index(i, out_shape, big_index)
-            broadcast_index(big_index, out_shape, in_shape, small_index)
-            small_ordinal = index_to_position(small_index, in_strides)
-            out[i] = fn(in_storage[small_ordinal])
+        if is_dense(out_shape, out_strides, len(out)) and strides_aligned(
+            out_shape, out_strides, in_shape, in_strides
+        ):
+            out[:] = [fn(x) for x in in_storage[: len(out)].tolist()]
+            return
+
+        shape = out_shape.tolist() or [1]
+        strides = [
+            out_strides.tolist() or [0],
+            broadcast_strides(out_shape, in_shape, in_strides).tolist() or [0],
+        ]
+        in_values = in_storage.tolist()
+        inner = shape[-1]
+        o_step, in_step = strides[0][-1], strides[1][-1]
+        outer_index = [0] * (len(shape) - 1)
+        positions = [0, 0]
+        for _ in range(int(operators.prod(shape[:-1]))):
+            o, j = positions
+            for _ in range(inner):
+                out[o] = fn(in_values[j])
+                o += o_step
+                j += in_step
+            advance_index(outer_index, shape[:-1], strides, positions)
 
     return _map
 
@@ -308,6 +627,14 @@ def tensor_zip(
       value of `a_storage` and `b_storage` assuming `a_shape`
       and `b_shape` broadcast to `out_shape`.
 
+    Aligned version:
+
+    * If `out` is dense and `a` and `b` share its shape and strides,
+      walk the storages linearly without any index arithmetic.
+
+    Otherwise positions are advanced with the odometer engine, as in
+    `tensor_map`.
+
     Args:
     ----
         fn: function mapping two floats to float to apply
@@ -329,21 +656,38 @@ def tensor_zip(
         b_shape: Shape,
         b_strides: Strides,
     ) -> None:
-        append_strides = [0] * (len(out_strides) - len(a_strides))
-        a_strides_appended = array([*append_strides, *a_strides])
-        append_strides = [0] * (len(out_strides) - len(b_strides))
-        b_strides_appended = array([*append_strides, *b_strides])
-
-        out_index = np.array([0] * len(out_shape))
-        a_index = np.array([0] * len(out_shape))
-        b_index = np.array([0] * len(out_shape))
-        for i in range(len(out)):
-            to_index(i, out_shape, out_index)
-            broadcast_index(out_index, out_shape, a_shape, a_index)
-            a_ordinal = index_to_position(a_index, a_strides_appended)
-            broadcast_index(out_index, out_shape, b_shape, b_index)
-            b_ordinal = index_to_position(b_index, b_strides_appended)
-            out[i] = fn(a_storage[a_ordinal], b_storage[b_ordinal])
+        if (
+            is_dense(out_shape, out_strides, len(out))
+            and strides_aligned(out_shape, out_strides, a_shape, a_strides)
+            and strides_aligned(out_shape, out_strides, b_shape, b_strides)
+        ):
+            size = len(out)
+            out[:] = [
+                fn(x, y)
+                for x, y in zip(a_storage[:size].tolist(), b_storage[:size].tolist())
+            ]
+            return
+
+        shape = out_shape.tolist() or [1]
+        strides = [
+            out_strides.tolist() or [0],
+            broadcast_strides(out_shape, a_shape, a_strides).tolist() or [0],
+            broadcast_strides(out_shape, b_shape, b_strides).tolist() or [0],
+        ]
+        a_values = a_storage.tolist()
+        b_values = b_storage.tolist()
+        inner = shape[-1]
+        o_step, a_step, b_step = strides[0][-1], strides[1][-1], strides[2][-1]
+        outer_index = [0] * (len(shape) - 1)
+        positions = [0, 0, 0]
+        for _ in range(int(operators.prod(shape[:-1]))):
+            o, j, k = positions
+            for _ in range(inner):
+                out[o] = fn(a_values[j], b_values[k])
+                o += o_step
+                j += a_step
+                k += b_step
+            advance_index(outer_index, shape[:-1], strides, positions)
 
     return _zip
 
@@ -355,6 +699,9 @@ def tensor_reduce(
 
     * `out_shape` will be the same as `a_shape`
        except with `reduce_dim` turned to size `1`
+    * If `out` and `a` are both packed row-major, the start of each
+      reduction is computed directly from the output ordinal.
+    * Otherwise output positions are advanced with the odometer engine.
 
     Args:
     ----
@@ -375,20 +722,445 @@ def tensor_reduce(
         a_strides: Strides,
         reduce_dim: int,
     ) -> None:
+        a_values = a_storage.tolist()
         if reduce_dim < 0:
-            for i in range(len(a_storage)):
-                out[0] = fn(out[0], a_storage[i])
+            acc = out[0]
+            if is_dense(a_shape, a_strides, len(a_storage)):
+                for x in a_values:
+                    acc = fn(acc, x)
+            else:
+                shape = a_shape.tolist()
+                strides = [a_strides.tolist()]
+                index = [0] * len(shape)
+                positions = [0]
+                for _ in range(int(operators.prod(shape))):
+                    acc = fn(acc, a_values[positions[0]])
+                    advance_index(index, shape, strides, positions)
+            out[0] = acc
             return
 
-        out_index = np.array([0] * len(out_shape))
-        for i in range(len(out)):
-            to_index(i, out_shape, out_index)
-            a_ordinal = index_to_position(out_index, a_strides)
-            for j in range(a_shape[reduce_dim]):
-                a_ord2 = int(a_ordinal + j * a_strides[reduce_dim])
-                out[i] = fn(out[i], a_storage[a_ord2])
+        out_size = int(operators.prod(out_shape))
+        if is_row_major(out_shape, out_strides) and is_row_major(a_shape, a_strides):
+            reduce_size = int(a_shape[reduce_dim])
+            inner = int(operators.prod(a_shape[reduce_dim + 1 :]))
+            for i in range(out_size):
+                start = (i // inner) * inner * reduce_size + i % inner
+                acc = out[i]
+                for j in range(start, start + inner * reduce_size, inner):
+                    acc = fn(acc, a_values[j])
+                out[i] = acc
+            return
+
+        shape = out_shape.tolist()
+        strides = [out_strides.tolist(), a_strides.tolist()]
+        reduce_size = int(a_shape[reduce_dim])
+        reduce_stride = strides[1][reduce_dim]
+        index = [0] * len(shape)
+        positions = [0, 0]
+        for _ in range(out_size):
+            o, j = positions
+            acc = out[o]
+            for _ in range(reduce_size):
+                acc = fn(acc, a_values[j])
+                j += reduce_stride
+            out[o] = acc
+            advance_index(index, shape, strides, positions)
 
     return _reduce
 
 
+def fused_shape(inputs: Sequence[Tensor]) -> UserShape:
+    """Broadcast shape of all the inputs of a fused program."""
+    shape = inputs[0].shape
+    for t in inputs[1:]:
+        if t.shape != shape:
+            shape = shape_broadcast(shape, t.shape)
+    return shape
+
+
+def fused_args(
+    inputs: Sequence[Tensor],
+) -> Tuple[Tuple[Storage, ...], Tuple[Shape, ...], Tuple[Strides, ...]]:
+    """Storages, shapes and strides of the inputs of a fused program."""
+    return (
+        tuple(t._tensor._storage for t in inputs),
+        tuple(t._tensor._shape for t in inputs),
+        tuple(t._tensor._strides for t in inputs),
+    )
+
+
+def matmul_out(a: Tensor, b: Tensor, out: Optional[Tensor]) -> Tensor:
+    """Output tensor of a matrix multiply, new unless `out` is given."""
+    shape = matmul_shape(a.shape, b.shape)
+    if out is None:
+        return a.zeros(shape)
+    assert out.shape == shape, f"out {out.shape} must be {shape}"
+    return out
+
+
+def sum_to_shape_out(
+    a: Tensor, shape: UserShape, out: Optional[Tensor]
+) -> Tuple[Tensor, Shape, Strides]:
+    """Output tensor of a sum to `shape`, new unless `out` is given.
+
+    Also returns its shape and strides padded with leading size-1
+    dimensions to the dimensions of `a`, for the kernels.
+    """
+    shape = tuple(shape)
+    offset = a.dims - len(shape)
+    assert offset >= 0 and all(
+        s in (1, a.shape[d + offset]) for d, s in enumerate(shape)
+    ), f"{shape} does not broadcast to {a.shape}"
+    if out is None:
+        out = a.zeros(shape)
+    else:
+        assert out.shape == shape, f"out {out.shape} must be {shape}"
+    out_shape = np.array((1,) * offset + shape)
+    out_strides = np.array((0,) * offset + tuple(out._tensor.strides))
+    return out, out_shape, out_strides
+
+
+def fused_out(inputs: Sequence[Tensor], out: Optional[Tensor]) -> Tensor:
+    """Output tensor of a fused program, new unless `out` is given."""
+    shape = fused_shape(inputs)
+    if out is None:
+        return inputs[0].zeros(shape)
+    assert out.shape == shape, f"out {out.shape} must be {shape}"
+    return out
+
+
+def fused_multi_out(
+    inputs: Sequence[Tensor], n_outputs: int, out: Optional[Tuple[Tensor, ...]]
+) -> Tuple[Tensor, ...]:
+    """Output tensors of a fused program with several outputs, new unless
+    `out` is given.
+    """
+    shape = fused_shape(inputs)
+    if out is None:
+        return tuple(inputs[0].zeros(shape) for _ in range(n_outputs))
+    assert len(out) == n_outputs, f"out needs {n_outputs} tensors"
+    for o in out:
+        assert o.shape == shape, f"out {o.shape} must be {shape}"
+    return tuple(out)
+
+
+def fused_back_out(
+    grad_out: Tensor, inputs: Sequence[Tensor], out: Optional[Tuple[Tensor, ...]]
+) -> Tuple[Tensor, ...]:
+    """Gradient tensors of a fused backward, new unless `out` is given."""
+    if out is None:
+        return tuple(grad_out.zeros(grad_out.shape) for _ in inputs)
+    assert len(out) == len(inputs), "out needs one tensor per input"
+    for g in out:
+        assert g.shape == grad_out.shape, f"out {g.shape} must be {grad_out.shape}"
+        assert g._tensor.is_contiguous(), "out gradients must be contiguous"
+    return out
+
+
+def tensor_fused_map(
+    program: Program,
+) -> Callable[
+    [
+        Storage,
+        Shape,
+        Strides,
+        Tuple[Storage, ...],
+        Tuple[Shape, ...],
+        Tuple[Strides, ...],
+    ],
+    None,
+]:
+    """Low-level implementation of a fused elementwise program.
+
+    * Every input is broadcast to `out_shape` with `broadcast_strides`.
+    * Each output element loads one value per input into a register file,
+      runs `run_program` over it and stores the last register.
+
+    Args:
+    ----
+        program: traced program from `minitorch.fuse`
+
+    Returns:
+    -------
+        Fused map function.
+
+    """
+    code = program.code.tolist()
+    n_inputs = program.n_inputs
+
+    def _fused_map(
+        out: Storage,
+        out_shape: Shape,
+        out_strides: Strides,
+        in_storages: Tuple[Storage, ...],
+        in_shapes: Tuple[Shape, ...],
+        in_strides: Tuple[Strides, ...],
+    ) -> None:
+        shape = out_shape.tolist()
+        strides = [out_strides.tolist()] + [
+            broadcast_strides(out_shape, s, st).tolist()
+            for s, st in zip(in_shapes, in_strides)
+        ]
+        values = [s.tolist() for s in in_storages]
+        regs = [0.0] * (n_inputs + len(code))
+        index = [0] * len(shape)
+        positions = [0] * (n_inputs + 1)
+        for _ in range(int(operators.prod(shape))):
+            for k in range(n_inputs):
+                regs[k] = values[k][positions[k + 1]]
+            run_program(code, regs, n_inputs)
+            out[positions[0]] = regs[-1]
+            advance_index(index, shape, strides, positions)
+
+    return _fused_map
+
+
+def tensor_fused_multi_map(
+    program: Program,
+) -> Callable[
+    [
+        Tuple[Storage, ...],
+        Tuple[Shape, ...],
+        Tuple[Strides, ...],
+        Tuple[Storage, ...],
+        Tuple[Shape, ...],
+        Tuple[Strides, ...],
+    ],
+    None,
+]:
+    """Low-level implementation of a fused program with several outputs.
+
+    * All outputs share one shape, and the inputs broadcast to it.
+    * Each element runs `run_program` once and stores every register in
+      `program.outputs`, each into its own output.
+
+    Args:
+    ----
+        program: traced program with `program.outputs` set
+
+    Returns:
+    -------
+        Fused multi-output map function.
+
+    """
+    code = program.code.tolist()
+    n_inputs = program.n_inputs
+    outputs = program.outputs.tolist()
+    n_outputs = len(outputs)
+
+    def _fused_multi_map(
+        out_storages: Tuple[Storage, ...],
+        out_shapes: Tuple[Shape, ...],
+        out_strides: Tuple[Strides, ...],
+        in_storages: Tuple[Storage, ...],
+        in_shapes: Tuple[Shape, ...],
+        in_strides: Tuple[Strides, ...],
+    ) -> None:
+        shape = out_shapes[0].tolist()
+        strides = [st.tolist() for st in out_strides] + [
+            broadcast_strides(out_shapes[0], s, st).tolist()
+            for s, st in zip(in_shapes, in_strides)
+        ]
+        regs = [0.0] * (n_inputs + len(code))
+        index = [0] * len(shape)
+        positions = [0] * (n_outputs + n_inputs)
+        for _ in range(int(operators.prod(shape))):
+            for k in range(n_inputs):
+                regs[k] = in_storages[k][positions[n_outputs + k]]
+            run_program(code, regs, n_inputs)
+            for k in range(n_outputs):
+                out_storages[k][positions[k]] = regs[outputs[k]]
+            advance_index(index, shape, strides, positions)
+
+    return _fused_multi_map
+
+
+def tensor_fused_back(
+    program: Program,
+) -> Callable[
+    [
+        Tuple[Storage, ...],
+        Storage,
+        Shape,
+        Strides,
+        Tuple[Storage, ...],
+        Tuple[Shape, ...],
+        Tuple[Strides, ...],
+    ],
+    None,
+]:
+    """Low-level implementation of the backward of a fused program.
+
+    * `grads` holds one contiguous storage of `g_shape` per input before
+      the constants.
+    * Each element re-runs the forward program to rebuild the registers,
+      then `run_program_back` sweeps it in reverse.
+
+    Args:
+    ----
+        program: traced program from `minitorch.fuse`
+
+    Returns:
+    -------
+        Fused backward function.
+
+    """
+    code = program.code.tolist()
+    n_inputs = program.n_inputs
+    n_grads = program.n_grads
+
+    def _fused_back(
+        grads: Tuple[Storage, ...],
+        g_storage: Storage,
+        g_shape: Shape,
+        g_strides: Strides,
+        in_storages: Tuple[Storage, ...],
+        in_shapes: Tuple[Shape, ...],
+        in_strides: Tuple[Strides, ...],
+    ) -> None:
+        shape = g_shape.tolist()
+        strides = [g_strides.tolist()] + [
+            broadcast_strides(g_shape, s, st).tolist()
+            for s, st in zip(in_shapes, in_strides)
+        ]
+        g_values = g_storage.tolist()
+        values = [s.tolist() for s in in_storages]
+        regs = [0.0] * (n_inputs + len(code))
+        d_regs = [0.0] * (n_inputs + len(code))
+        index = [0] * len(shape)
+        positions = [0] * (n_inputs + 1)
+        for i in range(int(operators.prod(shape))):
+            for k in range(n_inputs):
+                regs[k] = values[k][positions[k + 1]]
+            run_program(code, regs, n_inputs)
+            run_program_back(
+                code, regs, d_regs, n_inputs, n_grads, g_values[positions[0]]
+            )
+            for k in range(n_grads):
+                grads[k][i] = d_regs[k]
+            advance_index(index, shape, strides, positions)
+
+    return _fused_back
+
+
+def tensor_sum_to_shape(
+    out: Storage,
+    out_shape: Shape,
+    out_strides: Strides,
+    a_storage: Storage,
+    a_shape: Shape,
+    a_strides: Strides,
+) -> None:
+    """Low-level implementation of sum to shape.
+
+    * `out_shape` has the dimensions of `a_shape`, with every reduced
+      dimension turned to size `1`.
+    * Output positions are walked with the odometer engine, and for each
+      one the reduced dimensions of `a` are walked by a second odometer,
+      so every element of `a` is read once.
+
+    Args:
+    ----
+        out (Storage): storage for `out` tensor
+        out_shape (Shape): shape for `out` tensor
+        out_strides (Strides): strides for `out` tensor
+        a_storage (Storage): storage for `a` tensor
+        a_shape (Shape): shape for `a` tensor
+        a_strides (Strides): strides for `a` tensor
+
+    """
+    a_values = a_storage.tolist()
+    shape = out_shape.tolist()
+    reduce_shape = [int(a_shape[d]) if shape[d] == 1 else 1 for d in range(len(shape))]
+    reduce_size = int(operators.prod(reduce_shape))
+    strides = [out_strides.tolist(), a_strides.tolist()]
+    reduce_strides = [strides[1]]
+    index = [0] * len(shape)
+    positions = [0, 0]
+    for _ in range(int(operators.prod(shape))):
+        reduce_index = [0] * len(shape)
+        reduce_positions = [positions[1]]
+        acc = 0.0
+        for _ in range(reduce_size):
+            acc += a_values[reduce_positions[0]]
+            advance_index(reduce_index, reduce_shape, reduce_strides, reduce_positions)
+        out[positions[0]] = acc
+        advance_index(index, shape, strides, positions)
+
+
+def tensor_matrix_multiply(
+    out: Storage,
+    out_shape: Shape,
+    out_strides: Strides,
+    a_storage: Storage,
+    a_shape: Shape,
+    a_strides: Strides,
+    b_storage: Storage,
+    b_shape: Shape,
+    b_strides: Strides,
+) -> None:
+    """Low-level implementation of a blocked, batched matrix multiply.
+
+    * `out_shape` is `matmul_shape(a_shape, b_shape)`.
+    * Batch dimensions of `a` and `b` of size 1 (or missing) get a zero
+      batch stride so they broadcast without being materialized, and
+      batches are walked with the odometer engine.
+    * The `i`, `k` and `j` loops are tiled by `MATMUL_BLOCK` so each tile
+      of `a`, `b` and `out` stays in cache while it is reused.
+
+    Args:
+    ----
+        out (Storage): storage for `out` tensor
+        out_shape (Shape): shape for `out` tensor
+        out_strides (Strides): strides for `out` tensor
+        a_storage (Storage): storage for `a` tensor
+        a_shape (Shape): shape for `a` tensor
+        a_strides (Strides): strides for `a` tensor
+        b_storage (Storage): storage for `b` tensor
+        b_shape (Shape): shape for `b` tensor
+        b_strides (Strides): strides for `b` tensor
+
+    Returns:
+    -------
+        None : Fills in `out`
+
+    """
+    batch_shape = out_shape[:-2]
+    batch_strides = [
+        out_strides[:-2].tolist(),
+        broadcast_strides(batch_shape, a_shape[:-2], a_strides[:-2]).tolist(),
+        broadcast_strides(batch_shape, b_shape[:-2], b_strides[:-2]).tolist(),
+    ]
+
+    M, N, K = int(out_shape[-2]), int(out_shape[-1]), int(a_shape[-1])
+    a_si, a_sk = int(a_strides[-2]), int(a_strides[-1])
+    b_sk, b_sj = int(b_strides[-2]), int(b_strides[-1])
+    o_si, o_sj = int(out_strides[-2]), int(out_strides[-1])
+    a_values = a_storage.tolist()
+    b_values = b_storage.tolist()
+
+    batch_index = [0] * len(batch_shape)
+    positions = [0, 0, 0]
+    for _ in range(int(operators.prod(batch_shape))):
+        o_base, a_base, b_base = positions
+        for i0 in range(0, M, MATMUL_BLOCK):
+            i1 = min(i0 + MATMUL_BLOCK, M)
+            for j0 in range(0, N, MATMUL_BLOCK):
+                j1 = min(j0 + MATMUL_BLOCK, N)
+                for i in range(i0, i1):
+                    row = [0.0] * (j1 - j0)
+                    for k0 in range(0, K, MATMUL_BLOCK):
+                        for k in range(k0, min(k0 + MATMUL_BLOCK, K)):
+                            aik = a_values[a_base + i * a_si + k * a_sk]
+                            b_pos = b_base + k * b_sk + j0 * b_sj
+                            for j in range(j1 - j0):
+                                row[j] += aik * b_values[b_pos]
+                                b_pos += b_sj
+                    o_pos = o_base + i * o_si + j0 * o_sj
+                    for j in range(j1 - j0):
+                        out[o_pos] = row[j]
+                        o_pos += o_sj
+        advance_index(batch_index, batch_shape.tolist(), batch_strides, positions)
+
+
 SimpleBackend = TensorBackend(SimpleOps)
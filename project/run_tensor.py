@@ -5,42 +5,21 @@ Be sure you have minitorch installed in you Virtual Env.
 
 import minitorch
 
-# Use this function to make a random parameter in
-# your module.
-def RParam(*shape):
-    r = 2 * (minitorch.rand(shape) - 0.5)
-    return minitorch.Parameter(r)
-
 
 class Network(minitorch.Module):
     def __init__(self, hidden_layers):
         super().__init__()
-        self.layer1 = Linear(2, 6)
-        self.layer2 = Linear(6, 4)
-        self.layer3 = Linear(4, 1)
+        self.layer1 = minitorch.nn.Linear(2, 6, activation="relu")
+        self.layer2 = minitorch.nn.Linear(6, 4, activation="relu")
+        self.layer3 = minitorch.nn.Linear(4, 1, activation="sigmoid")
 
     def forward(self, x):
-        l1_result = self.layer1.forward(x).relu()
-        l2_result = self.layer2.forward(l1_result).relu()
-        l3_result = self.layer3.forward(l2_result).sigmoid()
+        l1_result = self.layer1.forward(x)
+        l2_result = self.layer2.forward(l1_result)
+        l3_result = self.layer3.forward(l2_result)
         return l3_result
 
 
-class Linear(minitorch.Module):
-    def __init__(self, in_size, out_size):
-        super().__init__()
-        self.weights = RParam(in_size, out_size)
-        self.bias = RParam(out_size)
-
-    def forward(self, inputs):
-        reshaped_inputs = inputs.view(*inputs.shape, 1)
-        mul_weights = reshaped_inputs * self.weights.value
-        sum_weights = mul_weights.sum(1)
-        add_bias = sum_weights + self.bias.value
-        result = add_bias.view(add_bias.shape[0], add_bias.shape[2])
-        return result
-
-
 def default_log_fn(epoch, total_loss, correct, losses):
     print("Epoch ", epoch, " loss ", total_loss, "correct", correct)
 
@@ -50,9 +29,11 @@ class TensorTrain:
         self.hidden_layers = hidden_layers
         self.model = Network(hidden_layers)
 
+    @minitorch.no_grad()
     def run_one(self, x):
         return self.model.forward(minitorch.tensor([x]))
 
+    @minitorch.no_grad()
     def run_many(self, X):
         return self.model.forward(minitorch.tensor(X))
 
@@ -65,10 +46,10 @@ class TensorTrain:
         X = minitorch.tensor(data.X)
         y = minitorch.tensor(data.y)
 
-        losses = []
-        for epoch in range(1, self.max_epochs + 1):
-            total_loss = 0.0
-            correct = 0
+        # The step has fixed shapes, so it is captured on the first epoch
+        # and replayed afterwards.
+        @minitorch.capture
+        def step(X, y):
             optim.zero_grad()
 
             # Forward
@@ -77,11 +58,18 @@ class TensorTrain:
 
             loss = -prob.log()
             (loss / data.N).sum().view(1).backward()
-            total_loss = loss.sum().view(1)[0]
-            losses.append(total_loss)
 
             # Update
             optim.step()
+            return out, loss
+
+        losses = []
+        for epoch in range(1, self.max_epochs + 1):
+            total_loss = 0.0
+            correct = 0
+            out, loss = step(X, y)
+            total_loss = loss.sum().view(1)[0]
+            losses.append(total_loss)
 
             # Logging
             if epoch % 10 == 0 or epoch == max_epochs:
@@ -0,0 +1,15 @@
+from typing import Dict
+
+import minitorch
+from minitorch import TensorBackend
+
+# One backend object per ops class, shared by every test module that runs
+# across backends.
+SimpleBackend = minitorch.TensorBackend(minitorch.SimpleOps)
+FastTensorBackend = minitorch.TensorBackend(minitorch.FastOps)
+NumpyTensorBackend = minitorch.TensorBackend(minitorch.NumpyOps)
+shared: Dict[str, TensorBackend] = {
+    "fast": FastTensorBackend,
+    "simple": SimpleBackend,
+    "numpy": NumpyTensorBackend,
+}
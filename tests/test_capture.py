@@ -0,0 +1,163 @@
+from typing import Callable, List, Optional
+
+import numpy as np
+import pytest
+
+import minitorch
+from minitorch import Parameter, Tensor, TensorBackend
+
+from .conftest import shared
+
+
+def make_params(backend: TensorBackend) -> List[Parameter]:
+    w1 = minitorch.tensor([[0.3, -0.2, 0.5], [0.1, 0.4, -0.6]], backend=backend)
+    w2 = minitorch.tensor([[0.2], [-0.5], [0.7]], backend=backend)
+    return [Parameter(w1), Parameter(w2)]
+
+
+def make_step(
+    params: List[Parameter], optim: Optional[minitorch.Optimizer] = None
+) -> Callable[[Tensor, Tensor], Tensor]:
+    if optim is None:
+        optim = minitorch.SGD(params, 0.5)
+
+    def step(x: Tensor, y: Tensor) -> Tensor:
+        optim.zero_grad()
+        h = (x @ params[0].value).relu()
+        out = (h @ params[1].value).sigmoid().view(x.shape[0])
+        loss = ((out - y) * (out - y)).sum()
+        loss.backward()
+        optim.step()
+        return loss
+
+    return step
+
+
+@pytest.mark.parametrize("backend", shared.keys())
+def test_capture_matches_eager(backend: str) -> None:
+    "Replaying a captured step trains exactly like running it eagerly"
+    b = shared[backend]
+    eager = make_params(b)
+    captured = make_params(b)
+    eager_step = make_step(eager)
+    captured_step = minitorch.capture(make_step(captured))
+
+    for i in range(4):
+        x = minitorch.tensor(
+            [[0.1 * i, 0.5], [0.3, -0.2 * i], [0.7, 0.1], [-0.4, 0.2]], backend=b
+        )
+        y = minitorch.tensor([1.0, 0.0, 1.0, float(i % 2)], backend=b)
+        expected = eager_step(x, y)
+        loss = captured_step(x, y)
+        np.testing.assert_allclose(loss.to_numpy(), expected.to_numpy())
+        for p, q in zip(eager, captured):
+            np.testing.assert_allclose(p.value.to_numpy(), q.value.to_numpy())
+            assert q.value.grad is not None and p.value.grad is not None
+            np.testing.assert_allclose(p.value.grad.to_numpy(), q.value.grad.to_numpy())
+
+    assert captured_step.tape is not None
+    assert len(captured_step.tape.calls) > 0
+
+
+def test_capture_checks_shapes() -> None:
+    "Replays need the captured shapes; reset records again"
+    params = make_params(shared["simple"])
+    step = minitorch.capture(make_step(params))
+    x = minitorch.tensor([[0.1, 0.5], [0.3, -0.2]])
+    y = minitorch.tensor([1.0, 0.0])
+    step(x, y)
+    with pytest.raises(AssertionError):
+        step(minitorch.tensor([[0.1, 0.5]]), minitorch.tensor([1.0]))
+
+    step.reset()
+    loss = step(minitorch.tensor([[0.1, 0.5]]), minitorch.tensor([1.0]))
+    assert loss.shape == (1,)
+
+
+def test_kernels_wrapped_only_while_needed() -> None:
+    "Kernels run bare unless a capture or a profiler is active"
+    b = shared["simple"]
+    bare = b.add_zip
+    wrapped = []
+
+    def step(x: Tensor) -> Tensor:
+        wrapped.append(b.add_zip is not bare)
+        return x + x
+
+    captured = minitorch.capture(step)
+    captured(minitorch.tensor([1.0, 2.0], backend=b))
+    assert wrapped == [True] and b.add_zip is bare
+    assert captured.tape is not None and len(captured.tape.calls) == 1
+
+    with minitorch.profiler() as prof:
+        captured.reset()
+        captured(minitorch.tensor([1.0, 2.0], backend=b))
+        # Still wrapped after the capture ended, for the profiler.
+        assert b.add_zip is not bare
+    assert wrapped == [True, True] and b.add_zip is bare
+    assert any(e.name == "add_zip" for e in prof.events)
+
+
+@pytest.mark.parametrize("backend", shared.keys())
+def test_memory_plan(backend: str) -> None:
+    "Planned arenas are smaller than the captured buffers and replay the same"
+    b = shared[backend]
+    eager = make_params(b)
+    captured = make_params(b)
+    eager_step = make_step(eager)
+    captured_step = minitorch.capture(make_step(captured))
+    x = minitorch.tensor([[0.1, 0.5], [0.3, -0.2], [0.7, 0.1]], backend=b)
+    y = minitorch.tensor([1.0, 0.0, 1.0], backend=b)
+    eager_step(x, y)
+    captured_step(x, y)
+
+    plan = captured_step.plan_memory()
+    assert plan.peak_bytes <= plan.planned_bytes < plan.naive_bytes
+    assert all(
+        buffer.arena is not None
+        for buffer in plan.buffers.values()
+        if buffer.intermediate
+    )
+
+    for _ in range(3):
+        expected = eager_step(x, y)
+        loss = captured_step(x, y)
+        np.testing.assert_allclose(loss.to_numpy(), expected.to_numpy())
+        for p, q in zip(eager, captured):
+            np.testing.assert_allclose(p.value.to_numpy(), q.value.to_numpy())
+
+
+@pytest.mark.parametrize("backend", shared.keys())
+@pytest.mark.parametrize("optimizer", ["sgd", "adam"])
+def test_memory_plan_after_warmup(backend: str, optimizer: str) -> None:
+    "Gradients and optimizer state made before the capture keep their memory"
+    b = shared[backend]
+
+    def make(params: List[Parameter]) -> Callable[[Tensor, Tensor], Tensor]:
+        if optimizer == "sgd":
+            return make_step(params)
+        return make_step(params, minitorch.Adam(params, 0.1, max_grad_norm=1.0))
+
+    eager = make_params(b)
+    captured = make_params(b)
+    eager_step = make(eager)
+    step = make(captured)
+    x = minitorch.tensor([[0.1, 0.5], [0.3, -0.2], [0.7, 0.1]], backend=b)
+    y = minitorch.tensor([1.0, 0.0, 1.0], backend=b)
+    # The warm-up leaves gradients, so the captured step starts by zeroing
+    # them in place instead of creating them.
+    eager_step(x, y)
+    step(x, y)
+    captured_step = minitorch.capture(step)
+    eager_step(x, y)
+    captured_step(x, y)
+    captured_step.plan_memory()
+
+    for _ in range(3):
+        expected = eager_step(x, y)
+        loss = captured_step(x, y)
+        np.testing.assert_allclose(loss.to_numpy(), expected.to_numpy())
+        for p, q in zip(eager, captured):
+            assert p.value.grad is not None and q.value.grad is not None
+            np.testing.assert_allclose(p.value.grad.to_numpy(), q.value.grad.to_numpy())
+            np.testing.assert_allclose(p.value.to_numpy(), q.value.to_numpy())
@@ -0,0 +1,58 @@
+import random
+
+import numpy as np
+import pytest
+
+import minitorch
+from minitorch.data import DataLoader
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_batches(prefetch: int) -> None:
+    "Batches cover the graph in order, with a short last batch unless dropped"
+    graph = minitorch.datasets["Xor"](10)
+    loader = DataLoader(graph, 4, prefetch=prefetch)
+    assert len(loader) == 3
+    batches = list(loader)
+    assert [X.shape for X, _ in batches] == [(4, 2), (4, 2), (2, 2)]
+    X = np.concatenate([X.to_numpy() for X, _ in batches])
+    y = np.concatenate([y.to_numpy() for _, y in batches])
+    np.testing.assert_allclose(X, graph.X)
+    np.testing.assert_allclose(y, graph.y)
+    assert all(X._tensor.is_contiguous() for X, _ in batches)
+
+    loader = DataLoader(graph, 4, drop_last=True, prefetch=prefetch)
+    assert len(loader) == 2
+    assert [y.shape for _, y in loader] == [(4,), (4,)]
+
+
+def test_shuffle() -> None:
+    "Shuffled epochs visit every row once, repeatably under random.seed"
+    X = np.arange(20.0).reshape(10, 2)
+    y = np.arange(10.0)
+    loader = DataLoader((X, y.tolist()), 3, shuffle=True)
+
+    def epoch() -> np.ndarray:
+        rows = []
+        for xb, yb in loader:
+            np.testing.assert_allclose(xb.to_numpy()[:, 0], 2 * yb.to_numpy())
+            rows.append(yb.to_numpy())
+        return np.concatenate(rows)
+
+    random.seed(3)
+    first = epoch()
+    assert sorted(first.tolist()) == y.tolist()
+    random.seed(3)
+    np.testing.assert_allclose(epoch(), first)
+
+
+def test_prefetch_stops_early() -> None:
+    "Breaking out of an epoch stops the worker, and errors reach the caller"
+    loader = DataLoader([np.zeros((100, 3))], 1, prefetch=2)
+    for i, (xb,) in enumerate(loader):
+        if i == 1:
+            break
+
+    loader.arrays.append(np.zeros(5))
+    with pytest.raises(ValueError):
+        list(loader)
@@ -0,0 +1,84 @@
+import gc
+
+import numpy as np
+
+import minitorch
+from minitorch import StoragePool
+from minitorch.data import DataLoader
+
+from .conftest import NumpyTensorBackend
+
+
+def test_pool_reuses_storage() -> None:
+    pool = StoragePool(min_size=4)
+    a = pool.zeros(8)
+    a[:] = 3.0
+    address = a.ctypes.data
+    del a
+    b = pool.zeros(8)
+    assert b.ctypes.data == address
+    assert (b == 0.0).all()
+    assert pool.stats.hits == 1 and pool.stats.misses == 1
+    assert pool.stats.hit_rate == 0.5
+
+    # Too small to pool.
+    pool.zeros(2)
+    assert pool.stats.misses == 1
+
+
+def test_pool_keeps_outside_views() -> None:
+    pool = StoragePool(min_size=4)
+    a = pool.zeros(8)
+    view = a.reshape(2, 4)
+    del a
+    gc.collect()
+    assert pool.stats.discarded == 1
+    assert pool.stats.pooled_bytes == 0
+    view[:] = 1.0
+    assert pool.zeros(8).ctypes.data != view.ctypes.data
+
+
+def test_pool_eviction() -> None:
+    pool = StoragePool(max_bytes=8 * 16, min_size=4)
+    a, b, c = pool.zeros(8), pool.zeros(4), pool.zeros(8)
+    del a, b
+    assert pool.stats.pooled_bytes == 8 * 12
+    del c
+    # Size 4 was released least recently, so its buffer goes first.
+    assert pool.stats.evictions == 1
+    assert pool.stats.pooled_bytes == 8 * 16
+    assert pool.zeros(4).base is not None and pool.stats.hits == 0
+
+
+def test_pool_tensor_results() -> None:
+    pool = minitorch.storage_pool
+    old = pool.min_size
+    pool.min_size = 4
+    try:
+        x = minitorch.tensor([[1, 2, 3], [4, 5, 6]])
+        hits = pool.stats.hits
+        for _ in range(3):
+            y = (x * 2.0 + 1.0).to_numpy()
+        assert pool.stats.hits > hits
+        assert y[1, 2] == 13.0
+    finally:
+        pool.min_size = old
+
+
+def test_pool_default_min_size() -> None:
+    "Matmul results and loader batches of 2**14 elements are pooled by default"
+    pool = minitorch.storage_pool
+    assert pool.min_size == StoragePool().min_size
+    a = minitorch.rand((128, 128), backend=NumpyTensorBackend)
+    hits = pool.stats.hits
+    for _ in range(3):
+        out = a @ a
+        del out
+    assert pool.stats.hits >= hits + 2
+
+    loader = DataLoader([np.ones((512, 64))], 256, prefetch=0)
+    hits = pool.stats.hits
+    for _ in range(2):
+        for (xb,) in loader:
+            assert xb.shape == (256, 64)
+    assert pool.stats.hits > hits
@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import minitorch
+from minitorch import profiling
+
+
+def test_profiler_events() -> None:
+    "Functions, their backwards and their kernels are all reported"
+    x = minitorch.tensor([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]], requires_grad=True)
+    w = minitorch.tensor([[1.0], [0.5], [-1.0]], requires_grad=True)
+    with minitorch.profiler() as prof:
+        out = (x @ w).relu().sum()
+        out.backward()
+    assert profiling.active is None
+
+    names = {(e.category, e.name) for e in prof.events}
+    assert ("forward", "MatMul") in names
+    assert ("backward", "MatMul") in names
+    assert ("forward", "ReLU") in names
+    assert ("kernel", "matrix_multiply") in names
+    assert ("kernel", "relu_map") in names
+
+    # 2 * M * N * K for the forward product.
+    (mm,) = [
+        e for e in prof.events if e.name == "matrix_multiply" and e.shapes == "2x3, 3x1"
+    ]
+    assert mm.flops == 2 * 2 * 1 * 3
+    assert mm.bytes == 2 * 8
+    (forward,) = [
+        e for e in prof.events if e.name == "MatMul" and e.category == "forward"
+    ]
+    assert forward.flops == mm.flops
+    assert forward.duration >= mm.duration
+
+
+def test_profiler_scalars() -> None:
+    "Scalar functions count one operation each"
+    a = minitorch.Scalar(2.0)
+    with minitorch.profiler() as prof:
+        (a * a + a).backward()
+    categories = [e.category for e in prof.events]
+    assert categories.count("scalar") == 2
+    assert categories.count("scalar_backward") == 2
+    assert prof.flops == 4
+
+
+def test_profiler_table_and_trace(tmp_path: Path) -> None:
+    "The table is sorted by time and the trace is valid JSON"
+    x = minitorch.rand((4, 5), requires_grad=True)
+    with minitorch.profiler() as prof:
+        (x * x).sigmoid().sum().backward()
+
+    stats = prof.stats()
+    assert [s.time for s in stats] == sorted([s.time for s in stats], reverse=True)
+    assert sum(s.calls for s in stats) == len(prof.events)
+    lines = prof.table(limit=3).splitlines()
+    assert lines[0].split()[0] == "name"
+    assert len(lines) == 4
+
+    path = tmp_path / "trace.json"
+    prof.export_chrome_trace(str(path))
+    trace = json.loads(path.read_text())["traceEvents"]
+    assert len(trace) == len(prof.events)
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in trace)
+
+
+def test_profiler_disabled() -> None:
+    "Nothing is recorded outside the context and profilers do not nest"
+    prof = minitorch.profiler()
+    with prof:
+        pass
+    x = minitorch.tensor([1.0, 2.0], requires_grad=True)
+    (x * x).sum().backward()
+    assert prof.events == []
+
+    with prof:
+        with pytest.raises(AssertionError):
+            with minitorch.profiler():
+                pass
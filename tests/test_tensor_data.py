@@ -1,6 +1,8 @@
+import numpy as np
 import pytest
 from hypothesis import given
 from hypothesis.strategies import DataObject, data
+from numpy import array
 
 import minitorch
 from minitorch import TensorData
@@ -123,3 +125,96 @@ def test_shape_broadcast() -> None:
 @given(tensor_data())
 def test_string(tensor_data: TensorData) -> None:
     tensor_data.to_string()
+
+
+@pytest.mark.task2_1
+def test_layout_alignment() -> None:
+    """Check the layout predicates used by the kernel fast paths."""
+    td = minitorch.TensorData([0] * 15, (3, 5))
+    tp = td.permute(1, 0)
+    assert minitorch.strides_aligned(td._shape, td._strides, td._shape, td._strides)
+    assert not minitorch.strides_aligned(td._shape, td._strides, tp._shape, tp._strides)
+    assert minitorch.is_row_major(td._shape, td._strides)
+    assert not minitorch.is_row_major(tp._shape, tp._strides)
+    assert minitorch.is_row_major(
+        minitorch.TensorData([0] * 5, (1, 5), (7, 1))._shape, (7, 1)
+    )
+
+
+@pytest.mark.task2_2
+@given(tensor_data())
+def test_advance_index(tensor_data: TensorData) -> None:
+    """The odometer visits every index in order with matching positions."""
+    shape = list(tensor_data.shape)
+    strides = [list(tensor_data.strides)]
+    index = [0] * len(shape)
+    positions = [0]
+    for expected in tensor_data.indices():
+        assert tuple(index) == expected
+        assert positions[0] == tensor_data.index(expected)
+        minitorch.advance_index(index, shape, strides, positions)
+
+
+@pytest.mark.task2_2
+def test_broadcast_strides() -> None:
+    strides = minitorch.broadcast_strides(
+        array([4, 2, 3]), array([2, 1]), array([1, 2])
+    )
+    assert list(strides) == [0, 1, 0]
+
+
+@pytest.mark.task2_1
+def test_views() -> None:
+    """View constructors share storage and compute offsets and strides."""
+    td = minitorch.TensorData(list(range(12)), (3, 4))
+    s = td.slice((slice(1, None), slice(None, None, 2)))
+    assert s.shape == (2, 2) and s.strides == (4, 2)
+    assert np.shares_memory(s._storage, td._storage)
+    assert s.version is td.version
+    assert [s.get(i) for i in s.indices()] == [4, 6, 8, 10]
+    assert td.slice((2,)).shape == (4,)
+    assert td.slice((-1, slice(3, 4))).get((0,)) == 11
+
+    b = minitorch.TensorData([1, 2, 3], (3,)).broadcast_to((2, 3))
+    assert b.strides == (0, 1) and b.size == 6
+    assert not minitorch.is_dense(b._shape, b._strides, 3)
+
+    u = td.unsqueeze(1)
+    assert u.shape == (3, 1, 4)
+    assert u.squeeze().shape == (3, 4)
+    assert u.squeeze(0).shape == (3, 1, 4)
+    assert td.transpose(0, 1).shape == (4, 3)
+
+    assert minitorch.is_dense(td._shape, td._strides, 12)
+    assert minitorch.is_dense(td.permute(1, 0)._shape, td.permute(1, 0)._strides, 12)
+    assert not minitorch.is_dense(s._shape, s._strides, len(s._storage))
+    assert not td.slice((slice(None), slice(0, 2))).is_contiguous()
+
+    with pytest.raises(minitorch.IndexingError):
+        td.slice((3,))
+    with pytest.raises(minitorch.IndexingError):
+        td.slice((slice(None, None, -1),))
+    with pytest.raises(minitorch.IndexingError):
+        td.broadcast_to((4,))
+    assert u.squeeze(-2).shape == (3, 4)
+    with pytest.raises(minitorch.IndexingError):
+        u.squeeze(3)
+    with pytest.raises(minitorch.IndexingError):
+        u.squeeze(-4)
+    with pytest.raises(minitorch.IndexingError):
+        minitorch.zeros((3, 1, 4)).squeeze(-4)
+
+
+@pytest.mark.task2_1
+@given(tensor_data())
+def test_view_strides(tensor_data: TensorData) -> None:
+    """A no-copy view reads the same elements in the same order."""
+    positions = [tensor_data.index(i) for i in tensor_data.indices()]
+    for shape in [(tensor_data.size,), (1,) + tensor_data.shape + (1,)]:
+        strides = minitorch.view_strides(tensor_data.shape, tensor_data.strides, shape)
+        if tensor_data.is_contiguous():
+            assert strides is not None
+        if strides is None:
+            continue
+        view = TensorData(tensor_data._storage, shape, strides)
+        assert [view.index(i) for i in view.indices()] == positions
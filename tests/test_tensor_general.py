@@ -0,0 +1,486 @@
+from typing import Callable, Iterable, List, Tuple
+
+import numpy as np
+import pytest
+from hypothesis import given, settings
+from hypothesis.strategies import DataObject, data, integers, permutations
+
+import minitorch
+from minitorch import MathTestVariable, Tensor, grad_check
+
+from .conftest import NumpyTensorBackend, shared
+from .strategies import assert_close
+from .tensor_strategies import assert_close_tensor, shaped_tensors, tensors
+
+one_arg, two_arg, red_arg = MathTestVariable._comp_testing()
+
+# Comparisons are discontinuous, so central differences blow up whenever
+# hypothesis lands exactly on the boundary `a + 1.2 == b`. Their gradients
+# are checked on whole numbers, which keep every difference, including
+# those of the broadcast sums, at least 0.2 away from it.
+comparisons = ("lt2", "gt2")
+whole_numbers = integers(min_value=-100, max_value=100).map(float)
+
+
+# The tests in this file only run the main mathematical functions.
+# The difference is that they run with different tensor ops backends.
+
+backend_tests = ["fast", "simple", "numpy"]
+
+
+@given(data())
+@settings(max_examples=50)
+@pytest.mark.parametrize("fn", one_arg)
+@pytest.mark.parametrize("backend", backend_tests)
+def test_one_args(
+    fn: Tuple[str, Callable[[float], float], Callable[[Tensor], Tensor]],
+    backend: str,
+    data: DataObject,
+) -> None:
+    """Run forward for all one arg functions above."""
+    t1 = data.draw(tensors(backend=shared[backend]))
+    name, base_fn, tensor_fn = fn
+    t2 = tensor_fn(t1)
+    for ind in t2._tensor.indices():
+        assert_close(t2[ind], base_fn(t1[ind]))
+
+
+@given(data())
+@settings(max_examples=50)
+@pytest.mark.parametrize("fn", two_arg)
+@pytest.mark.parametrize("backend", backend_tests)
+def test_two_args(
+    fn: Tuple[str, Callable[[float, float], float], Callable[[Tensor, Tensor], Tensor]],
+    backend: str,
+    data: DataObject,
+) -> None:
+    """Run forward for all two arg functions above."""
+    t1, t2 = data.draw(shaped_tensors(2, backend=shared[backend]))
+    name, base_fn, tensor_fn = fn
+    t3 = tensor_fn(t1, t2)
+    for ind in t3._tensor.indices():
+        assert_close(t3[ind], base_fn(t1[ind], t2[ind]))
+
+
+@given(data())
+@settings(max_examples=25)
+@pytest.mark.parametrize("fn", one_arg)
+@pytest.mark.parametrize("backend", backend_tests)
+def test_one_derivative(
+    fn: Tuple[str, Callable[[float], float], Callable[[Tensor], Tensor]],
+    backend: str,
+    data: DataObject,
+) -> None:
+    """Run backward for all one arg functions above."""
+    t1 = data.draw(tensors(backend=shared[backend]))
+    name, _, tensor_fn = fn
+    grad_check(tensor_fn, t1)
+
+
+@given(data())
+@settings(max_examples=25)
+@pytest.mark.parametrize("fn", two_arg)
+@pytest.mark.parametrize("backend", backend_tests)
+def test_two_grad_broadcast(
+    fn: Tuple[str, Callable[[float, float], float], Callable[[Tensor, Tensor], Tensor]],
+    backend: str,
+    data: DataObject,
+) -> None:
+    """Run backward for all two arg functions above with broadcast."""
+    name, base_fn, tensor_fn = fn
+    if name in comparisons:
+        t1, t2 = data.draw(
+            shaped_tensors(2, numbers=whole_numbers, backend=shared[backend])
+        )
+    else:
+        t1, t2 = data.draw(shaped_tensors(2, backend=shared[backend]))
+    grad_check(tensor_fn, t1, t2)
+
+    # broadcast check
+    grad_check(tensor_fn, t1.sum(0), t2)
+    grad_check(tensor_fn, t1, t2.sum(0))
+
+
+@given(data())
+@settings(max_examples=25)
+@pytest.mark.parametrize("fn", red_arg)
+@pytest.mark.parametrize("backend", backend_tests)
+def test_reduce(
+    fn: Tuple[str, Callable[[Iterable[float]], float], Callable[[Tensor], Tensor]],
+    backend: str,
+    data: DataObject,
+) -> None:
+    """Run backward for all reduce functions above."""
+    t1 = data.draw(tensors(backend=shared[backend]))
+    name, _, tensor_fn = fn
+    grad_check(tensor_fn, t1)
+
+
+@given(data())
+@settings(max_examples=25)
+@pytest.mark.parametrize("backend", backend_tests)
+def test_permute(backend: str, data: DataObject) -> None:
+    """Check permutations for all backends."""
+    t1 = data.draw(tensors(backend=shared[backend]))
+    permutation = data.draw(permutations(range(len(t1.shape))))
+
+    def permute(a: Tensor) -> Tensor:
+        return a.permute(*permutation)
+
+    grad_check(permute, t1)
+
+
+@pytest.mark.parametrize("backend", backend_tests)
+def test_domain_errors(backend: str) -> None:
+    """Log and inverse outside their domain raise on every backend."""
+    b = shared[backend]
+    zero = minitorch.tensor([1.0, 0.0], backend=b)
+    negative = minitorch.tensor([1.0, -2.0], backend=b)
+    ones = minitorch.tensor([1.0, 1.0], backend=b)
+    for bad in (zero, negative):
+        with pytest.raises(ValueError):
+            bad.log()
+        with pytest.raises(ValueError):
+            b.log_back_zip(bad, ones)
+    with pytest.raises(ValueError):
+        b.inv_map(zero)
+    with pytest.raises(ValueError):
+        b.inv_back_zip(zero, ones)
+    assert_close(b.inv_map(negative)[1], -0.5)
+
+
+@pytest.mark.parametrize("backend", backend_tests)
+def test_sum_dims(backend: str) -> None:
+    """Reduce along each dim and over the whole tensor."""
+    t = minitorch.tensor(
+        [[[1, 2, 3], [4, 5, 6]], [[7, 8, 9], [10, 11, 12]]], backend=shared[backend]
+    )
+    assert t.sum(0).shape == (1, 2, 3)
+    assert_close(t.sum(0)[0, 1, 2], 18.0)
+    assert_close(t.sum(1)[1, 0, 0], 17.0)
+    assert_close(t.sum(2)[0, 1, 0], 15.0)
+    assert_close(t.sum()[0], 78.0)
+
+
+@pytest.mark.parametrize("backend", backend_tests)
+def test_broadcast_lower_dims(backend: str) -> None:
+    """Zip a lower-dimensional tensor against a bigger one."""
+    a = minitorch.tensor([[1, 2, 3], [4, 5, 6]], backend=shared[backend])
+    b = minitorch.tensor([10, 20, 30], backend=shared[backend])
+    c = a + b
+    expected: List[List[float]] = [[11, 22, 33], [14, 25, 36]]
+    assert c.shape == (2, 3)
+    for i in range(2):
+        for j in range(3):
+            assert_close(c[i, j], expected[i][j])
+
+
+@pytest.mark.parametrize("backend", backend_tests)
+def test_sum_to_shape(backend: str) -> None:
+    """Reduce several broadcast dimensions in one kernel call."""
+    b = shared[backend]
+    a = minitorch.tensor(np.arange(24.0).reshape(2, 3, 4).tolist(), backend=b)
+    expected = np.arange(24.0).reshape(2, 3, 4)
+    for shape in [(4,), (3, 1), (1, 3, 4), (2, 1, 1), (1,), (2, 3, 4)]:
+        offset = 3 - len(shape)
+        axes = tuple(range(offset)) + tuple(
+            d + offset for d, s in enumerate(shape) if s == 1
+        )
+        out = b.sum_to_shape(a, shape)
+        assert out.shape == shape
+        np.testing.assert_allclose(
+            out.to_numpy(), expected.sum(axis=axes).reshape(shape)
+        )
+
+    out = a.zeros((3,))
+    assert b.sum_to_shape(a.permute(2, 0, 1), (1, 3), out.view(1, 3)).shape == (1, 3)
+    np.testing.assert_allclose(out.to_numpy(), expected.sum(axis=(0, 2)))
+
+
+@pytest.mark.parametrize("backend", backend_tests)
+def test_nn_layers(backend: str) -> None:
+    """nn.Linear matches x @ w + b with its activation, and MLP chains them."""
+    b = shared[backend]
+    layer = minitorch.nn.Linear(3, 2, activation="sigmoid", backend=b)
+    assert [n for n, _ in layer.named_parameters()] == ["weights", "bias"]
+    bound = np.sqrt(6.0 / 5)
+    assert np.all(np.abs(layer.weights.value.to_numpy()) <= bound)
+    layer.bias.value.copy_(minitorch.tensor([0.5, -0.25], backend=b))
+
+    x = minitorch.tensor([[1.0, 2.0, 3.0], [-1.0, 0.5, 0.0]], backend=b)
+    x.requires_grad_(True)
+    w = layer.weights.value.to_numpy()
+    expected = 1 / (1 + np.exp(-(x.to_numpy() @ w + [0.5, -0.25])))
+    out = layer(x)
+    np.testing.assert_allclose(out.to_numpy(), expected, rtol=1e-6)
+    out.sum(0).sum(1).view(1).backward()
+    d = expected * (1 - expected)
+    assert layer.bias.value.grad is not None and x.grad is not None
+    np.testing.assert_allclose(layer.bias.value.grad.to_numpy(), d.sum(0))
+    np.testing.assert_allclose(x.grad.to_numpy(), d @ w.T)
+
+    # A single sample of shape (in_size,) gives an output of shape (out_size,).
+    v = minitorch.tensor([1.0, 2.0, 3.0], backend=b, requires_grad=True)
+    single = layer(v)
+    assert single.shape == (2,)
+    np.testing.assert_allclose(single.to_numpy(), expected[0], rtol=1e-6)
+    single.sum().backward()
+    assert v.grad is not None
+    np.testing.assert_allclose(v.grad.to_numpy(), d[0] @ w.T)
+
+    mlp = minitorch.nn.MLP([3, 4, 4, 1], out_activation="sigmoid", backend=b)
+    assert len(mlp) == 3 and len(mlp.parameters()) == 6
+    assert mlp[0].activation == "relu" and mlp[2].activation == "sigmoid"
+    assert mlp(x).shape == (2, 1)
+    seq = minitorch.nn.Sequential(
+        minitorch.nn.Linear(3, 2, backend=b), minitorch.nn.ReLU()
+    )
+    assert np.all(seq(x).to_numpy() >= 0)
+
+
+def test_numpy_fallback() -> None:
+    """Functions without a vectorized equivalent still run through NumPy."""
+    a = minitorch.tensor([[1, 2, 3], [4, 5, 6]], backend=NumpyTensorBackend)
+    square = minitorch.NumpyOps.map(lambda x: x * x)
+    maximum = minitorch.NumpyOps.reduce(lambda x, y: x if x > y else y, -1e9)
+    assert_close(square(a)[1, 2], 36.0)
+    assert_close(maximum(a, 0)[0, 1], 5.0)
+    assert_close(maximum(a.permute(1, 0), 1)[2, 0], 6.0)
+
+
+@given(data())
+@settings(max_examples=25)
+@pytest.mark.parametrize("backend", backend_tests)
+def test_bmm(backend: str, data: DataObject) -> None:
+    """Batched matmul with broadcast batch dims and permuted inputs."""
+    small_ints = integers(min_value=2, max_value=4)
+    A, B, C, D = (data.draw(small_ints) for _ in range(4))
+    a = data.draw(tensors(backend=shared[backend], shape=(D, A, B)))
+    b = data.draw(tensors(backend=shared[backend], shape=(1, B, C)))
+
+    c = a @ b
+    c2 = (
+        (a.contiguous().view(D, A, B, 1) * b.contiguous().view(1, 1, B, C))
+        .sum(2)
+        .view(D, A, C)
+    )
+    assert_close_tensor(c, c2)
+
+
+@given(data())
+@settings(max_examples=10)
+@pytest.mark.parametrize("backend", backend_tests)
+def test_mm_grad(backend: str, data: DataObject) -> None:
+    """Matmul gradients, including a broadcast batch dimension."""
+    small_ints = integers(min_value=1, max_value=4)
+    A, B, C = (data.draw(small_ints) for _ in range(3))
+    a = data.draw(tensors(backend=shared[backend], shape=(2, A, B)))
+    b = data.draw(tensors(backend=shared[backend], shape=(B, C)))
+    grad_check(lambda x, y: x @ y, a, b)
+
+
+@pytest.mark.parametrize("backend", backend_tests)
+def test_mm_blocked(backend: str) -> None:
+    """Shapes larger than one tile, with a transposed right operand."""
+    a = minitorch.rand((37, 70), backend=shared[backend])
+    b = minitorch.rand((45, 70), backend=shared[backend])
+    c = a @ b.permute(1, 0)
+    expected = a.to_numpy() @ b.to_numpy().T
+    assert c.shape == (37, 45)
+    for ind in [(0, 0), (36, 44), (17, 33), (32, 32)]:
+        assert_close(c[ind], expected[ind])
+
+
+@minitorch.fuse
+def fused_layer(x: Tensor, w: Tensor, b: Tensor) -> Tensor:
+    return (x * w + b - 0.5).sigmoid() * 2.0 + (x * x + 1.0).log() - (w * 0.01).exp()
+
+
+@given(data())
+@settings(max_examples=25)
+@pytest.mark.parametrize("backend", backend_tests)
+def test_fused(backend: str, data: DataObject) -> None:
+    """A fused chain matches the unfused one, forward and backward."""
+    x = data.draw(tensors(backend=shared[backend], shape=(2, 3)))
+    w = data.draw(tensors(backend=shared[backend], shape=(3,)))
+    b = data.draw(tensors(backend=shared[backend], shape=(2, 1)))
+    assert_close_tensor(fused_layer(x, w, b), fused_layer.__wrapped__(x, w, b))
+    grad_check(fused_layer, x, w, b)
+    grad_check(
+        fused_layer,
+        x.permute(1, 0),
+        w.contiguous().view(3, 1),
+        b.contiguous().view(1, 2),
+    )
+
+
+@pytest.mark.parametrize("backend", backend_tests)
+def test_fused_one_function(backend: str) -> None:
+    """The whole chain is recorded as a single node in the graph."""
+    x = minitorch.rand((4, 5), backend=shared[backend], requires_grad=True)
+    y = fused_layer(x, x, x)
+    assert y.history is not None
+    assert isinstance(y.history.last_fn, type)
+    assert issubclass(y.history.last_fn, minitorch.Fused)
+    assert all(i is x for i in y.history.inputs[:3])
+    # The traced Python scalars are constants, with no gradient computed.
+    program = y.history.last_fn.program
+    assert len(program.consts) > 0 and program.n_grads == 3
+    assert all(c.is_constant() for c in y.history.inputs[3:])
+    g = x.zeros((4, 5))
+    assert len(x.f.fused_back(program)(g, *y.history.inputs)) == 3
+
+
+def reference_step(
+    name: str, w: np.ndarray, g: np.ndarray, state: List[np.ndarray], t: int
+) -> np.ndarray:
+    """NumPy version of one optimizer step, with weight decay 0.1"""
+    g = g + 0.1 * w
+    if name == "momentum":
+        state[0] = 0.9 * state[0] + g
+        return w - 0.1 * state[0]
+    if name == "rmsprop":
+        state[0] = 0.99 * state[0] + 0.01 * g * g
+        return w - 0.1 * g / (np.sqrt(state[0]) + 1e-8)
+    state[0] = 0.9 * state[0] + 0.1 * g
+    state[1] = 0.999 * state[1] + 0.001 * g * g
+    m_hat = state[0] / (1 - 0.9**t)
+    v_hat = state[1] / (1 - 0.999**t)
+    return w - 0.1 * m_hat / (np.sqrt(v_hat) + 1e-8)
+
+
+optimizers = {
+    "momentum": lambda p, **kw: minitorch.SGDMomentum(p, 0.1, 0.9, **kw),
+    "rmsprop": lambda p, **kw: minitorch.RMSProp(p, 0.1, **kw),
+    "adam": lambda p, **kw: minitorch.Adam(p, 0.1, **kw),
+}
+
+
+@pytest.mark.parametrize("name", optimizers.keys())
+@pytest.mark.parametrize("backend", backend_tests)
+def test_fused_optimizers(backend: str, name: str) -> None:
+    """Fused optimizers match a NumPy reference, clip and save state."""
+    b = shared[backend]
+    start = np.array([[0.5, -1.0, 2.0], [1.5, 0.25, -0.75]])
+    p = minitorch.Parameter(minitorch.tensor(start.tolist(), backend=b))
+    optim = optimizers[name]([p], weight_decay=0.1)
+    w = start.copy()
+    state = [np.zeros_like(w), np.zeros_like(w)]
+    for t in range(1, 4):
+        optim.zero_grad()
+        (p.value * p.value).sum(0).sum(1).view(1).backward()
+        optim.step()
+        w = reference_step(name, w, 2 * w, state, t)
+        np.testing.assert_allclose(p.value.to_numpy(), w, rtol=1e-6)
+
+    saved = optim.state_dict()
+    assert saved["step"] == 3
+    restored = optimizers[name]([minitorch.Parameter(p.value.detach())])
+    restored.load_state_dict(saved)
+    for a, c in zip(optim.state, restored.state):
+        for key in a:
+            np.testing.assert_allclose(a[key].to_numpy(), c[key].to_numpy())
+    assert restored.weight_decay == 0.1
+
+    # Clipping scales the whole gradient down to the global norm.
+    q = minitorch.Parameter(minitorch.tensor([3.0, 4.0], backend=b))
+    r = minitorch.Parameter(minitorch.tensor([12.0], backend=b))
+    clipped = minitorch.SGDMomentum([q, r], 1.0, 0.0, max_grad_norm=1.0)
+    (q.value.sum() + r.value.sum()).backward()
+    assert q.value.grad is not None and r.value.grad is not None
+    q.value.grad.copy_(minitorch.tensor([3.0, 4.0], backend=b))
+    r.value.grad.fill_(12.0)
+    clipped.step()
+    np.testing.assert_allclose(q.value.to_numpy(), [3 - 3 / 13, 4 - 4 / 13])
+    np.testing.assert_allclose(r.value.to_numpy(), [12 - 12 / 13])
+
+    # The update rule is abstract, so the base class cannot be used directly.
+    with pytest.raises(TypeError):
+        minitorch.FusedOptimizer([q], 1.0)  # type: ignore
+
+
+@given(data())
+@settings(max_examples=25)
+@pytest.mark.parametrize("backend", backend_tests)
+def test_inplace(backend: str, data: DataObject) -> None:
+    """In-place ops write into the existing storage, through any layout."""
+    t1, t2 = data.draw(shaped_tensors(2, backend=shared[backend]))
+    expected = (t1 + t2) * t2 - 2.0
+    storage = t1._tensor._storage
+    t1.add_(t2).mul_(t2).sub_(2.0)
+    assert t1._tensor._storage is storage
+    assert t1._version == 3
+    assert_close_tensor(t1, expected)
+
+    t1.copy_(t2)
+    assert_close_tensor(t1, t2)
+    t1.fill_(4.0)
+    for ind in t1._tensor.indices():
+        assert_close(t1[ind], 4.0)
+
+
+@pytest.mark.parametrize("backend", backend_tests)
+def test_zip_reduce_out(backend: str) -> None:
+    """`out=` reuses the given tensor for zip and reduce."""
+    b = shared[backend]
+    a = minitorch.tensor([[1, 2, 3], [4, 5, 6]], backend=b)
+    out = a.zeros((2, 3))
+    assert b.add_zip(a, minitorch.tensor([1, 1, 1], backend=b), out) is out
+    assert_close(out[1, 2], 7.0)
+
+    out = a.zeros((1, 3)).fill_(100.0)
+    assert b.add_reduce(a, 0, out) is out
+    assert_close(out[0, 1], 7.0)
+    assert b.mul_reduce(a.permute(1, 0), 1, out.view(3, 1)).shape == (3, 1)
+    assert_close(out[0, 2], 18.0)
+
+
+@pytest.mark.parametrize("backend", backend_tests)
+def test_inplace_saved_tensor(backend: str) -> None:
+    """Backward refuses to use a saved tensor that was modified in place."""
+    x = minitorch.tensor([1, 2, 3], backend=shared[backend], requires_grad=True)
+    y = (x * x).sum()
+    x.add_(1.0)
+    with pytest.raises(RuntimeError):
+        y.backward()
+
+    # Views share the counter, and unsaved tensors may be modified freely.
+    z = (x.permute(0) + 1.0).sum()
+    x.view(3).mul_(2.0)
+    z.backward()
+    assert x.grad is not None
+
+
+@given(data())
+@settings(max_examples=25)
+@pytest.mark.parametrize("backend", backend_tests)
+def test_view_ops(backend: str, data: DataObject) -> None:
+    """Slicing, narrowing, broadcasting and (un)squeezing are differentiable."""
+    small_ints = integers(min_value=2, max_value=4)
+    A, B = data.draw(small_ints), data.draw(small_ints)
+    t = data.draw(tensors(backend=shared[backend], shape=(A, B)))
+    start = data.draw(integers(min_value=0, max_value=A - 1))
+
+    grad_check(lambda a: a[start:, ::2], t)
+    grad_check(lambda a: a[start] * 2.0, t)
+    grad_check(lambda a: a.narrow(1, 1, B - 1), t)
+    grad_check(lambda a: a[:, 0:1].broadcast_to(3, A, B), t)
+    grad_check(lambda a: a.unsqueeze(1).squeeze(1).transpose(0, 1), t)
+    grad_check(lambda a: a.transpose(0, 1).view(A * B), t)
+    grad_check(lambda a: a[::2].view(1, -(-A // 2) * B), t)
+
+    v = t[start:, 1:]
+    assert np.shares_memory(v._tensor._storage, t._tensor._storage)
+    for i in range(A - start):
+        for j in range(B - 1):
+            assert v[i, j] == t[start + i, j + 1]
+
+
+@pytest.mark.parametrize("backend", backend_tests)
+def test_view_writes(backend: str) -> None:
+    """In-place ops on a view write through to the base tensor only."""
+    t = minitorch.tensor([[1, 2, 3], [4, 5, 6]], backend=shared[backend])
+    t[:, 1:].mul_(10.0)
+    t[1].add_(t[0])
+    assert t.to_numpy().tolist() == [[1, 20, 30], [5, 70, 90]]
+    assert_close(t[:, ::2].sum()[0], 1 + 30 + 5 + 90)